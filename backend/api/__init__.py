@@ -4,7 +4,16 @@ API endpoint handlers for the AI Component Builder backend.
 This package contains all Flask route handlers and API-related functionality.
 """
 
+from .admin import admin_bp
+from .compression import init_compression
+from .components import components_bp
+from .errors import handle_error
+from .forms import forms_bp
+from .gallery import gallery_bp
+from .websocket import ws_bp
+
+__all__ = ['admin_bp', 'init_compression', 'components_bp', 'forms_bp', 'gallery_bp', 'handle_error', 'ws_bp']
+
 # Future imports will go here as we add API modules
 # from .chat import chat_bp
 # from .conversation import conversation_bp
-# from .components import components_bp
@@ -0,0 +1,135 @@
+"""
+Operator endpoints for the AI Component Builder backend.
+
+Admin endpoints expose data about every tenant, so they require the
+X-Admin-Token header to match the ADMIN_TOKEN config value and are disabled
+entirely when no token is configured.
+"""
+
+import hmac
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request
+
+from api.errors import handle_error
+from utils.profiler import ProfilerBusyError
+from utils.structured_logging import get_logging_controller
+
+admin_bp = Blueprint("admin", __name__)
+
+
+def require_admin(view):
+    """Reject requests without a valid admin token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("ADMIN_TOKEN")
+        if not token:
+            return handle_error("not_found", "Admin endpoints are disabled", 404, False)
+        supplied = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8")):
+            return handle_error("authentication_error", "Invalid admin token", 401, False)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route("/api/admin/tenants", methods=["GET"])
+@require_admin
+def tenant_stats():
+    """Per-tenant latency, usage and budget state plus scheduler queue state"""
+    service = current_app.extensions["ai_service"].get()
+    return jsonify({
+        "scheduler": service.scheduler.stats(),
+        "budget": {
+            "windowSeconds": service.tenants.window_seconds,
+            "maxRequests": service.tenants.max_requests,
+            "maxTokens": service.tenants.max_tokens,
+        },
+        "tenants": service.tenants.stats(),
+    })
+
+
+@admin_bp.route("/api/admin/http-pool", methods=["GET"])
+@require_admin
+def http_pool_stats():
+    """Upstream connection pool configuration, connection states and counters"""
+    service = current_app.extensions["ai_service"].get()
+    if service.http_pool is None:
+        return handle_error("api_error", "AI service has no connection pool", 503, False)
+    return jsonify(service.http_pool.stats())
+
+
+@admin_bp.route("/api/admin/snapshot", methods=["GET"])
+@require_admin
+def snapshot_status():
+    """Snapshot file, interval and the summaries of the last save and load"""
+    service = current_app.extensions["ai_service"].get()
+    if service.snapshots is None:
+        return handle_error("api_error", "Snapshots are not configured", 503, False)
+    return jsonify(service.snapshots.status())
+
+
+@admin_bp.route("/api/admin/snapshot", methods=["POST"])
+@require_admin
+def save_snapshot():
+    """Write a snapshot now, e.g. before draining a worker"""
+    service = current_app.extensions["ai_service"].get()
+    if service.snapshots is None:
+        return handle_error("api_error", "Snapshots are not configured", 503, False)
+    try:
+        summary = service.snapshots.save()
+    except OSError as e:
+        return handle_error("api_error", f"Snapshot could not be written: {e}", 500, True)
+    return jsonify({"saved": summary is not None, "snapshot": summary})
+
+
+@admin_bp.route("/api/admin/logging", methods=["GET"])
+@require_admin
+def logging_stats():
+    """Background log writer counters: queued, dropped and sampled-out records"""
+    controller = get_logging_controller()
+    if controller is None:
+        return handle_error("api_error", "Structured logging is not configured", 503, False)
+    return jsonify(controller.stats())
+
+
+@admin_bp.route("/api/admin/profiler", methods=["GET"])
+@require_admin
+def profiler_status():
+    """Running profile, if any, and a summary of the last written one"""
+    return jsonify(current_app.extensions["profiler"].status())
+
+
+@admin_bp.route("/api/admin/profiler", methods=["POST"])
+@require_admin
+def start_profiler():
+    """
+    Start a sampling profile
+
+    Body: {"seconds": 30} profiles every thread; adding "requestSampleRate"
+    profiles only that fraction of chat requests, grouped per request. The
+    collapsed stacks are written to the profile directory when it ends.
+    """
+    data = request.get_json(silent=True) or {}
+    seconds = data.get("seconds", 30)
+    rate = data.get("requestSampleRate")
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)):
+        return handle_error("validation_error", "seconds must be a number", 400, False)
+    if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float))):
+        return handle_error("validation_error", "requestSampleRate must be a number", 400, False)
+    try:
+        status = current_app.extensions["profiler"].start(seconds, rate)
+    except ValueError as e:
+        return handle_error("validation_error", str(e), 400, False)
+    except ProfilerBusyError as e:
+        return handle_error("conflict_error", str(e), 409, False)
+    return jsonify(status), 202
+
+
+@admin_bp.route("/api/admin/profiler", methods=["DELETE"])
+@require_admin
+def stop_profiler():
+    """End the running profile now and return the written profile's summary"""
+    summary = current_app.extensions["profiler"].stop()
+    if summary is None:
+        return handle_error("not_found", "No profile is running", 404, False)
+    return jsonify(summary)
@@ -0,0 +1,59 @@
+"""
+Endpoints for finding and re-fetching previously generated components.
+"""
+
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+from api.errors import handle_error
+from models.component_history import DEFAULT_SEARCH_LIMIT
+
+components_bp = Blueprint("components", __name__)
+
+
+def _history_store():
+    """Get the app's component history store, or None if it is disabled"""
+    return current_app.extensions["component_history"].get()
+
+
+def _tenant():
+    """Tenant of the current request; history is only shared within a tenant"""
+    return current_app.extensions["tenant_resolver"].resolve(request.headers)
+
+
+@components_bp.route("/api/components/search", methods=["GET"])
+def search_components():
+    """Full-text search over the components previously generated for the tenant"""
+    store = _history_store()
+    if store is None:
+        return handle_error("api_error", "Component history is disabled", 503, False)
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return handle_error("validation_error", "Query parameter 'q' is required", 400, False)
+
+    limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT, type=int)
+    component_type = request.args.get("type") or None
+
+    started = time.perf_counter()
+    results = store.search(_tenant(), query, limit=limit, component_type=component_type)
+
+    return jsonify({
+        "query": query,
+        "results": results,
+        "tookMs": round((time.perf_counter() - started) * 1000, 2),
+    })
+
+
+@components_bp.route("/api/components/<component_id>", methods=["GET"])
+def get_component(component_id):
+    """Fetch a stored component; supports conditional GET through its ETag"""
+    store = _history_store()
+    if store is None:
+        return handle_error("api_error", "Component history is disabled", 503, False)
+
+    component = store.get(_tenant(), component_id)
+    if component is None:
+        return handle_error("not_found", f"Component {component_id} not found", 404, False)
+    return jsonify(component)
@@ -0,0 +1,131 @@
+"""
+Response compression and conditional GET support for the API.
+
+Generated components are mostly TSX source and compress several-fold. This
+module registers an after_request hook that tags JSON responses with a weak
+content-hash ETag, answers matching conditional GETs with 304, and compresses
+bodies above a size threshold using brotli (when installed) or gzip.
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_CACHE_ENTRIES = 256
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def content_etag(body: bytes) -> str:
+    """Compute a stable content-hash ETag value for a response body"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class ResponseCompressor:
+    """
+    Negotiates and applies response compression
+
+    Compressed bodies are kept in a small LRU keyed by content hash and encoding,
+    so repeated responses (for example cache hits for the same component) are
+    only compressed once.
+    """
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.min_size = min_size
+        self.cache_entries = cache_entries
+        self._compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def choose_encoding(self) -> Optional[str]:
+        """Pick the best encoding accepted by the current request"""
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"]:
+            return "br"
+        if accepted["gzip"]:
+            return "gzip"
+        return None
+
+    def compress(self, body: bytes, encoding: str, etag: str) -> bytes:
+        """Compress body, reusing a previously compressed copy when possible"""
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._compressed.get(key)
+            if cached is not None:
+                self._compressed.move_to_end(key)
+                return cached
+
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+        with self._lock:
+            self._compressed[key] = compressed
+            while len(self._compressed) > self.cache_entries:
+                self._compressed.popitem(last=False)
+        return compressed
+
+    def process(self, response: Response) -> Response:
+        """after_request hook: add ETag, handle conditional GETs and compress"""
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code != 200
+            or response.mimetype != "application/json"
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        body = response.get_data()
+        etag = content_etag(body)
+        response.set_etag(etag, weak=True)
+
+        # Only GET/HEAD are conditional; this turns matching requests into 304
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if len(body) < self.min_size:
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        response.set_data(self.compress(body, encoding, etag))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def init_compression(app: Flask) -> ResponseCompressor:
+    """
+    Register response compression on a Flask app
+
+    Reads COMPRESSION_MIN_SIZE (bytes, default 1024) and COMPRESSION_CACHE_ENTRIES
+    from the app config.
+
+    Returns:
+        The registered compressor
+    """
+    compressor = ResponseCompressor(
+        min_size=app.config.get("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE),
+        cache_entries=app.config.get("COMPRESSION_CACHE_ENTRIES", DEFAULT_CACHE_ENTRIES),
+    )
+    app.after_request(compressor.process)
+    app.extensions["compression"] = compressor
+    logger.info("Response compression enabled (%sgzip)", "brotli, " if brotli else "")
+    return compressor
@@ -0,0 +1,22 @@
+"""
+Error responses shared by all API endpoints.
+"""
+
+import logging
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+
+def handle_error(error_type, message, status_code=500, retry=True):
+    """Centralized error handling function"""
+    error_response = {
+        "error": {
+            "type": error_type,
+            "message": message,
+            "retry": retry,
+        }
+    }
+    logger.error("API Error: %s - %s", error_type, message)
+    return jsonify(error_response), status_code
@@ -0,0 +1,27 @@
+"""
+Endpoint compiling an explicit form schema into a component.
+"""
+
+from flask import Blueprint, current_app, jsonify, request
+
+from api.errors import handle_error
+from services.form_compiler import FormSchemaError, normalize_form_schema
+from utils.prompt_manager import normalize_fields
+
+forms_bp = Blueprint("forms", __name__)
+
+
+@forms_bp.route("/api/forms/compile", methods=["POST"])
+def compile_form():
+    """Compile a posted FormSchema locally; no model call is made"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or "schema" not in data:
+        return handle_error("validation_error", "schema is required", 400, False)
+
+    try:
+        schema = normalize_form_schema(data["schema"])
+        fields = normalize_fields(data["fields"]) if data.get("fields") is not None else None
+    except (FormSchemaError, ValueError) as e:
+        return handle_error("validation_error", str(e), 400, False)
+
+    return jsonify(current_app.extensions["ai_service"].compile_form(schema, fields))
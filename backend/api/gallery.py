@@ -0,0 +1,41 @@
+"""
+Endpoints serving the precomputed gallery of category starter components.
+"""
+
+from flask import Blueprint, current_app, jsonify
+
+from api.errors import handle_error
+
+gallery_bp = Blueprint("gallery", __name__)
+
+
+def _gallery():
+    return current_app.extensions["component_gallery"].get()
+
+
+@gallery_bp.before_request
+def require_gallery_enabled():
+    """Hide the gallery, and never start its worker, when GALLERY_ENABLED is off"""
+    if not current_app.config.get("GALLERY_ENABLED"):
+        return handle_error("not_found", "The component gallery is disabled", 404, False)
+    return None
+
+
+@gallery_bp.route("/api/gallery", methods=["GET"])
+def list_gallery():
+    """Freshness of every category starter"""
+    return jsonify({"categories": _gallery().overview()})
+
+
+@gallery_bp.route("/api/gallery/<category>", methods=["GET"])
+def get_gallery_entry(category):
+    """
+    Serve a category starter component with its freshness
+
+    Stale entries are served while a background refresh runs; 202 means the
+    entry has not been generated yet.
+    """
+    report = _gallery().get(category)
+    if report is None:
+        return handle_error("not_found", f"Unknown gallery category {category}", 404, False)
+    return jsonify(report), 200 if report["component"] is not None else 202
@@ -0,0 +1,33 @@
+"""
+Hooks that let the sampling profiler follow individual chat requests.
+
+While a per-request profile is running, a sampled fraction of chat requests
+register their handler thread with the profiler, so their stacks are
+collected and grouped under the request id.
+"""
+
+from flask import Flask, request
+
+from utils.profiler import SamplingProfiler
+from utils.structured_logging import request_id_var
+
+# Endpoints whose requests may be sampled by a per-request profile
+PROFILED_ENDPOINTS = {"api.chat"}
+
+
+def init_profiling(app: Flask) -> SamplingProfiler:
+    """Create the app's profiler and register the request hooks"""
+    profiler = SamplingProfiler(app.config.get("PROFILE_DIR"))
+    app.extensions["profiler"] = profiler
+
+    @app.before_request
+    def track_profiled_request():
+        active = app.extensions["profiler"]
+        if request.endpoint in PROFILED_ENDPOINTS and active.should_track():
+            active.track_current_thread(f"request:{request_id_var.get()}")
+
+    @app.teardown_request
+    def untrack_profiled_request(_error=None):
+        app.extensions["profiler"].untrack_current_thread()
+
+    return profiler
@@ -0,0 +1,44 @@
+"""
+Per-request ids for the AI Component Builder backend.
+
+Each request gets an id, taken from the X-Request-ID header when the client
+or a proxy sends one, that is attached to every log line written while the
+request is handled and echoed back in the response headers.
+"""
+
+import re
+import uuid
+
+from flask import Flask, request
+
+from utils.structured_logging import NO_REQUEST_ID, request_id_var
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Client-supplied ids end up in logs, so only plain tokens are accepted
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def is_valid_request_id(value: str) -> bool:
+    """Whether a client-supplied id is safe to use as a request id"""
+    return bool(_VALID_REQUEST_ID.match(value))
+
+
+def init_request_ids(app: Flask) -> None:
+    """Register the request id hooks on the app"""
+
+    @app.before_request
+    def assign_request_id():
+        supplied = request.headers.get(REQUEST_ID_HEADER, "")
+        request_id = supplied if is_valid_request_id(supplied) else uuid.uuid4().hex
+        request_id_var.set(request_id)
+
+    @app.after_request
+    def echo_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = request_id_var.get()
+        return response
+
+    @app.teardown_request
+    def clear_request_id(_error=None):
+        # Worker threads are reused; do not leak the id into the next request
+        request_id_var.set(NO_REQUEST_ID)
@@ -0,0 +1,388 @@
+"""
+WebSocket chat channel for the AI Component Builder backend.
+
+A client keeps one socket open per session instead of paying for an HTTP
+request (and CORS preflight) per turn. Each turn is a small JSON frame tagged
+with a client-chosen id; several turns can be generating at once on the same
+socket, and every frame the server sends back carries the id of the turn it
+belongs to.
+
+Client frames:
+    {"type": "chat", "id": "t1", "messages": [...]}
+        Generate from a full conversation, as POST /api/chat does
+    {"type": "chat", "id": "t2", "content": "...", "conversation": "main"}
+        Append a user turn to a conversation kept on the server for the
+        lifetime of the socket, so only the new text is sent. With
+        "parent": "<turn id>" the turn continues from that earlier turn
+        instead, which edits or regenerates a message without resending
+        the history; the conversation then continues from the new turn
+    {"type": "fork", "conversation": "alt", "at": "<turn id>"}
+        Start (or move) a conversation at an existing turn, or at the latest
+        turn of another conversation with "from": "main"
+    {"type": "reset", "conversation": "main"}
+    {"type": "ping"}
+
+Both chat forms accept optional "deadlineMs" and "fields" values, as the
+HTTP endpoint does.
+
+Server frames: "accepted", "progress" (stage updates), "chunk" (raw model
+output as it streams in), "result" (the same payload as POST /api/chat, plus
+the ids of the stored user and assistant turns for server-side
+conversations), "error" (the same error object as the HTTP API), "forked",
+"reset" and "pong".
+
+Conversations are branches of one models.conversation.ConversationTree per
+socket, so forks share the turns before the fork point.
+
+The endpoint needs flask-sock; without it the route is not registered and
+clients fall back to POST /api/chat.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from flask import Blueprint, current_app, request
+
+from api.request_ids import is_valid_request_id
+from models.conversation import ConversationError, ConversationTree, Turn
+from services.health import CircuitOpenError
+from services.tenancy import BudgetExceededError
+from utils import json_codec
+from utils.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from utils.preflight import PreflightError
+from utils.prompt_manager import normalize_fields
+from utils.structured_logging import request_id_var
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:  # pragma: no cover - depends on the environment
+    Sock = None
+    ConnectionClosed = None
+
+logger = logging.getLogger(__name__)
+
+WS_PATH = "/api/ws"
+DEFAULT_CONVERSATION = "default"
+
+# Streamed text is sent once this much has accumulated, or this long after
+# the previous chunk, rather than one frame per token
+CHUNK_MIN_CHARS = 256
+CHUNK_MAX_DELAY = 0.1
+
+ws_bp = Blueprint("ws", __name__)
+
+
+def websocket_available() -> bool:
+    """Whether flask-sock is installed and the endpoint is registered"""
+    return Sock is not None
+
+
+def _error_frame(error_type: str, message: str, retry: bool, **extra: Any) -> Dict[str, Any]:
+    logger.error("WebSocket Error: %s - %s", error_type, message)
+    return {"type": "error", "error": {"type": error_type, "message": message, "retry": retry, **extra}}
+
+
+def error_frame_for(error: Exception) -> Dict[str, Any]:
+    """Map a generation failure to the error object POST /api/chat would return"""
+    if isinstance(error, PreflightError):
+        return _error_frame("validation_error", str(error), False, status=error.status_code)
+    if isinstance(error, DeadlineExceeded):
+        return _error_frame("timeout_error", str(error), True, status=504)
+    if isinstance(error, BudgetExceededError):
+        return _error_frame("rate_limit_error", str(error), True, status=429, retryAfter=error.retry_after)
+    if isinstance(error, CircuitOpenError):
+        return _error_frame("api_error", str(error), True, status=503, retryAfter=error.retry_after)
+    return _error_frame("api_error", f"Server error: {str(error)}", True, status=500)
+
+
+def _assistant_content(result: Dict[str, Any]) -> str:
+    """
+    Assistant turn stored for a generated component
+
+    The serialized {code, schema} response, as a client of POST /api/chat
+    sends back its earlier replies, so follow-up turns see the whole previous
+    component rather than just its code.
+    """
+    return json_codec.dumps({"code": result.get("code", ""), "schema": result.get("schema")})
+
+
+class _TurnEvents:
+    """Event callback forwarding one turn's progress, with streamed text coalesced"""
+
+    def __init__(self, session: "ChatSession", turn_id: str):
+        self.session = session
+        self.turn_id = turn_id
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._sent_at = time.monotonic()
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        # Raising here stops the generation and closes the upstream stream
+        if self.session.cancelled.is_set():
+            raise RequestCancelled(f"Connection closed during turn {self.turn_id}")
+        if event == "chunk":
+            self._pending.append(data["text"])
+            self._pending_chars += len(data["text"])
+            if self._pending_chars >= CHUNK_MIN_CHARS or time.monotonic() - self._sent_at >= CHUNK_MAX_DELAY:
+                self.flush()
+            return
+        self.flush()
+        self.session.send({"type": event, "id": self.turn_id, **data})
+
+    def flush(self) -> None:
+        """Send any text still buffered"""
+        if self._pending:
+            self.session.send({"type": "chunk", "id": self.turn_id, "text": "".join(self._pending)})
+            self._pending.clear()
+            self._pending_chars = 0
+        self._sent_at = time.monotonic()
+
+
+class ChatSession:
+    """
+    One WebSocket connection: turn dispatch, server-side history and framing
+
+    Turns run on a small per-connection thread pool. Sends are serialized, so
+    frames of concurrent turns interleave but never tear.
+    """
+
+    def __init__(
+        self,
+        ws: Any,
+        service: Any,
+        tenant: str,
+        connection_id: str,
+        default_deadline_ms: Optional[int] = None,
+        max_streams: int = 4
+    ):
+        """
+        Args:
+            ws: Socket with send(str)
+            service: AIService generating the components
+            tenant: Tenant every turn is scheduled and accounted under
+            connection_id: Request id of the handshake, prefixed to turn ids in logs
+            default_deadline_ms: Deadline for turns that do not send deadlineMs
+            max_streams: Maximum turns generating at once on this connection
+        """
+        self.ws = ws
+        self.service = service
+        self.tenant = tenant
+        self.connection_id = connection_id
+        self.default_deadline_ms = default_deadline_ms
+        self.max_streams = max_streams
+        self.conversations = ConversationTree()
+        self._active: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        # Set when the client is gone; running turns stop at their next event
+        self.cancelled = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_streams, thread_name_prefix="ws-turn")
+
+    def send(self, frame: Dict[str, Any]) -> None:
+        """Send one frame; silently dropped once the socket has closed"""
+        with self._send_lock:
+            if self._closed:
+                return
+            try:
+                self.ws.send(json_codec.dumps(frame))
+            except Exception as e:
+                logger.info("WebSocket: send failed, closing session: %s", e)
+                self._closed = True
+                self.cancelled.set()
+
+    def handle(self, raw: Any) -> None:
+        """Dispatch one client frame"""
+        try:
+            frame = json_codec.loads(raw)
+        except Exception:
+            self.send(_error_frame("validation_error", "Frames must be JSON objects", False))
+            return
+        if not isinstance(frame, dict):
+            self.send(_error_frame("validation_error", "Frames must be JSON objects", False))
+            return
+
+        frame_type = frame.get("type")
+        if frame_type == "chat":
+            self._start_turn(frame)
+        elif frame_type == "reset":
+            conversation = frame.get("conversation", DEFAULT_CONVERSATION)
+            with self._lock:
+                self.conversations.delete(conversation)
+            self.send({"type": "reset", "conversation": conversation})
+        elif frame_type == "fork":
+            self._fork(frame)
+        elif frame_type == "ping":
+            self.send({"type": "pong"})
+        else:
+            self.send(_error_frame("validation_error", f"Unknown frame type: {frame_type}", False))
+
+    def _start_turn(self, frame: Dict[str, Any]) -> None:
+        turn_id = frame.get("id")
+        if not isinstance(turn_id, str) or not is_valid_request_id(turn_id):
+            self.send(_error_frame("validation_error", "Chat frames need an id of letters, digits and ._:-", False))
+            return
+
+        def reject(message: str, error_type: str = "validation_error", retry: bool = False) -> None:
+            self.send({**_error_frame(error_type, message, retry), "id": turn_id})
+
+        deadline_ms = frame.get("deadlineMs", self.default_deadline_ms)
+        if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, int) or deadline_ms <= 0):
+            reject("deadlineMs must be a positive integer")
+            return
+
+        fields = frame.get("fields")
+        if fields is not None:
+            try:
+                normalize_fields(fields)
+            except ValueError as e:
+                reject(str(e))
+                return
+
+        conversation = None
+        user_turn: Optional[Turn] = None
+        parent = frame.get("parent")
+        if parent is not None and not isinstance(parent, str):
+            reject("parent must be a turn id")
+            return
+        if "messages" in frame:
+            messages = frame["messages"]
+            if not isinstance(messages, list) or not messages:
+                reject("messages must be a non-empty array")
+                return
+        else:
+            content = frame.get("content")
+            if not isinstance(content, str) or not content.strip():
+                reject("Chat frames need messages or content")
+                return
+            conversation = frame.get("conversation", DEFAULT_CONVERSATION)
+            if not isinstance(conversation, str):
+                reject("conversation must be a string")
+                return
+
+        with self._lock:
+            if turn_id in self._active:
+                reject(f"Turn {turn_id} is already running")
+                return
+            if len(self._active) >= self.max_streams:
+                reject(f"At most {self.max_streams} turns can run at once on a connection", "rate_limit_error", True)
+                return
+            if conversation is not None:
+                if conversation in self._active.values():
+                    reject(f"Conversation {conversation} already has a turn running", retry=True)
+                    return
+                try:
+                    base = (
+                        self.conversations.get(parent) if parent is not None
+                        else self.conversations.head(conversation)
+                    )
+                    if conversation not in self.conversations:
+                        self.conversations.set_head(conversation, None)
+                except ConversationError as e:
+                    reject(str(e))
+                    return
+                user_turn = self.conversations.add(base, "user", content)
+                messages = user_turn.messages()
+            self._active[turn_id] = conversation
+
+        # Start the clock at acceptance so queueing on the connection counts
+        deadline = Deadline(deadline_ms / 1000) if deadline_ms is not None else None
+        self.send({"type": "accepted", "id": turn_id})
+        context = contextvars.copy_context()
+        self._executor.submit(
+            context.run, self._run_turn, turn_id, messages, conversation, deadline, fields, user_turn
+        )
+
+    def _fork(self, frame: Dict[str, Any]) -> None:
+        conversation = frame.get("conversation")
+        at, source = frame.get("at"), frame.get("from")
+        if not isinstance(conversation, str) or any(
+            value is not None and not isinstance(value, str) for value in (at, source)
+        ):
+            self.send(_error_frame("validation_error", "Fork frames need a conversation name and a turn id", False))
+            return
+        with self._lock:
+            if conversation in self._active.values():
+                self.send(_error_frame("validation_error", f"Conversation {conversation} has a turn running", True))
+                return
+            try:
+                if at is None and source is not None:
+                    head = self.conversations.head(source)
+                    at = head.turn_id if head is not None else None
+                turn = self.conversations.fork(conversation, at)
+            except ConversationError as e:
+                self.send(_error_frame("validation_error", str(e), False))
+                return
+        self.send({"type": "forked", "conversation": conversation, "head": turn.turn_id if turn else None})
+
+    def _run_turn(
+        self,
+        turn_id: str,
+        messages: List[Dict[str, str]],
+        conversation: Optional[str],
+        deadline: Optional[Deadline],
+        fields: Optional[List[str]] = None,
+        user_turn: Optional[Turn] = None
+    ) -> None:
+        request_id_var.set(f"{self.connection_id}:{turn_id}")
+        events = _TurnEvents(self, turn_id)
+        try:
+            if not self.service.is_available():
+                raise Exception("AI service not available. Please check your API key.")
+            result = self.service.generate_component(
+                messages, tenant=self.tenant, deadline=deadline, on_event=events, fields=fields
+            )
+        except RequestCancelled:
+            logger.info("WebSocket: turn %s cancelled, client disconnected", turn_id)
+        except Exception as e:
+            events.flush()
+            self.send({**error_frame_for(e), "id": turn_id})
+        else:
+            frame = {"type": "result", "id": turn_id, "data": result}
+            if conversation is not None and user_turn is not None:
+                reply = self.conversations.add(user_turn, "assistant", _assistant_content(result))
+                with self._lock:
+                    self.conversations.set_head(conversation, reply)
+                frame.update(conversation=conversation, userTurnId=user_turn.turn_id, turnId=reply.turn_id)
+            events.flush()
+            self.send(frame)
+        finally:
+            with self._lock:
+                self._active.pop(turn_id, None)
+
+    def close(self) -> None:
+        """Stop accepting turns, drop queued ones and cancel the running ones"""
+        with self._send_lock:
+            self._closed = True
+        self.cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+if Sock is not None:
+    sock = Sock()
+
+    @sock.route(WS_PATH, bp=ws_bp)
+    def chat_socket(ws):
+        """Serve chat turns over one long-lived WebSocket connection"""
+        session = ChatSession(
+            ws,
+            current_app.extensions["ai_service"],
+            tenant=current_app.extensions["tenant_resolver"].resolve(request.headers),
+            connection_id=request_id_var.get(),
+            default_deadline_ms=current_app.config.get("DEFAULT_DEADLINE_MS"),
+            max_streams=current_app.config.get("WS_MAX_STREAMS", 4),
+        )
+        logger.info("WebSocket: session opened for tenant %s", session.tenant)
+        try:
+            while True:
+                session.handle(ws.receive())
+        except ConnectionClosed:
+            pass
+        finally:
+            session.close()
+            logger.info("WebSocket: session closed")
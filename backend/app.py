@@ -1,52 +1,79 @@
 import os
 import json
+import math
 import logging
-from flask import Flask, request, jsonify
+from typing import Any, Dict, Optional
+from flask import Blueprint, Flask, current_app, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from dotenv import load_dotenv
-from services.ai_service import AIService
+from services.ai_service import AIService, MAX_VARIANTS
+from utils.json_codec import FastJSONProvider
+from utils.lazy import LazyService
+from utils.prompt_manager import ComponentType, normalize_fields
+from utils.preflight import PreflightError
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.structured_logging import configure_logging
+from api.compression import init_compression
+from api.request_ids import init_request_ids
+from api.profiling import init_profiling
+from api.errors import handle_error
+from api.components import components_bp
+from api.admin import admin_bp
+from api.forms import forms_bp
+from api.gallery import gallery_bp
+from api.websocket import ws_bp
+from models.component_history import build_history_store_from_env
+from services.health import CircuitOpenError
+from services.tenancy import BudgetExceededError, TenantResolver
+from services.gallery import ComponentGallery
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: JSON lines written by a background thread (see
+# utils.structured_logging for LOG_FORMAT, LOG_LEVEL and sampling settings)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app)
-
-# Initialize services
-ai_service = AIService()
+# Services are built on first use (or by warm_up), so importing the app does
+# not load the anthropic SDK or create network clients
+history_store = LazyService(build_history_store_from_env, name="component history")
+ai_service = LazyService(lambda: AIService(history=history_store.get()), name="AI service")
+gallery = LazyService(lambda: ComponentGallery(ai_service.get()), name="component gallery")
 conversation_service = None  # Will be implemented in next task
 
-logger.info("✅ Services initialized successfully")
-
-def handle_error(error_type, message, status_code=500, retry=True):
-    """Centralized error handling function"""
-    error_response = {
-        "error": {
-            "type": error_type,
-            "message": message,
-            "retry": retry,
-        }
-    }
-    logger.error(f"API Error: {error_type} - {message}")
-    return jsonify(error_response), status_code
-
-
+api_bp = Blueprint("api", __name__)
 
+DEFAULT_CONFIG = {
+    "WARM_UP": os.getenv("WARM_UP_ON_START", "false").lower() == "true",
+    # Request bodies above this are rejected before they are read
+    "MAX_CONTENT_LENGTH": int(os.getenv("MAX_REQUEST_BYTES", str(2 * 1024 * 1024))),
+    # Deadline applied to chat requests that do not send X-Request-Deadline-Ms
+    "DEFAULT_DEADLINE_MS": int(os.getenv("REQUEST_DEADLINE_MS", "0")) or None,
+    # Serve category starter prompts from the precomputed gallery
+    "GALLERY_ENABLED": os.getenv("GALLERY_ENABLED", "true").lower() == "true",
+    # /ready reports not ready above this many queued upstream calls
+    # (defaults to four times the concurrency limit)
+    "READY_MAX_QUEUE_DEPTH": int(os.getenv("READY_MAX_QUEUE_DEPTH", "0")) or None,
+    # Turns that may generate at once on one /api/ws connection
+    "WS_MAX_STREAMS": int(os.getenv("WS_MAX_STREAMS", "4")),
+    # Enables the /api/admin endpoints
+    "ADMIN_TOKEN": os.getenv("ADMIN_TOKEN"),
+}
 
-
-@app.route("/api/chat", methods=["POST"])
+@api_bp.route("/api/chat", methods=["POST"])
 def chat():
     """Handle chat messages and generate component responses"""
     try:
         logger.info("Received chat request")
 
+        # Start the clock before any work so the budget covers the whole request
+        try:
+            deadline = Deadline.from_headers(request.headers, current_app.config.get("DEFAULT_DEADLINE_MS"))
+        except ValueError as e:
+            return handle_error("validation_error", str(e), 400, False)
+
         # Check if AI service is available
         if not ai_service.is_available():
             return handle_error(
@@ -58,35 +85,183 @@ def chat():
 
         try:
             data = request.get_json()
+        except RequestEntityTooLarge:
+            return handle_error(
+                "validation_error",
+                f"Request body exceeds {current_app.config['MAX_CONTENT_LENGTH']} bytes",
+                413,
+                False
+            )
         except Exception as e:
-            logger.error(f"JSON parsing error: {e}")
+            logger.error("JSON parsing error: %s", e)
             return handle_error("validation_error", "Invalid JSON format", 400, False)
 
         if not data or "messages" not in data:
             return handle_error("validation_error", "Messages are required", 400, False)
 
         messages = data["messages"]
+        tenant = current_app.extensions["tenant_resolver"].resolve(request.headers)
 
         # Validate messages array is not empty
         if not messages:
             return handle_error("validation_error", "Messages array cannot be empty", 400, False)
 
+        # Optional selection of the response fields to generate
+        fields = data.get("fields")
+        if fields is not None:
+            try:
+                normalize_fields(fields)
+            except ValueError as e:
+                return handle_error("validation_error", str(e), 400, False)
+
+        # Optional fan-out into several concurrently generated alternatives
+        variants = data.get("variants")
+        if variants is not None:
+            if isinstance(variants, bool) or not isinstance(variants, int) or not 1 <= variants <= MAX_VARIANTS:
+                return handle_error(
+                    "validation_error",
+                    f"variants must be an integer between 1 and {MAX_VARIANTS}",
+                    400,
+                    False
+                )
+            return jsonify(ai_service.generate_variants(
+                messages, variants, tenant=tenant, deadline=deadline, fields=fields
+            ))
+
+        # Category starters are precomputed; serve them without waiting on upstream
+        gallery_response = _serve_from_gallery(messages, fields)
+        if gallery_response is not None:
+            return jsonify(gallery_response)
+
         # Use AI service to generate component
-        component_response = ai_service.generate_component(messages)
+        component_response = ai_service.generate_component(
+            messages, tenant=tenant, deadline=deadline, fields=fields
+        )
         return jsonify(component_response)
 
+    except PreflightError as e:
+        return handle_error("validation_error", str(e), e.status_code, False)
+    except DeadlineExceeded as e:
+        return handle_error("timeout_error", str(e), 504, True)
+    except BudgetExceededError as e:
+        response, status_code = handle_error("rate_limit_error", str(e), 429, True)
+        response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+        return response, status_code
+    except CircuitOpenError as e:
+        response, status_code = handle_error("api_error", str(e), 503, True)
+        response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+        return response, status_code
     except Exception as e:
         logger.exception("Unexpected error in chat endpoint")
         return handle_error("api_error", f"Server error: {str(e)}", 500, True)
 
 
-@app.route("/health", methods=["GET"])
+def _serve_from_gallery(messages, fields=None):
+    """Return the gallery component for a conversation that is just a starter prompt"""
+    # Gallery entries hold every response field; a selection is generated
+    if not current_app.config.get("GALLERY_ENABLED") or fields is not None:
+        return None
+    if not isinstance(messages, list) or len(messages) != 1 or not isinstance(messages[0], dict):
+        return None
+    content = messages[0].get("content")
+    if messages[0].get("role") != "user" or not isinstance(content, str):
+        return None
+
+    category = gallery.category_for_prompt(content)
+    if category is None:
+        return None
+    report = gallery.get(category)
+    if report["component"] is None:
+        return None
+    logger.info("Serving %s starter from gallery (%s)", category, report["status"])
+    return {**report["component"], "servedFrom": "gallery", "galleryStatus": report["status"]}
+
+
+@api_bp.route("/health", methods=["GET"])
 def health():
     """Health check endpoint"""
     logger.debug("Health check requested")
     return jsonify({"status": "healthy"})
 
 
+@api_bp.route("/ready", methods=["GET"])
+def ready():
+    """Readiness check: whether this worker can serve chat requests right now"""
+    report = ai_service.readiness(current_app.config.get("READY_MAX_QUEUE_DEPTH"))
+    return jsonify(report), 200 if report["ready"] else 503
+
+
+def warm_up(start_gallery: Optional[bool] = None) -> None:
+    """
+    Build services and load heavy dependencies ahead of the first request
+
+    Runs automatically when the app is created with WARM_UP enabled, and can be
+    called from a gunicorn post_worker_init hook so each worker pays the cost
+    before it accepts traffic rather than on its first request.
+
+    Args:
+        start_gallery: Whether to start precomputing the starter gallery.
+            Defaults to the GALLERY_ENABLED setting
+    """
+    service = ai_service.get()
+    for component_type in ComponentType:
+        service.prompt_manager.get_system_prompt(component_type)
+    service.code_analyzer.warm_up()
+    service.warm_up_connections()
+    if service.client is not None:
+        service.probe.start()
+    if start_gallery if start_gallery is not None else DEFAULT_CONFIG["GALLERY_ENABLED"]:
+        gallery.start()
+    logger.info("✅ Services warmed up")
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Create and configure the Flask application
+
+    Args:
+        config: Optional config values applied on top of DEFAULT_CONFIG
+
+    Returns:
+        Configured Flask application
+    """
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
+
+    app.json = FastJSONProvider(app)
+    CORS(app, expose_headers=["X-Request-ID"])
+    init_request_ids(app)
+    init_profiling(app)
+    init_compression(app)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(components_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(gallery_bp)
+    app.register_blueprint(forms_bp)
+    app.register_blueprint(ws_bp)
+    # WebSocket frames get the same size limit as request bodies, and pings
+    # keep idle sessions open through proxies
+    app.config.setdefault("SOCK_SERVER_OPTIONS", {
+        "max_message_size": app.config["MAX_CONTENT_LENGTH"],
+        "ping_interval": 25,
+    })
+    app.extensions["ai_service"] = ai_service
+    app.extensions["component_history"] = history_store
+    app.extensions["component_gallery"] = gallery
+    app.extensions["tenant_resolver"] = TenantResolver.from_env()
+
+    if app.config["WARM_UP"]:
+        warm_up(app.config["GALLERY_ENABLED"])
+
+    logger.info("✅ Application created")
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     logger.info("Starting AI Component Builder backend server...")
     app.run(debug=True, host="localhost", port=5001)
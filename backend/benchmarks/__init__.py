@@ -0,0 +1,6 @@
+"""
+Benchmarks for the AI Component Builder backend.
+
+Each module can be run directly from the backend directory, for example:
+    python -m benchmarks.bench_cache_hit_rate
+"""
@@ -0,0 +1,82 @@
+"""
+Compare per-worker and shared cache hit rates under a multi-process load.
+
+Each worker process serves requests drawn from the same Zipf-like popularity
+distribution, as a load balancer spreading traffic over gunicorn workers would.
+With MemoryCache every worker has to miss on a prompt before it can hit, while
+SQLiteCache lets a generation in one worker serve every other worker.
+
+Usage:
+    python -m benchmarks.bench_cache_hit_rate [--workers 4] [--requests 500]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import MemoryCache, SQLiteCache  # noqa: E402
+
+PAYLOAD_CODE = "export default function Component() {\n" + "  return <div />;\n" * 120 + "}"
+
+
+def _zipf_keys(count, distinct, seed):
+    rng = random.Random(seed)
+    weights = [1.0 / rank for rank in range(1, distinct + 1)]
+    return rng.choices([f"prompt-{i}" for i in range(distinct)], weights=weights, k=count)
+
+
+def _run_worker(args):
+    backend, path, requests, distinct, seed, upstream_ms = args
+    cache = SQLiteCache(path) if backend == "sqlite" else MemoryCache()
+
+    started = time.perf_counter()
+    for key in _zipf_keys(requests, distinct, seed):
+        if cache.get(key) is None:
+            time.sleep(upstream_ms / 1000)
+            cache.set(key, {"code": PAYLOAD_CODE, "schema": {"title": key}})
+    elapsed = time.perf_counter() - started
+
+    return cache.hits, cache.misses, elapsed
+
+
+def run(backend, workers, requests, distinct, upstream_ms):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        if backend == "sqlite":
+            SQLiteCache(path)  # create the schema before workers race for it
+
+        jobs = [(backend, path, requests, distinct, seed, upstream_ms) for seed in range(workers)]
+        with Pool(workers) as pool:
+            results = pool.map(_run_worker, jobs)
+
+    hits = sum(r[0] for r in results)
+    misses = sum(r[1] for r in results)
+    wall = max(r[2] for r in results)
+    return hits / (hits + misses), misses, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500, help="requests per worker")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct prompts")
+    parser.add_argument("--upstream-ms", type=float, default=2.0, help="simulated miss cost")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.requests} requests over {args.distinct} prompts")
+    print(f"{'backend':<10}{'hit rate':>10}{'misses':>10}{'wall (s)':>10}")
+    for backend in ("memory", "sqlite"):
+        hit_rate, misses, wall = run(
+            backend, args.workers, args.requests, args.distinct, args.upstream_ms
+        )
+        print(f"{backend:<10}{hit_rate:>10.1%}{misses:>10}{wall:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
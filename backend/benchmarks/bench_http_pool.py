@@ -0,0 +1,132 @@
+"""
+Benchmark of first-request latency with and without connection pre-warming.
+
+A local HTTPS server stands in for the upstream API. Real upstream connections
+cross a wide-area network, so the server adds a simulated round-trip time to
+every network round trip: one for the TCP handshake, one for the TLS 1.3
+handshake and one per request. The first request through a cold pool pays for
+all three; after HTTPConnectionPool.warm_up only the request round trip is
+left. Requires the openssl command line tool to create a throwaway certificate.
+
+Usage:
+    python -m benchmarks.bench_http_pool [--rtt-ms 40] [--runs 10]
+"""
+
+import os
+import sys
+import ssl
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_pool import HTTPConnectionPool, HTTPPoolConfig  # noqa: E402
+
+
+def make_certificate(directory):
+    """Create a self-signed certificate for localhost with openssl"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTPS server that delays handshakes and requests by a simulated RTT"""
+
+    daemon_threads = True
+
+    def __init__(self, cert, key, rtt):
+        self.rtt = rtt
+        self.context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.context.load_cert_chain(cert, key)
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+
+    def get_request(self):
+        sock, address = self.socket.accept()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        time.sleep(self.rtt)  # TCP handshake
+        tls_sock = self.context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+        time.sleep(self.rtt)  # TLS 1.3 handshake
+        tls_sock.do_handshake()
+        return tls_sock, address
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, body=b""):
+        time.sleep(self.server.rtt)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        self._respond(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+def first_request_ms(url, cert, warm):
+    pool = HTTPConnectionPool(HTTPPoolConfig(ca_bundle=cert, keep_warm=False))
+    try:
+        if warm:
+            pool.warm_up(url)
+        started = time.perf_counter()
+        pool.client.post(url + "/v1/messages", json={"model": "stand-in"}).raise_for_status()
+        return (time.perf_counter() - started) * 1000
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server = StandInServer(cert, key, args.rtt_ms / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://localhost:{server.server_address[1]}"
+
+        try:
+            cold = [first_request_ms(url, cert, warm=False) for _ in range(args.runs)]
+            warm = [first_request_ms(url, cert, warm=True) for _ in range(args.runs)]
+        finally:
+            server.shutdown()
+
+    cold_median = statistics.median(cold)
+    warm_median = statistics.median(warm)
+    print(f"Simulated RTT: {args.rtt_ms:.0f}ms, {args.runs} runs each")
+    print(f"{'':<12}{'median ms':>12}{'p90 ms':>10}")
+    for label, values in (("cold pool", cold), ("pre-warmed", warm)):
+        p90 = sorted(values)[int(0.9 * (len(values) - 1))]
+        print(f"{label:<12}{statistics.median(values):>12.1f}{p90:>10.1f}")
+    print(f"First-request saving: {cold_median - warm_median:.1f}ms ({1 - warm_median / cold_median:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark for JSON encoding and decoding of component payloads.
+
+Payloads model what the request path actually handles: the upstream reply
+(decoded once), the chat request history (decoded by Flask) and the component
+response (encoded by Flask). Sizes cover a fresh session up to a long one with
+many generated components in its history.
+
+Usage:
+    python -m benchmarks.bench_json_codec [--number 200]
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import json_codec  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPONENT_LINE = '  <Button variant="outline" onClick={() => setOpen(!open)} aria-label="Toggle">Toggle</Button>\n'
+
+
+def make_component_code(lines):
+    return "import React from 'react';\n\nexport default function Component() {\n" + COMPONENT_LINE * lines + "}\n"
+
+
+def make_upstream_reply(lines):
+    return json.dumps({
+        "componentCode": make_component_code(lines),
+        "componentType": "form",
+        "dependencies": ["react", "react-hook-form", "zod", "@hookform/resolvers"],
+        "description": "A contact form with validation",
+        "usage": "<ContactForm onSubmit={handleSubmit} />",
+    })
+
+
+def make_session_history(turns, lines):
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Turn {turn}: adjust the layout and add a field"})
+        messages.append({"role": "assistant", "content": make_upstream_reply(lines)})
+    return json.dumps({"messages": messages})
+
+
+def make_response(lines):
+    return {
+        "code": make_component_code(lines),
+        "schema": {"title": "Form Component", "description": "A form", "type": "form",
+                   "dependencies": ["react"], "usage": "<Form />", "fields": []},
+    }
+
+
+def _time(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ("reply 4KB", "loads", make_upstream_reply(40)),
+        ("reply 16KB", "loads", make_upstream_reply(160)),
+        ("history 5 turns", "loads", make_session_history(5, 80)),
+        ("history 30 turns", "loads", make_session_history(30, 80)),
+        ("response 4KB", "dumps", make_response(40)),
+        ("response 16KB", "dumps", make_response(160)),
+    ]
+
+    print(f"json_codec backend: {json_codec.BACKEND}")
+    print(f"{'payload':<20}{'op':<7}{'bytes':>10}{'stdlib us':>12}{'orjson us':>12}{'speedup':>9}")
+    for name, op, payload in cases:
+        if op == "loads":
+            size = len(payload)
+            stdlib = _time(lambda: json.loads(payload), args.number)
+            fast = _time(lambda: orjson.loads(payload), args.number) if orjson else None
+        else:
+            size = len(json.dumps(payload))
+            stdlib = _time(lambda: json.dumps(payload, separators=(",", ":"), sort_keys=True).encode(), args.number)
+            fast = _time(lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), args.number) if orjson else None
+
+        fast_text = f"{fast:>12.1f}{stdlib / fast:>8.1f}x" if fast else f"{'n/a':>12}{'':>9}"
+        print(f"{name:<20}{op:<7}{size:>10}{stdlib:>12.1f}{fast_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Memory footprint of generate_component over growing sessions and payloads.
+
+Drives AIService.generate_component against a fake Anthropic client and uses
+tracemalloc to measure, per request, the peak memory allocated above the
+baseline and the memory still held once the request has returned. Peak is
+reported relative to the bytes a request actually carries (conversation plus
+generated payload), which shows how many copies of them are alive at once;
+retained memory must stay near zero, or long sessions grow worker RSS until
+the workers are killed.
+
+Exits with status 1 when a scenario exceeds the thresholds, so it can run in
+CI. --top lists the allocation sites holding the most memory at the moment
+the upstream call is made, when the request copies are at their peak.
+
+Usage:
+    python -m benchmarks.bench_memory [--requests 20] [--top 10]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ai_service import AIService  # noqa: E402
+from utils.code_analysis import CodeAnalyzer  # noqa: E402
+
+# (session turns, characters per message, characters of generated code)
+SCENARIOS: List[Tuple[int, int, int]] = [
+    (1, 200, 2_000),
+    (10, 2_000, 2_000),
+    (40, 2_000, 2_000),
+    (1, 200, 20_000),
+    (1, 200, 100_000),
+    (40, 2_000, 100_000),
+]
+
+# Peak allocation per request, as a multiple of the bytes the request carries
+MAX_PEAK_RATIO = 6.0
+# Memory a request may leave behind (accounting entries, counters)
+MAX_RETAINED_BYTES = 4 * 1024
+
+
+class FakeMessages:
+    """Stands in for client.messages, building a fresh response for every call"""
+
+    def __init__(self, code_chars: int, on_call: Optional[Callable[[], None]] = None):
+        self.code_chars = code_chars
+        self.on_call = on_call
+        self.calls = 0
+
+    def create(self, **_kwargs):
+        self.calls += 1
+        if self.on_call is not None:
+            self.on_call()
+        line = "  <div className=\"p-4\">row</div>\n"
+        body = line * max(1, self.code_chars // len(line))
+        code = f"export default function Generated{self.calls}() {{\n  return (<>\n{body}  </>);\n}}"
+        text = json.dumps({
+            "componentCode": code,
+            "componentType": "general",
+            "dependencies": ["react"],
+            "description": "Generated component",
+            "usage": "<Generated />",
+        })
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)],
+            stop_reason="end_turn",
+            usage=SimpleNamespace(input_tokens=100, output_tokens=len(text) // 4),
+        )
+
+
+def build_service(code_chars: int, on_call: Optional[Callable[[], None]] = None) -> AIService:
+    """AIService with a fake client and no response cache, so nothing is reused"""
+    service = AIService(api_key=None, code_analyzer=CodeAnalyzer(max_workers=0))
+    service.cache = None
+    service.client = SimpleNamespace(messages=FakeMessages(code_chars, on_call))
+    return service
+
+
+def make_session(turns: int, message_chars: int, request: int) -> List[Dict[str, str]]:
+    """A conversation of the given length ending in a user turn, unique per request"""
+    messages = []
+    for turn in range(turns * 2 - 1):
+        role = "user" if turn % 2 == 0 else "assistant"
+        prefix = f"request {request} turn {turn}: "
+        messages.append({"role": role, "content": prefix + "x" * max(0, message_chars - len(prefix))})
+    return messages
+
+
+@dataclass
+class MemoryResult:
+    turns: int
+    message_chars: int
+    code_chars: int
+    carried_bytes: int
+    peak_bytes: int
+    retained_bytes: float
+
+    @property
+    def peak_ratio(self) -> float:
+        return self.peak_bytes / self.carried_bytes
+
+    def regressions(self) -> List[str]:
+        problems = []
+        if self.peak_ratio > MAX_PEAK_RATIO:
+            problems.append(f"peak {self.peak_ratio:.1f}x carried bytes > {MAX_PEAK_RATIO:g}x")
+        if self.retained_bytes > MAX_RETAINED_BYTES:
+            problems.append(f"retains {self.retained_bytes:.0f} B/request > {MAX_RETAINED_BYTES} B")
+        return problems
+
+
+def measure(turns: int, message_chars: int, code_chars: int, requests: int = 20, warmup: int = 3) -> MemoryResult:
+    """
+    Measure peak and retained allocations per request for one scenario
+
+    Conversations are built before each request is measured, as the request
+    body would already be in memory; retained memory is averaged over all
+    measured requests after a few warm-up requests have filled lazy caches.
+    """
+    service = build_service(code_chars)
+    for request in range(warmup):
+        service.generate_component(make_session(turns, message_chars, -1 - request))
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        peak = 0
+        start, _ = tracemalloc.get_traced_memory()
+        for request in range(requests):
+            messages = make_session(turns, message_chars, request)
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            service.generate_component(messages)
+            del messages
+            _, request_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, request_peak - baseline)
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    carried = turns * 2 * message_chars + code_chars
+    return MemoryResult(turns, message_chars, code_chars, carried, peak, (end - start) / requests)
+
+
+def top_allocations(turns: int, message_chars: int, code_chars: int, limit: int = 10) -> List[str]:
+    """Allocation sites holding the most memory when the upstream call is made"""
+    snapshots = []
+
+    def snapshot_if_tracing():
+        if tracemalloc.is_tracing():
+            snapshots.append(tracemalloc.take_snapshot())
+
+    service = build_service(code_chars, on_call=snapshot_if_tracing)
+    service.generate_component(make_session(turns, message_chars, -1))
+
+    tracemalloc.start(10)
+    try:
+        before = tracemalloc.take_snapshot()
+        service.generate_component(make_session(turns, message_chars, 0))
+    finally:
+        tracemalloc.stop()
+
+    at_call = snapshots[-1].filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    stats = at_call.compare_to(before, "lineno")
+    return [str(stat) for stat in stats[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per scenario")
+    parser.add_argument("--top", type=int, default=0, help="show top allocation sites for the largest scenario")
+    args = parser.parse_args()
+
+    print(f"{'turns':>6}{'msg chars':>11}{'code chars':>12}{'carried KB':>12}{'peak KB':>10}"
+          f"{'peak/carried':>14}{'retained B/req':>16}")
+    failures = []
+    for turns, message_chars, code_chars in SCENARIOS:
+        result = measure(turns, message_chars, code_chars, requests=args.requests)
+        print(f"{turns:>6}{message_chars:>11}{code_chars:>12}{result.carried_bytes / 1024:>12.1f}"
+              f"{result.peak_bytes / 1024:>10.1f}{result.peak_ratio:>14.1f}{result.retained_bytes:>16.0f}")
+        failures.extend(f"{turns} turns, {code_chars} code chars: {problem}" for problem in result.regressions())
+
+    if args.top:
+        turns, message_chars, code_chars = SCENARIOS[-1]
+        print(f"\nLive allocations at the upstream call ({turns} turns, {code_chars} code chars):")
+        for line in top_allocations(turns, message_chars, code_chars, args.top):
+            print(f"  {line}")
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Input-token savings of sub-intent prompt assembly across a prompt corpus.
+
+For every prompt the component type and sub-intents are detected as
+AIService does, and the estimated size of the assembled system prompt is
+compared with the full prompt for that type (all tagged instructions). The
+report is grouped per component type, together with the number of distinct
+intent combinations, each of which is one memoized (and upstream-cacheable)
+system prompt.
+
+Usage:
+    python -m benchmarks.bench_prompt_fragments [--corpus prompts.txt]
+
+The corpus file holds one prompt per line; a small built-in corpus of typical
+requests is used when none is given.
+"""
+
+import os
+import sys
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.preflight import estimate_tokens  # noqa: E402
+from utils.prompt_manager import PromptManager  # noqa: E402
+
+CORPUS: List[str] = [
+    "Create a contact form with name, email and message",
+    "Build a signup form with password confirmation",
+    "Create a profile form with avatar upload",
+    "Create a newsletter subscription input with submit button",
+    "Create a responsive navbar with logo and mobile hamburger menu",
+    "Build a collapsible sidebar for an admin panel",
+    "Create breadcrumb navigation for a docs site",
+    "Create tabs for account settings",
+    "Build a mega menu for an online store",
+    "Create a sortable data table of users with pagination",
+    "Create a product card grid with quick actions",
+    "Create a statistics dashboard with revenue metrics",
+    "Create a line chart of monthly signups",
+    "Create an activity timeline for a project",
+    "Create a pricing comparison table for three plans",
+    "Create a list of team members with avatars",
+    "Create a loading spinner",
+    "Create a modal dialog for editing a profile",
+    "Create a toast notification system",
+    "Create a confirmation dialog for deleting an account",
+    "Create a tooltip for icon buttons",
+    "Create a multi-step wizard progress indicator",
+    "Create a dismissible alert banner",
+    "Create a hero section with a call to action",
+    "Create a footer with social links",
+]
+
+
+@dataclass
+class TypeSavings:
+    """Token estimates of one component type over the corpus"""
+    prompts: int = 0
+    full_tokens: int = 0
+    assembled_tokens: int = 0
+    combinations: Set[Tuple[str, ...]] = field(default_factory=set)
+
+    @property
+    def saved_percent(self) -> float:
+        return 100 * (self.full_tokens - self.assembled_tokens) / self.full_tokens if self.full_tokens else 0.0
+
+
+def measure(prompts: Iterable[str], manager: PromptManager) -> Dict[str, TypeSavings]:
+    """Full and assembled system prompt token estimates, per component type"""
+    results: Dict[str, TypeSavings] = defaultdict(TypeSavings)
+    for prompt in prompts:
+        component_type = manager.get_component_type_from_message(prompt)
+        sub_intents = manager.detect_sub_intents(component_type, [prompt])
+        full, _ = manager.get_versioned_system_prompt(component_type)
+        assembled, _ = manager.get_versioned_system_prompt(component_type, None, sub_intents)
+
+        row = results[component_type.value]
+        row.prompts += 1
+        row.full_tokens += estimate_tokens(full)
+        row.assembled_tokens += estimate_tokens(assembled)
+        row.combinations.add(sub_intents)
+    return dict(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="file with one prompt per line")
+    args = parser.parse_args()
+
+    prompts = CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as corpus:
+            prompts = [line.strip() for line in corpus if line.strip()]
+
+    results = measure(prompts, PromptManager())
+    print(f"{'type':<14}{'prompts':>9}{'full tok/req':>14}{'sent tok/req':>14}{'saved':>8}{'prompts built':>15}")
+    total = TypeSavings()
+    for type_name, row in sorted(results.items()):
+        print(f"{type_name:<14}{row.prompts:>9}{row.full_tokens / row.prompts:>14.0f}"
+              f"{row.assembled_tokens / row.prompts:>14.0f}{row.saved_percent:>7.1f}%{len(row.combinations):>15}")
+        total.prompts += row.prompts
+        total.full_tokens += row.full_tokens
+        total.assembled_tokens += row.assembled_tokens
+    print(f"{'total':<14}{total.prompts:>9}{total.full_tokens / total.prompts:>14.0f}"
+          f"{total.assembled_tokens / total.prompts:>14.0f}{total.saved_percent:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
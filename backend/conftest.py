@@ -5,11 +5,16 @@ Pytest configuration and fixtures for the Flask backend.
 import pytest
 import sys
 import os
+import json
 from unittest.mock import Mock, patch
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Tests must not write to, or read components back from, a history database
+# in the source tree; tests that need a store build one under tmp_path
+os.environ["COMPONENT_HISTORY_ENABLED"] = "false"
+
 # Import after path setup
 from app import app  # noqa: E402
 
@@ -47,6 +52,42 @@ def mock_anthropic_client():
         yield mock_ai_service
 
 
+def make_claude_response(payload, stop_reason="end_turn"):
+    """Build a fake Anthropic message response around a JSON payload."""
+    text = payload if isinstance(payload, str) else json.dumps(payload)
+    response = Mock()
+    response.content = [Mock(text=text)]
+    response.stop_reason = stop_reason
+    response.usage = Mock(input_tokens=100, output_tokens=len(text) // 4)
+    return response
+
+
+@pytest.fixture
+def sample_component_payload():
+    """Sample enhanced-format payload as returned by Claude."""
+    return {
+        "componentCode": "export default function Button() { return <button>Hi</button>; }",
+        "componentType": "general",
+        "dependencies": ["react"],
+        "description": "A simple button",
+        "usage": "<Button />",
+    }
+
+
+@pytest.fixture
+def fake_ai_service(sample_component_payload):
+    """AIService wired to a fake Anthropic client instead of the real API."""
+    from services.ai_service import AIService
+    from utils.code_analysis import CodeAnalyzer
+
+    service = AIService(api_key=None, code_analyzer=CodeAnalyzer(max_workers=0))
+    service.client = Mock()
+    service.client.messages.create.return_value = make_claude_response(
+        sample_component_payload
+    )
+    return service
+
+
 @pytest.fixture
 def sample_chat_messages():
     """Sample chat messages for testing."""
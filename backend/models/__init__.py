@@ -4,7 +4,11 @@ Data models for the AI Component Builder backend.
 This package contains all data models and database-related classes.
 """
 
+from .component_history import ComponentHistoryStore, build_history_store_from_env
+from .conversation import ConversationError, ConversationTree, Turn
+
+__all__ = ['ComponentHistoryStore', 'ConversationError', 'ConversationTree', 'Turn', 'build_history_store_from_env']
+
 # Future imports will go here as we add models
-# from .conversation import Conversation
 # from .component_template import ComponentTemplate
 # from .analytics import UsageEvent
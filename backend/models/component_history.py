@@ -0,0 +1,300 @@
+"""
+Persistent history of generated components with full-text search.
+
+Every successful generation is stored in a local SQLite database with an FTS5
+index over the prompt, description, component type and code, so earlier
+results can be found and reused instead of paying for a new generation.
+Components are stored per tenant and only ever found by the tenant that
+generated them.
+Writes are queued and applied by a background thread; recording a component
+never touches the database on the request path.
+"""
+
+import os
+import time
+import queue
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# bm25 column weights: tenant, component_id, prompt, description, component_type, code
+BM25_WEIGHTS = (0.0, 0.0, 10.0, 5.0, 2.0, 1.0)
+
+# Components stored before history was tenant-scoped are moved here on
+# startup; their tenant is unknown, so they are never served
+UNTENANTED_TABLE = "components_untenanted"
+
+
+def component_id_for(code: str) -> str:
+    """Stable identifier for a generated component, derived from its code"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+
+
+def build_fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query that matches all words as prefixes
+
+    Every word is quoted, so user input can never be interpreted as FTS5 syntax.
+    """
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def prompt_similarity(first: str, second: str) -> float:
+    """
+    How alike two prompts are, from 0 to 1
+
+    The overlap of their lowercased word sets; 1.0 means the same words,
+    whatever the case, spacing or order.
+    """
+    first_words = set(first.lower().split())
+    second_words = set(second.lower().split())
+    if not first_words or not second_words:
+        return 0.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+
+class ComponentHistoryStore:
+    """SQLite-backed store of generated components with asynchronous writes"""
+
+    def __init__(self, path: str, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            path: SQLite database file
+            queue_size: Maximum pending writes; further records are dropped
+        """
+        self.path = path
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._initialize_schema(self._connection())
+
+        self._writer = threading.Thread(target=self._write_loop, name="component-history-writer", daemon=True)
+        self._writer.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the read connection owned by the current thread and process"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @classmethod
+    def _initialize_schema(cls, connection: sqlite3.Connection) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(components)")}
+            if columns and "tenant" not in columns:
+                logger.warning("Component history: setting aside components stored without a tenant")
+                connection.execute(f"ALTER TABLE components RENAME TO {UNTENANTED_TABLE}")
+                connection.execute("DROP TABLE IF EXISTS component_search")
+            cls._create_tables(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _create_tables(connection: sqlite3.Connection) -> None:
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS components (
+                tenant TEXT NOT NULL,
+                id TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                description TEXT NOT NULL,
+                component_type TEXT NOT NULL,
+                code TEXT NOT NULL,
+                response BLOB NOT NULL,
+                prompt_version TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (tenant, id)
+            )"""
+        )
+        connection.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS component_search USING fts5(
+                tenant UNINDEXED, component_id UNINDEXED, prompt, description, component_type, code
+            )"""
+        )
+
+    def record(self, tenant: str, prompt: str, response: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a generated component for storage without blocking
+
+        Args:
+            tenant: Tenant the component was generated for
+            prompt: The user prompt that produced the component
+            response: The component response ({code, schema, ...})
+
+        Returns:
+            The component id, or None if the response has no code or the
+            write queue is full
+        """
+        code = response.get("code")
+        if not code:
+            return None
+
+        component_id = response.get("componentId") or component_id_for(code)
+        schema = response.get("schema") or {}
+        entry = {
+            "tenant": tenant,
+            "id": component_id,
+            "prompt": prompt,
+            "description": schema.get("description", ""),
+            "component_type": schema.get("type", ""),
+            "code": code,
+            "response": json_codec.dumps_bytes(response),
+            "prompt_version": response.get("promptVersion"),
+            "created_at": time.time(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Component history: write queue full, dropping record")
+            return None
+        return component_id
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._write(connection, entry)
+            except sqlite3.Error as e:
+                logger.error("Component history: write failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, connection: sqlite3.Connection, entry: Dict[str, Any]) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO components "
+                "(tenant, id, prompt, description, component_type, code, response, prompt_version, created_at) "
+                "VALUES (:tenant, :id, :prompt, :description, :component_type, :code, :response, "
+                ":prompt_version, :created_at)",
+                entry,
+            )
+            if cursor.rowcount:
+                connection.execute(
+                    "INSERT INTO component_search "
+                    "(tenant, component_id, prompt, description, component_type, code) "
+                    "VALUES (:tenant, :id, :prompt, :description, :component_type, :code)",
+                    entry,
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self.written += 1
+
+    def flush(self) -> None:
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join()
+
+    def search(
+        self,
+        tenant: str,
+        text: str,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        component_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find a tenant's stored components matching all words in text, best matches first
+
+        Args:
+            tenant: Tenant whose components are searched
+            text: Free-text query
+            limit: Maximum number of results
+            component_type: Optional component type filter
+
+        Returns:
+            Ranked matches without their code
+        """
+        fts_query = build_fts_query(text)
+        if not fts_query:
+            return []
+
+        sql = (
+            "SELECT c.id, c.prompt, c.description, c.component_type, c.prompt_version, c.created_at, "
+            "bm25(component_search, ?, ?, ?, ?, ?, ?) AS score "
+            "FROM component_search JOIN components c "
+            "ON c.tenant = component_search.tenant AND c.id = component_search.component_id "
+            "WHERE component_search MATCH ? AND component_search.tenant = ?"
+        )
+        params: List[Any] = [*BM25_WEIGHTS, fts_query, tenant]
+        if component_type:
+            sql += " AND c.component_type = ?"
+            params.append(component_type)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(max(1, min(limit, MAX_SEARCH_LIMIT)))
+
+        rows = self._connection().execute(sql, params).fetchall()
+        return [
+            {
+                "id": row[0],
+                "prompt": row[1],
+                "description": row[2],
+                "componentType": row[3],
+                "promptVersion": row[4],
+                "createdAt": row[5],
+                # bm25 scores are negative, lower is better
+                "score": round(-row[6], 4),
+            }
+            for row in rows
+        ]
+
+    def get(self, tenant: str, component_id: str) -> Optional[Dict[str, Any]]:
+        """Get the full stored response for one of a tenant's component ids"""
+        row = self._connection().execute(
+            "SELECT response FROM components WHERE tenant = ? AND id = ?", (tenant, component_id)
+        ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM components").fetchone()[0]
+
+
+def build_history_store_from_env() -> Optional[ComponentHistoryStore]:
+    """
+    Create the history store configured by environment variables
+
+    COMPONENT_HISTORY_ENABLED (default "true") turns the store on or off and
+    COMPONENT_HISTORY_PATH sets the database file.
+
+    Returns:
+        Configured store, or None when disabled
+    """
+    if os.getenv("COMPONENT_HISTORY_ENABLED", "true").lower() != "true":
+        return None
+    path = os.getenv("COMPONENT_HISTORY_PATH", os.path.join("instance", "component_history.sqlite3"))
+    logger.info("Component history stored at %s", path)
+    return ComponentHistoryStore(path)
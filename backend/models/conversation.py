@@ -0,0 +1,148 @@
+"""
+Conversation history kept as a tree of immutable turns.
+
+Every turn points at its parent and a branch is only a reference to its latest
+turn, so editing or regenerating an earlier message forks the conversation
+without copying it: the new branch shares every turn before the fork point
+and costs one node per turn added after it. Turns are never modified, so the
+messages built from two branches are the very same objects, and serialize to
+the same bytes, up to the fork point, which keeps upstream prompt caching
+hitting on the shared prefix.
+
+The id index only holds weak references; turns no branch leads to any more
+(failed turns, deleted branches) are freed by the garbage collector.
+"""
+
+import itertools
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MAX_BRANCHES = 32
+
+
+class ConversationError(ValueError):
+    """Raised for unknown turns or when a tree has too many branches"""
+
+
+class Turn:
+    """One message in a conversation tree; never modified once created"""
+
+    __slots__ = ("turn_id", "parent", "message", "depth", "__weakref__")
+
+    def __init__(self, turn_id: str, parent: Optional["Turn"], role: str, content: str):
+        self.turn_id = turn_id
+        self.parent = parent
+        # The same dict is sent in every request built through this turn
+        self.message: Dict[str, str] = {"role": role, "content": content}
+        self.depth: int = parent.depth + 1 if parent is not None else 1
+
+    @property
+    def role(self) -> str:
+        return self.message["role"]
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Messages from the root of the tree down to this turn"""
+        path: List[Dict[str, str]] = [None] * self.depth  # type: ignore[list-item]
+        turn: Optional[Turn] = self
+        while turn is not None:
+            path[turn.depth - 1] = turn.message
+            turn = turn.parent
+        return path
+
+
+class ConversationTree:
+    """Named branches over a shared tree of turns"""
+
+    def __init__(self, max_branches: int = DEFAULT_MAX_BRANCHES):
+        """
+        Args:
+            max_branches: Maximum number of named branches
+        """
+        self.max_branches = max_branches
+        self._heads: Dict[str, Optional[Turn]] = {}
+        self._turns: "weakref.WeakValueDictionary[str, Turn]" = weakref.WeakValueDictionary()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __contains__(self, branch: str) -> bool:
+        return branch in self._heads
+
+    def head(self, branch: str) -> Optional[Turn]:
+        """Latest turn of a branch, or None for an empty or unknown branch"""
+        return self._heads.get(branch)
+
+    def get(self, turn_id: str) -> Turn:
+        """
+        Look up a turn that is still reachable from some branch
+
+        Raises:
+            ConversationError: If the turn does not exist (any more)
+        """
+        turn = self._turns.get(turn_id)
+        if turn is None:
+            raise ConversationError(f"Unknown turn {turn_id}")
+        return turn
+
+    def add(self, parent: Optional[Turn], role: str, content: str) -> Turn:
+        """
+        Create a turn below parent without moving any branch
+
+        The turn is discarded again unless a branch is moved onto it (or onto
+        one of its descendants) with set_head.
+        """
+        with self._lock:
+            turn = Turn(f"n{next(self._ids)}", parent, role, content)
+            self._turns[turn.turn_id] = turn
+        return turn
+
+    def set_head(self, branch: str, turn: Optional[Turn]) -> None:
+        """
+        Point a branch at a turn, creating the branch if needed
+
+        Raises:
+            ConversationError: If this would exceed max_branches
+        """
+        with self._lock:
+            if branch not in self._heads and len(self._heads) >= self.max_branches:
+                raise ConversationError(f"At most {self.max_branches} conversations can be kept")
+            self._heads[branch] = turn
+
+    def fork(self, branch: str, turn_id: Optional[str]) -> Optional[Turn]:
+        """
+        Start a branch at an existing turn; nothing is copied
+
+        Args:
+            branch: Name of the new (or moved) branch
+            turn_id: Turn the branch continues from, or None for an empty branch
+
+        Returns:
+            The new head of the branch
+        """
+        turn = self.get(turn_id) if turn_id is not None else None
+        self.set_head(branch, turn)
+        return turn
+
+    def delete(self, branch: str) -> bool:
+        """Drop a branch; turns only it led to are freed"""
+        with self._lock:
+            if branch not in self._heads:
+                return False
+            del self._heads[branch]
+            return True
+
+    def messages(self, branch: str) -> List[Dict[str, str]]:
+        """Messages of a branch, oldest first"""
+        head = self._heads.get(branch)
+        return head.messages() if head is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        """Branch and stored turn counts; shared turns are counted once"""
+        with self._lock:
+            heads = dict(self._heads)
+            stored = len(self._turns)
+        return {
+            "branches": {name: head.turn_id if head else None for name, head in heads.items()},
+            "turns": stored,
+            "branchTurns": sum(head.depth for head in heads.values() if head is not None),
+        }
@@ -5,30 +5,154 @@ This service handles all interactions with the Anthropic Claude API,
 including prompt management, response parsing, and error handling.
 """
 
+from __future__ import annotations
+
 import os
 import json
+import time
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List
-import anthropic
-from anthropic.types import MessageParam
-from utils.prompt_manager import PromptManager, ComponentType
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional, List, Tuple
+from utils.prompt_manager import LEAN_FIELDS, RESPONSE_FIELDS, PromptManager, ComponentType, normalize_fields
+from utils.cache import ResponseCache, build_cache_from_env, make_cache_key
+from utils import json_codec
+from utils.preflight import PreflightLimits, run_preflight
+from models.component_history import ComponentHistoryStore, component_id_for, prompt_similarity
+from utils.code_analysis import CodeAnalyzer
+from utils.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from services.form_compiler import COMPILER_VERSION, build_form_component, extract_form_schema
+from services.health import CircuitBreaker, CircuitOpenError, UpstreamProbe
+from services.http_pool import HTTPConnectionPool, HTTPPoolConfig
+from services.snapshot import ServiceSnapshotter
+from services.tenancy import DEFAULT_TENANT, FairScheduler, SchedulerTimeout, TenantAccounting, parse_weights
+
+# The anthropic SDK is imported on first use: it pulls in httpx and pydantic
+# and dominates the import time of the app.
+if TYPE_CHECKING:
+    import anthropic
+    from anthropic.types import MessageParam
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
+DEFAULT_MAX_TOKENS = 4000
+DEFAULT_TEMPERATURE = 0.1
+
+# Used instead of the default model when a request deadline is close
+FAST_MODEL = "claude-3-5-haiku-20241022"
+FAST_MAX_TOKENS = 2000
+# Best-ranked history matches checked for a close prompt in that case
+HISTORY_FALLBACK_CANDIDATES = 5
+
+# Receives (event, data) pairs while a component is generated
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+# Upper bound on variants a single request may ask for
+MAX_VARIANTS = 5
+
+# (temperature, style hint) pairs assigned to variants in order. The first
+# variant matches a regular generation so it stays comparable to single requests.
+VARIANT_STRATEGIES: List[Tuple[float, Optional[str]]] = [
+    (DEFAULT_TEMPERATURE, None),
+    (0.5, "Favor a minimal, clean design with generous whitespace and restrained use of color."),
+    (0.7, "Favor a bold, expressive design with strong visual hierarchy and accent colors."),
+    (0.6, "Favor a compact, information-dense layout suited to power users."),
+    (0.8, "Favor a playful design with rounded shapes, subtle animations and friendly microcopy."),
+]
+
+
+def with_cache_breakpoint(messages: List[MessageParam]) -> List[MessageParam]:
+    """
+    Mark the end of the conversation history as an upstream prompt cache breakpoint
+
+    The system prompt and every turn before the latest one are then cached
+    upstream, so the next turn of the conversation, or any branch forked from
+    it, is only billed in full for what follows. The messages themselves are
+    not modified.
+    """
+    if len(messages) < 2 or not isinstance(messages[-2]["content"], str):
+        return messages
+    marked = list(messages)
+    previous = messages[-2]
+    marked[-2] = {
+        "role": previous["role"],
+        "content": [{"type": "text", "text": previous["content"], "cache_control": {"type": "ephemeral"}}],
+    }
+    return marked
+
 
 class AIService:
     """Service class for handling AI interactions with Claude API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        preflight_limits: Optional[PreflightLimits] = None,
+        history: Optional[ComponentHistoryStore] = None,
+        code_analyzer: Optional[CodeAnalyzer] = None,
+        scheduler: Optional[FairScheduler] = None,
+        tenants: Optional[TenantAccounting] = None,
+        http_pool: Optional[HTTPConnectionPool] = None
+    ):
         """
         Initialize the AI service with Anthropic client and prompt manager
 
         Args:
             api_key: Optional API key. If not provided, will use environment variable
+            max_concurrency: Maximum number of concurrent upstream calls made by this
+                service. Defaults to the AI_MAX_CONCURRENCY environment variable or 4.
+            cache: Optional response cache. If not provided, the backend is chosen
+                from environment variables (see utils.cache.build_cache_from_env)
+            preflight_limits: Optional request size limits checked before any
+                upstream call. Defaults to PreflightLimits.from_env()
+            history: Optional store that successful generations are recorded in
+            code_analyzer: Optional post-generation code analyzer. Defaults to a
+                CodeAnalyzer configured from environment variables
+            scheduler: Optional fair scheduler sharing the upstream slots between
+                tenants. Defaults to max_concurrency slots weighted by TENANT_WEIGHTS
+            tenants: Optional per-tenant budgets and statistics. Defaults to
+                TenantAccounting.from_env()
+            http_pool: Optional connection pool for upstream calls. Defaults to a
+                pool sized to max_concurrency (see HTTPPoolConfig.from_env)
         """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         self.client: Optional[anthropic.Anthropic] = None
         self.prompt_manager = PromptManager()
+        self.max_concurrency = max_concurrency or int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+        self.scheduler = scheduler or FairScheduler(
+            self.max_concurrency, parse_weights(os.getenv("TENANT_WEIGHTS"))
+        )
+        self.tenants = tenants or TenantAccounting.from_env()
+        # Below these remaining budgets the fast model is used, or no upstream
+        # call is attempted at all
+        self.fast_strategy_seconds = int(os.getenv("DEADLINE_FAST_STRATEGY_MS", "30000")) / 1000
+        self.min_upstream_seconds = int(os.getenv("DEADLINE_MIN_UPSTREAM_MS", "3000")) / 1000
+        # Without time for an upstream call, a stored component is served only
+        # for a first turn whose prompt matches a stored one at least this closely
+        self.history_min_similarity = float(os.getenv("DEADLINE_HISTORY_MIN_SIMILARITY", "0.8"))
+        # Follow-up turns that do not select fields only get the code back
+        self.lean_follow_ups = os.getenv("LEAN_FOLLOW_UPS", "true").lower() == "true"
+        # Form prompts whose fields are extracted with at least this confidence
+        # are compiled locally instead of generated; above 1 disables this
+        self.form_compiler_confidence = float(os.getenv("FORM_COMPILER_MIN_CONFIDENCE", "0.9"))
+        # Cache the conversation prefix upstream between turns
+        self.prompt_caching = os.getenv("PROMPT_CACHING", "true").lower() == "true"
+        self.http_pool = http_pool
+        self.circuit = CircuitBreaker.from_env()
+        self.probe = UpstreamProbe(self._probe_upstream)
+        self.cache = cache if cache is not None else build_cache_from_env()
+        self.preflight_limits = preflight_limits or PreflightLimits.from_env(DEFAULT_MAX_TOKENS)
+        self.history = history
+        self.code_analyzer = code_analyzer or CodeAnalyzer()
+        # Warm start from the last snapshot when SNAPSHOT_PATH is set
+        self.snapshots = ServiceSnapshotter.from_env(self)
+        if self.snapshots is not None:
+            self.snapshots.load()
+            self.snapshots.start()
         self._initialize_client()
     
     def _initialize_client(self) -> None:
@@ -38,92 +162,717 @@ class AIService:
             return
         
         try:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            import anthropic
+
+            if self.http_pool is None:
+                self.http_pool = HTTPConnectionPool(HTTPPoolConfig.from_env(self.max_concurrency))
+            self.client = anthropic.Anthropic(api_key=self.api_key, http_client=self.http_pool.client)
             logger.info("✅ AI Service: Anthropic client initialized successfully")
         except Exception as e:
-            logger.error(f"❌ AI Service: Error initializing Anthropic client: {e}")
+            logger.error("❌ AI Service: Error initializing Anthropic client: %s", e)
             self.client = None
     
     def is_available(self) -> bool:
         """Check if the AI service is available for use"""
         return self.client is not None
+
+    def warm_up_connections(self) -> None:
+        """Open upstream connections now and keep them open through idle periods"""
+        if self.client is None or self.http_pool is None:
+            return
+        base_url = str(self.client.base_url)
+        self.http_pool.warm_up(base_url)
+        self.http_pool.start_keep_warm(base_url)
     
     def generate_component(
         self,
         messages: List[Dict[str, str]],
-        component_type: Optional[ComponentType] = None
+        component_type: Optional[ComponentType] = None,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[Deadline] = None,
+        on_event: Optional[EventCallback] = None,
+        fields: Optional[List[str]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate a component from user messages
 
+        When a deadline is given and time is short, cheaper strategies are used:
+        the response cache first, then a matching component from the history,
+        then the faster model with a smaller output budget.
+
         Args:
             messages: List of conversation messages
             component_type: Optional specific component type, will auto-detect if not provided
+            tenant: Tenant the request is scheduled and accounted under
+            deadline: Optional time by which the client needs an answer
+            on_event: Optional callback receiving (event, data) pairs: "progress"
+                events for each stage, and "chunk" events with the raw model
+                output as it streams in. Raising RequestCancelled from it stops
+                the generation and closes the upstream stream
+            fields: Optional response fields to generate (see RESPONSE_FIELDS).
+                Defaults to all fields on the first turn and to LEAN_FIELDS on
+                follow-up turns
+            use_cache: Whether a cached response may be returned. When False
+                the component is generated again and replaces the cached one
 
         Returns:
             Dict containing the generated component data
 
         Raises:
+            ValueError: If fields names an unknown field
+            BudgetExceededError: If the tenant has used up its budget
+            DeadlineExceeded: If no answer can be produced before the deadline
+            RequestCancelled: If on_event cancelled the request
+            CircuitOpenError: If upstream calls are suspended after failures
+            PreflightError: If the request is too large for the model or budget
             Exception: If AI service is not available or API call fails
         """
         if not self.is_available():
             raise Exception("AI service not available. Please check your API key.")
 
+        self.tenants.check(tenant)
+        started = time.perf_counter()
+        try:
+            return self._generate_component(
+                messages, component_type, tenant, deadline, on_event, fields, use_cache
+            )
+        finally:
+            self.tenants.record_latency(tenant, time.perf_counter() - started)
+
+    def _generate_component(
+        self,
+        messages: List[Dict[str, str]],
+        component_type: Optional[ComponentType],
+        tenant: str,
+        deadline: Optional[Deadline],
+        on_event: Optional[EventCallback] = None,
+        fields: Optional[List[str]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Generate a component; see generate_component"""
         # Validate and prepare messages
+        messages = self._run_preflight(messages)
         claude_messages = self._prepare_messages(messages)
+        response_fields = self._resolve_fields(fields, claude_messages)
 
         # Detect component type if not provided
-        if component_type is None:
-            user_message = str(claude_messages[-1]["content"]) if claude_messages else ""
-            component_type = self.prompt_manager.get_component_type_from_message(user_message)
-            logger.info(f"AI Service: Auto-detected component type: {component_type.value}")
+        component_type = self._resolve_component_type(claude_messages, component_type)
+        if deadline is not None:
+            deadline.check("classification")
+        if on_event is not None:
+            on_event("progress", {"stage": "classified", "componentType": component_type.value})
+
+        # Explicit single-turn form specifications need no model call
+        if component_type == ComponentType.FORM and len(claude_messages) == 1:
+            schema, confidence = extract_form_schema(str(claude_messages[0]["content"]))
+            if schema is not None and confidence >= self.form_compiler_confidence:
+                logger.info("AI Service: Compiling form with %s fields locally", len(schema["fields"]))
+                if on_event is not None:
+                    on_event("progress", {"stage": "compiled", "confidence": confidence})
+                return self.compile_form(schema, response_fields)
 
         # Get appropriate system prompt for component type
-        system_prompt = self.prompt_manager.get_system_prompt(component_type)
-        
-        logger.info(f"AI Service: Generating {component_type.value} component with {len(claude_messages)} messages")
-        
+        # The assembled prompt differs per field selection and sub-intents, so
+        # the cache key does too
+        system_prompt, prompt_version = self._select_system_prompt(component_type, claude_messages, response_fields)
+
+        cache_key = make_cache_key(
+            DEFAULT_MODEL, system_prompt, claude_messages, DEFAULT_TEMPERATURE, DEFAULT_MAX_TOKENS,
+            prompt_version=prompt_version
+        )
+        if self.cache is not None and use_cache:
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                logger.info("AI Service: Cache hit for %s component", component_type.value)
+                return cached_response
+
+        model, max_tokens = self._choose_strategy(deadline)
+        if model is None:
+            # A stored answer to the last message alone ignores the earlier
+            # turns, so follow-ups are never served from history
+            historical_response = None
+            if len(claude_messages) == 1:
+                historical_response = self._lookup_history(tenant, str(claude_messages[0]["content"]))
+            if historical_response is not None:
+                logger.info("AI Service: Deadline too close for generation, serving from history")
+                return historical_response
+            raise DeadlineExceeded("strategy selection")
+        if model != DEFAULT_MODEL:
+            logger.info("AI Service: %.1fs left, using %s", deadline.remaining(), model)
+            cache_key = make_cache_key(
+                model, system_prompt, claude_messages, DEFAULT_TEMPERATURE, max_tokens,
+                prompt_version=prompt_version
+            )
+            cached_response = self.cache.get(cache_key) if self.cache is not None and use_cache else None
+            if cached_response is not None:
+                return cached_response
+
+        logger.info("AI Service: Generating %s component with %s messages", component_type.value, len(claude_messages))
+
+        # Already loaded by _initialize_client; needed for the APIError handler
+        import anthropic
+
         try:
             # Check if client is available
             if not self.client:
                 logger.error("AI Service: Client not initialized")
-                return self._create_fallback_response(messages)
+                return self._create_fallback_response(messages, prompt_version)
 
             # Call Claude API
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4000,
-                temperature=0.1,
-                system=system_prompt,
-                messages=claude_messages,
+            response = self._call_claude(
+                system_prompt, claude_messages, tenant=tenant, deadline=deadline,
+                model=model, max_tokens=max_tokens, on_event=on_event
             )
-            
-            # Extract and parse response
             response_content = response.content[0].text
-            logger.info(f"AI Service: Received response ({len(response_content)} characters)")
+            logger.info("AI Service: Received response (%s characters)", len(response_content))
 
-            # Parse and validate response
-            parsed_response = self._parse_response(response_content)
+            # Decode once, then validate and transform the same object
+            decoded_response = self._decode_response(response_content)
+            parsed_response = self._transform_response(decoded_response, response_fields)
+            parsed_response = self._post_process(parsed_response, response.stop_reason)
 
             # Validate response format using prompt manager
-            if self.prompt_manager.validate_prompt_response(response_content):
+            if self.prompt_manager.validate_response_fields(decoded_response, response_fields):
                 logger.info("AI Service: Successfully parsed and validated response")
             else:
                 logger.warning("AI Service: Response validation failed, but proceeding")
+
+            parsed_response["promptVersion"] = prompt_version
+            parsed_response["responseFields"] = list(response_fields)
+            if parsed_response.get("code"):
+                parsed_response["componentId"] = component_id_for(parsed_response["code"])
+            # Broken output is returned so the client can see the analysis,
+            # but it is never reused
+            if not parsed_response.get("analysis", {}).get("truncated"):
+                if self.cache is not None:
+                    self.cache.set(cache_key, parsed_response)
+                if self.history is not None:
+                    # Only enqueues; the store writes on its own thread
+                    self.history.record(tenant, str(claude_messages[-1]["content"]), parsed_response)
             
             return parsed_response
-            
+
+        except (DeadlineExceeded, CircuitOpenError, RequestCancelled):
+            raise
+        except anthropic.APITimeoutError as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded("upstream call")
+            logger.error("AI Service: Claude API error: %s", e)
+            raise Exception(f"Claude API error: {str(e)}")
         except anthropic.APIError as e:
-            logger.error(f"AI Service: Claude API error: {e}")
+            logger.error("AI Service: Claude API error: %s", e)
             raise Exception(f"Claude API error: {str(e)}")
         except json.JSONDecodeError as e:
-            logger.error(f"AI Service: JSON parsing error: {e}")
+            logger.error("AI Service: JSON parsing error: %s", e)
             # Return fallback response instead of raising error
-            return self._create_fallback_response(messages)
+            return self._create_fallback_response(messages, prompt_version)
         except Exception as e:
-            logger.error(f"AI Service: Unexpected error: {e}")
+            logger.error("AI Service: Unexpected error: %s", e)
             raise Exception(f"AI generation failed: {str(e)}")
     
+    def compile_form(self, schema: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """
+        Compile a form schema into a component without calling the model
+
+        Args:
+            schema: Validated FormSchema (see services.form_compiler.normalize_form_schema)
+            fields: Response fields to keep, defaults to all
+
+        Returns:
+            Dict in the same shape as generate_component, with servedFrom "compiler"
+        """
+        compiled = build_form_component(schema)
+        if fields is not None:
+            for name in ("description", "dependencies", "usage"):
+                if name not in fields:
+                    del compiled["schema"][name]
+        compiled = self._post_process(compiled, "end_turn")
+        compiled["promptVersion"] = f"compiler-{COMPILER_VERSION}"
+        compiled["responseFields"] = list(fields or RESPONSE_FIELDS)
+        compiled["componentId"] = component_id_for(compiled["code"])
+        compiled["servedFrom"] = "compiler"
+        return compiled
+
+    def generate_variants(
+        self,
+        messages: List[Dict[str, str]],
+        count: int,
+        component_type: Optional[ComponentType] = None,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[Deadline] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate several alternative components for the same conversation
+
+        Variants are requested concurrently, each with its own temperature and
+        style hint, so n options take roughly as long as the slowest single call.
+        Results are listed in completion order and identical outputs are dropped.
+
+        Args:
+            messages: List of conversation messages
+            count: Number of variants to generate (1 to MAX_VARIANTS)
+            component_type: Optional specific component type, will auto-detect if not provided
+            tenant: Tenant the request is scheduled and accounted under
+            deadline: Optional time by which the client needs an answer; variants
+                still running at the deadline are reported as errors
+            fields: Optional response fields to generate; see generate_component
+
+        Returns:
+            Dict with the unique variants, each carrying its own timing
+
+        Raises:
+            ValueError: If count is out of range or fields names an unknown field
+            BudgetExceededError: If the tenant has used up its budget
+            DeadlineExceeded: If no variant finishes before the deadline
+            CircuitOpenError: If upstream calls are suspended after failures
+            PreflightError: If the request is too large for the model or budget
+            Exception: If AI service is not available or every variant fails
+        """
+        if not self.is_available():
+            raise Exception("AI service not available. Please check your API key.")
+
+        if count < 1 or count > MAX_VARIANTS:
+            raise ValueError(f"Variant count must be between 1 and {MAX_VARIANTS}")
+
+        self.tenants.check(tenant)
+        messages = self._run_preflight(messages)
+        claude_messages = self._prepare_messages(messages)
+        response_fields = self._resolve_fields(fields, claude_messages)
+        component_type = self._resolve_component_type(claude_messages, component_type)
+        system_prompt, prompt_version = self._select_system_prompt(component_type, claude_messages, response_fields)
+        model, max_tokens = self._choose_strategy(deadline)
+        if model is None:
+            raise DeadlineExceeded("strategy selection")
+        self.circuit.check()
+
+        logger.info("AI Service: Generating %s %s variants", count, component_type.value)
+
+        started = time.perf_counter()
+        variants: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        seen_fingerprints = set()
+        duplicates = 0
+
+        # Upstream concurrency is bounded by the scheduler; the pool only
+        # avoids spawning more threads than could ever run at once.
+        with ThreadPoolExecutor(
+            max_workers=min(count, self.max_concurrency),
+            thread_name_prefix="ai-variant",
+        ) as executor:
+            futures = {
+                # Each variant runs in a copy of the request context so its
+                # log lines keep the request id
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._generate_variant, index, system_prompt, claude_messages, tenant,
+                    deadline, model, max_tokens, response_fields
+                ): index
+                for index in range(count)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    variant = future.result()
+                except Exception as e:
+                    logger.warning("AI Service: Variant %s failed: %s", index, e)
+                    errors.append({"index": index, "message": str(e)})
+                    continue
+
+                fingerprint = self._fingerprint_code(variant.get("code", ""))
+                if fingerprint in seen_fingerprints:
+                    duplicates += 1
+                    continue
+                seen_fingerprints.add(fingerprint)
+                variants.append(variant)
+
+        if not variants:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded("variant generation")
+            raise Exception(f"AI generation failed: all {count} variants failed")
+
+        elapsed = time.perf_counter() - started
+        self.tenants.record_latency(tenant, elapsed)
+        elapsed_ms = round(elapsed * 1000, 1)
+        logger.info(
+            "AI Service: Generated %s unique variants (%s duplicates, %s errors) in %sms",
+            len(variants), duplicates, len(errors), elapsed_ms
+        )
+
+        return {
+            "variants": variants,
+            "requested": count,
+            "duplicates": duplicates,
+            "errors": errors,
+            "elapsedMs": elapsed_ms,
+            "promptVersion": prompt_version,
+            "responseFields": list(response_fields),
+        }
+
+    def _generate_variant(
+        self,
+        index: int,
+        system_prompt: str,
+        claude_messages: List[MessageParam],
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[Deadline] = None,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        fields: Tuple[str, ...] = RESPONSE_FIELDS
+    ) -> Dict[str, Any]:
+        """
+        Generate a single variant using the strategy assigned to its index
+
+        Args:
+            index: Position of the variant in the request
+            system_prompt: Base system prompt for the component type
+            claude_messages: Prepared conversation messages
+            tenant: Tenant the request is scheduled and accounted under
+            deadline: Optional time by which the upstream call must finish
+            model: Model to generate with
+            max_tokens: Output token limit
+            fields: Response fields the system prompt asks for
+
+        Returns:
+            Parsed component response annotated with variant metadata
+        """
+        temperature, style_hint = VARIANT_STRATEGIES[index % len(VARIANT_STRATEGIES)]
+        if style_hint:
+            system_prompt = f"{system_prompt}\n\nSTYLE DIRECTION:\n{style_hint}"
+
+        started = time.perf_counter()
+        response = self._call_claude(
+            system_prompt, claude_messages, temperature, tenant, deadline, model, max_tokens
+        )
+        parsed_response = self._parse_response(response.content[0].text, fields)
+        parsed_response = self._post_process(parsed_response, response.stop_reason)
+
+        variant = {
+            "index": index,
+            "temperature": temperature,
+            "styleHint": style_hint,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+            **parsed_response,
+        }
+        if variant.get("code"):
+            variant["componentId"] = component_id_for(variant["code"])
+        return variant
+
+    def _call_claude(
+        self,
+        system_prompt: str,
+        claude_messages: List[MessageParam],
+        temperature: float = DEFAULT_TEMPERATURE,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[Deadline] = None,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        on_event: Optional[EventCallback] = None
+    ) -> anthropic.types.Message:
+        """
+        Make a single upstream call in the tenant's fair share of the upstream slots
+
+        Args:
+            system_prompt: System prompt to send
+            claude_messages: Prepared conversation messages
+            temperature: Sampling temperature
+            tenant: Tenant the call is scheduled and accounted under
+            deadline: Optional deadline bounding both the queue wait and the
+                upstream request timeout
+            model: Model to generate with
+            max_tokens: Output token limit
+            on_event: Optional progress callback; when given the response is
+                streamed and each text delta is reported as a "chunk" event.
+                If it raises RequestCancelled the upstream stream is closed
+
+        Returns:
+            The upstream message
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while queued
+        """
+        # Fail fast while upstream is known to be down instead of queueing
+        self.circuit.check()
+        if self.prompt_caching:
+            claude_messages = with_cache_breakpoint(claude_messages)
+
+        request_options: Dict[str, Any] = {}
+        try:
+            with self.scheduler.slot(tenant, timeout=deadline.remaining() if deadline else None):
+                if deadline is not None:
+                    deadline.check("queueing")
+                    request_options["timeout"] = deadline.remaining()
+                self.circuit.before_call()
+                started = time.perf_counter()
+                try:
+                    if on_event is None:
+                        response = self.client.messages.create(
+                            model=model,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            system=system_prompt,
+                            messages=claude_messages,
+                            **request_options,
+                        )
+                    else:
+                        on_event("progress", {"stage": "generating", "model": model})
+                        with self.client.messages.stream(
+                            model=model,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            system=system_prompt,
+                            messages=claude_messages,
+                            **request_options,
+                        ) as stream:
+                            for text in stream.text_stream:
+                                on_event("chunk", {"text": text})
+                            response = stream.get_final_message()
+                except Exception as e:
+                    self._record_upstream_error(e, time.perf_counter() - started, deadline)
+                    raise
+        except SchedulerTimeout:
+            raise DeadlineExceeded("queueing")
+
+        self.circuit.record_success()
+        self.probe.observe(True, time.perf_counter() - started)
+
+        usage = getattr(response, "usage", None)
+        input_tokens = getattr(usage, "input_tokens", 0)
+        output_tokens = getattr(usage, "output_tokens", 0)
+        cached_tokens = getattr(usage, "cache_read_input_tokens", None)
+        if isinstance(cached_tokens, int) and cached_tokens:
+            logger.info("AI Service: %s input tokens read from the prompt cache", cached_tokens)
+        self.tenants.record_usage(
+            tenant,
+            input_tokens if isinstance(input_tokens, int) else 0,
+            output_tokens if isinstance(output_tokens, int) else 0,
+        )
+        return response
+
+    def _record_upstream_error(self, error: Exception, elapsed: float, deadline: Optional[Deadline]) -> None:
+        """Feed a failed upstream call into the circuit breaker and health probe"""
+        import anthropic
+
+        if isinstance(error, RequestCancelled) or (
+            isinstance(error, anthropic.APITimeoutError) and deadline is not None and deadline.expired
+        ):
+            # Our own cancellation or deadline, not an upstream problem
+            self.circuit.record_ignored()
+        elif isinstance(error, anthropic.APIConnectionError) or (
+            isinstance(error, anthropic.APIStatusError)
+            and (error.status_code >= 500 or error.status_code in (401, 403))
+        ):
+            self.circuit.record_failure()
+            self.probe.observe(False, elapsed, str(error))
+        else:
+            # Upstream answered; the request itself was bad
+            self.circuit.record_success()
+
+    def readiness(self, max_queue_depth: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Report whether this worker should receive traffic
+
+        Only reads state kept by real calls and the background probe, so
+        readiness checks never cause upstream calls themselves. Upstream
+        health is judged by the circuit breaker, which both feed: a single
+        failed call stays below its failure threshold and keeps the worker in
+        rotation.
+
+        Args:
+            max_queue_depth: Queued requests above which the worker reports
+                not ready. Defaults to four times the concurrency limit
+
+        Returns:
+            Readiness report with a boolean "ready" and its inputs
+        """
+        if self.client is not None:
+            self.probe.start()
+        if max_queue_depth is None:
+            max_queue_depth = 4 * self.scheduler.capacity
+        circuit = self.circuit.stats()
+        scheduler = self.scheduler.stats()
+        upstream = self.probe.snapshot()
+        ready = (
+            self.client is not None
+            and circuit["state"] != "open"
+            # Half-open with the trial call running rejects everything else
+            and not (circuit["state"] == "half_open" and circuit["trialInFlight"])
+            and scheduler["queueDepth"] <= max_queue_depth
+        )
+        return {
+            "ready": ready,
+            "clientAvailable": self.client is not None,
+            "circuit": circuit,
+            "queue": {
+                "depth": scheduler["queueDepth"],
+                "maxDepth": max_queue_depth,
+                "inFlight": scheduler["inFlight"],
+                "capacity": scheduler["capacity"],
+            },
+            "upstream": upstream,
+        }
+
+    def _probe_upstream(self) -> None:
+        """Cheap upstream call used by the readiness probe; costs no tokens"""
+        if self.client is None:
+            raise Exception("AI service not available. Please check your API key.")
+        started = time.perf_counter()
+        try:
+            self.client.models.list(limit=1, timeout=5.0)
+        except Exception as e:
+            self._record_upstream_error(e, time.perf_counter() - started, None)
+            raise
+        self.circuit.record_success()
+
+    def _resolve_fields(
+        self,
+        fields: Optional[List[str]],
+        claude_messages: List[MessageParam]
+    ) -> Tuple[str, ...]:
+        """
+        Response fields for a request: the client's selection, or the default
+        for its position in the conversation
+
+        Raises:
+            ValueError: If fields names an unknown field
+        """
+        if fields is not None:
+            return normalize_fields(fields)
+        if self.lean_follow_ups and any(message["role"] == "assistant" for message in claude_messages):
+            return LEAN_FIELDS
+        return RESPONSE_FIELDS
+
+    def _choose_strategy(self, deadline: Optional[Deadline]) -> Tuple[Optional[str], int]:
+        """
+        Pick the model and output budget that fit the remaining time
+
+        Returns:
+            (model, max_tokens); model is None when there is not enough time
+            left for any upstream call
+        """
+        if deadline is None:
+            return DEFAULT_MODEL, DEFAULT_MAX_TOKENS
+        remaining = deadline.remaining()
+        if remaining < self.min_upstream_seconds:
+            return None, 0
+        if remaining < self.fast_strategy_seconds:
+            return FAST_MODEL, FAST_MAX_TOKENS
+        return DEFAULT_MODEL, DEFAULT_MAX_TOKENS
+
+    def _lookup_history(self, tenant: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a tenant's stored component for the same prompt, as a no-upstream fallback
+
+        Search ranking is relative, so the best match can still be a different
+        request; only stored prompts at least history_min_similarity alike
+        are served. The result is marked degraded.
+        """
+        if self.history is None:
+            return None
+        try:
+            matches = self.history.search(tenant, prompt, limit=HISTORY_FALLBACK_CANDIDATES)
+            match = next(
+                (m for m in matches if prompt_similarity(prompt, m["prompt"]) >= self.history_min_similarity),
+                None
+            )
+            stored = self.history.get(tenant, match["id"]) if match is not None else None
+        except Exception as e:
+            logger.warning("AI Service: History lookup failed: %s", e)
+            return None
+        if stored is not None:
+            stored["servedFrom"] = "history"
+            stored["degraded"] = True
+        return stored
+
+    def _post_process(self, parsed_response: Dict[str, Any], stop_reason: Optional[str]) -> Dict[str, Any]:
+        """
+        Run static analysis on generated code and reconcile its dependencies
+
+        Args:
+            parsed_response: Transformed response with code and schema
+            stop_reason: Upstream stop reason, used to detect truncation
+
+        Returns:
+            The response with an analysis section and completed dependencies
+        """
+        code = parsed_response.get("code")
+        if not isinstance(code, str) or not code:
+            return parsed_response
+
+        schema = parsed_response.get("schema")
+        declared = schema.get("dependencies", []) if isinstance(schema, dict) else []
+        if not isinstance(declared, list):
+            declared = []
+
+        analysis = self.code_analyzer.analyze(code, declared, stop_reason)
+        if isinstance(schema, dict) and "dependencies" in schema:
+            schema["dependencies"] = declared + analysis["undeclaredDependencies"]
+
+        if analysis["truncated"]:
+            logger.warning("AI Service: Generated code looks incomplete (stop reason: %s)", stop_reason)
+        parsed_response["analysis"] = analysis
+        return parsed_response
+
+    def _resolve_component_type(
+        self,
+        claude_messages: List[MessageParam],
+        component_type: Optional[ComponentType]
+    ) -> ComponentType:
+        """Return the given component type or detect it from the latest message"""
+        if component_type is not None:
+            return component_type
+
+        user_message = str(claude_messages[-1]["content"]) if claude_messages else ""
+        component_type = self.prompt_manager.get_component_type_from_message(user_message)
+        logger.info("AI Service: Auto-detected component type: %s", component_type.value)
+        return component_type
+
+    def _select_system_prompt(
+        self,
+        component_type: ComponentType,
+        claude_messages: List[MessageParam],
+        response_fields: Tuple[str, ...]
+    ) -> Tuple[str, str]:
+        """System prompt and version, with only the instructions for the sub-intents asked about"""
+        sub_intents = self.prompt_manager.detect_sub_intents(
+            component_type, (str(message["content"]) for message in claude_messages if message["role"] == "user")
+        )
+        if sub_intents:
+            logger.info(
+                "AI Service: Sub-intents %s", ", ".join(f"{component_type.value}/{intent}" for intent in sub_intents)
+            )
+        return self.prompt_manager.get_versioned_system_prompt(component_type, response_fields, sub_intents)
+
+    @staticmethod
+    def _fingerprint_code(code: str) -> str:
+        """Hash component code with whitespace normalized, for deduplication"""
+        normalized = " ".join(code.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _run_preflight(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Check request size locally and compact the conversation if needed
+
+        Args:
+            messages: Raw messages from request
+
+        Returns:
+            Messages that fit the configured limits
+
+        Raises:
+            PreflightError: If the request cannot be made to fit
+        """
+        result = run_preflight(
+            messages, self.prompt_manager.max_system_prompt_tokens(), self.preflight_limits
+        )
+        if result.dropped_messages:
+            logger.info(
+                "AI Service: Dropped %s oldest messages to fit ~%s input tokens",
+                result.dropped_messages, result.estimated_tokens
+            )
+        return result.messages
+
     def _prepare_messages(self, messages: List[Dict[str, str]]) -> List[MessageParam]:
         """
         Prepare and validate messages for Claude API
@@ -149,12 +898,13 @@ class AIService:
 
         return claude_messages
     
-    def _parse_response(self, response_content: str) -> Dict[str, Any]:
+    def _parse_response(self, response_content: str, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
         """
         Parse and validate AI response
 
         Args:
             response_content: Raw response from Claude
+            fields: Response fields to keep, defaults to all
 
         Returns:
             Parsed and validated response in expected format
@@ -162,25 +912,57 @@ class AIService:
         Raises:
             json.JSONDecodeError: If response is not valid JSON
         """
-        parsed_response = json.loads(response_content)
+        return self._transform_response(self._decode_response(response_content), fields)
+
+    def _decode_response(self, response_content: str) -> Dict[str, Any]:
+        """
+        Decode the raw AI response into a JSON object
+
+        Raises:
+            json.JSONDecodeError: If response is not a valid JSON object
+        """
+        parsed_response = json_codec.loads(response_content)
 
         # Basic validation of response structure
         if not isinstance(parsed_response, dict):
             raise json.JSONDecodeError("Response is not a JSON object", response_content, 0)
 
+        return parsed_response
+
+    def _transform_response(
+        self,
+        parsed_response: Dict[str, Any],
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transform a decoded AI response into the format expected by the frontend
+
+        Args:
+            parsed_response: Decoded JSON object from Claude
+            fields: Response fields to keep, defaults to all. Fields that were
+                not asked for are left out even if the model sent them
+
+        Returns:
+            Response with code and schema fields
+        """
         # Transform new response format to expected format
         if "componentCode" in parsed_response:
             # New enhanced format - transform to expected format
+            schema = {
+                "title": parsed_response.get("componentType", "Component").title() + " Component",
+                "description": parsed_response.get("description", ""),
+                "type": parsed_response.get("componentType", "general"),
+                "dependencies": parsed_response.get("dependencies", []),
+                "usage": parsed_response.get("usage", ""),
+                "fields": []  # Components don't have form fields
+            }
+            if fields is not None:
+                for name in ("description", "dependencies", "usage"):
+                    if name not in fields:
+                        del schema[name]
             transformed_response = {
                 "code": parsed_response.get("componentCode", ""),
-                "schema": {
-                    "title": parsed_response.get("componentType", "Component").title() + " Component",
-                    "description": parsed_response.get("description", ""),
-                    "type": parsed_response.get("componentType", "general"),
-                    "dependencies": parsed_response.get("dependencies", []),
-                    "usage": parsed_response.get("usage", ""),
-                    "fields": []  # Components don't have form fields
-                }
+                "schema": schema,
             }
             logger.info("AI Service: Transformed enhanced response format to expected format")
             return transformed_response
@@ -192,12 +974,17 @@ class AIService:
         return parsed_response
     
 
-    def _create_fallback_response(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    def _create_fallback_response(
+        self,
+        messages: List[Dict[str, str]],
+        prompt_version: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Create a fallback response when Claude fails to return valid JSON
         
         Args:
             messages: Original messages for context
+            prompt_version: Version of the prompt set used for the failed request
             
         Returns:
             Fallback component response
@@ -205,6 +992,7 @@ class AIService:
         logger.info("AI Service: Using fallback response due to parsing error")
         
         return {
+            "promptVersion": prompt_version or self.prompt_manager.prompt_version,
             "schema": {
                 "title": "Contact Form",
                 "description": "A simple contact form",
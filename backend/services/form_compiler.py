@@ -0,0 +1,602 @@
+"""
+Local schema-to-code compiler for explicitly specified forms.
+
+A request such as "contact form with name, email, phone and message, all
+required" fully determines the component, so it does not need a model call.
+This module extracts a FormSchema (matching the frontend FormField types) from
+such prompts, together with a confidence score, validates posted schemas, and
+compiles a schema into a React Hook Form + Zod component in a few
+milliseconds.
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keep in sync with FormField["type"] in frontend/src/types/index.ts
+FIELD_TYPES: Tuple[str, ...] = (
+    "text", "email", "number", "textarea", "checkbox", "select", "radio", "password", "tel",
+)
+FORM_DEPENDENCIES = ["react-hook-form", "zod", "@hookform/resolvers"]
+# Part of promptVersion on compiled results; bump when the generated code changes
+COMPILER_VERSION = "1"
+
+DEFAULT_PASSWORD_MIN_LENGTH = 8
+TEL_PATTERN = r"^[+0-9 ()-]{7,20}$"
+MAX_FIELDS = 30
+
+_FORM_WORDS = re.compile(r"\b(?:form|sign[- ]?up|registration|login|sign[- ]?in|checkout|survey)\b", re.I)
+_LIST_START = re.compile(
+    r"\b(?:with(?:\s+the)?(?:\s+following)?(?:\s+fields?)?|containing|including|fields?)\s*:?\s+", re.I
+)
+_ALL_REQUIRED = re.compile(r",?\s*\(?\b(?:all|every)(?:\s+fields?)?(?:\s+(?:are|is))?\s+required\b\)?", re.I)
+_ALL_OPTIONAL = re.compile(r",?\s*\(?\b(?:all|every)(?:\s+fields?)?(?:\s+(?:are|is))?\s+optional\b\)?", re.I)
+_TRAILING_VALIDATION = re.compile(r"\s+(?:with|and)\s+(?:[\w-]+\s+)?validation\b.*$", re.I)
+_LABEL = re.compile(r"^[a-z][a-z0-9'&/ -]*$", re.I)
+
+# Prompt features the compiler cannot express; their presence means the
+# request needs the model
+_UNSUPPORTED = re.compile(
+    r"\b(?:upload|file|image|photo|avatar|date|time|calendar|multi[- ]?step|wizard|steps?|drag|slider|"
+    r"range|rating|stars?|color|map|autocomplete|conditional|dynamic|signature|captcha|otp|animation|"
+    r"animated|modal|dialog|theme|strength|preview)\b",
+    re.I,
+)
+# Constraints and styling a FormSchema cannot carry; free-text requests like
+# "the name must be at least 3 characters" or "make it dark" need the model.
+# Parenthesized modifiers are removed before this is matched
+_UNEXPRESSIBLE = re.compile(
+    r"\b(?:must|should|between|at least|at most|no more than|no less than|minimum|maximum|only|exactly|"
+    r"characters?|digits?|style[ds]?|styling|dark|light|colou?rs?|red|blue|green|purple|pink|orange|yellow|"
+    r"black|white|gr[ae]y|gradient|rounded|shadow|border|background|font|bold|large|small|centered|"
+    r"inline|grid|columns?|glass\w*|minimal\w*|animated|responsive)\b",
+    re.I,
+)
+# What may follow the field list without changing the request
+_IGNORABLE_TAIL = re.compile(r"^(?:please|thanks|thank you|thx)?[\s.!?]*$", re.I)
+
+_TYPE_WORDS = {
+    "checkbox": "checkbox",
+    "radio": "radio",
+    "select": "select",
+    "dropdown": "select",
+    "textarea": "textarea",
+    "password": "password",
+    "number": "number",
+    "numeric": "number",
+}
+_NAME_TYPES: Tuple[Tuple[str, re.Pattern], ...] = (
+    ("email", re.compile(r"\be-?mail\b")),
+    ("tel", re.compile(r"\b(?:phone|telephone|mobile|cell|tel)\b")),
+    ("password", re.compile(r"\b(?:password|passcode)\b")),
+    ("textarea", re.compile(r"\b(?:message|comments?|description|bio|notes?|feedback|details|question|about)\b")),
+    ("checkbox", re.compile(r"\b(?:agree|accept|terms|subscribe|newsletter|consent|remember me)\b")),
+    ("number", re.compile(r"\b(?:age|quantity|amount|price|budget|guests|count|salary|years)\b")),
+)
+# Other field names common enough that listing them leaves nothing to guess
+_COMMON_FIELDS = re.compile(
+    r"\b(?:(?:first|last|full|middle|user|company|display)\s*name|name|username|address|street|city|state|"
+    r"province|region|zip|zip code|postal code|postcode|country|company|organi[sz]ation|business|website|url|"
+    r"job title|title|role|position|department|subject|topic|reason|gender|nationality|occupation|industry|"
+    r"school|major|referral|reference|account number|card number|cvv|cvc|coupon|promo code|discount code)\b",
+    re.I,
+)
+_FILLER_WORDS = {"a", "an", "the", "your", "field", "fields", "input", "inputs", "box", "area"}
+
+
+class FormSchemaError(ValueError):
+    """Raised when a form schema is invalid"""
+
+
+def _split_top_level(text: str, separator: re.Pattern) -> List[str]:
+    """Split on a separator pattern outside of parentheses"""
+    parts, depth, start = [], 0, 0
+    for match_start in range(len(text)):
+        char = text[match_start]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0 and match_start >= start:
+            match = separator.match(text, match_start)
+            if match:
+                parts.append(text[start:match_start])
+                start = match.end()
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _camel_case(words: List[str]) -> str:
+    words = [re.sub(r"[^a-z0-9]", "", word) for word in words]
+    words = [word for word in words if word]
+    if not words:
+        return "field"
+    identifier = words[0] + "".join(word.capitalize() for word in words[1:])
+    return identifier if identifier[0].isalpha() else f"field{identifier}"
+
+
+def _parse_item(item: str, all_required: Optional[bool]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parse one listed field
+
+    An item is clean only when it names a known kind of field or states its
+    type or constraints; anything else after "with" may be a feature request
+    ("with dark mode") rather than a field.
+
+    Returns:
+        Tuple of (FormField dict, whether the item was parsed without guessing)
+    """
+    clean = True
+    explicit = False
+    explicit_type = None
+    required = all_required if all_required is not None else True
+    validation: Dict[str, Any] = {}
+    options: Optional[List[str]] = None
+
+    # Parenthesized modifiers: (required), (optional), (min 8), (max 500),
+    # (select: a, b, c), (options: a/b/c)
+    for modifier in re.findall(r"\(([^)]*)\)", item):
+        modifier = modifier.strip()
+        option_match = re.match(r"(select|dropdown|radio|options?|one of)\s*:\s*(.+)$", modifier, re.I)
+        lowered = modifier.lower()
+        explicit = True
+        if option_match:
+            kind = option_match.group(1).lower()
+            explicit_type = "radio" if kind == "radio" else explicit_type or "select"
+            options = [option.strip() for option in re.split(r"\s*[,/|]\s*|\s+or\s+", option_match.group(2))]
+            options = [option for option in options if option]
+        elif lowered in ("required", "optional"):
+            required = lowered == "required"
+        elif re.match(r"^(?:min(?:imum)?|at least)\s+\d+(?:\s+char(?:acter)?s)?$", lowered):
+            validation["minLength"] = int(re.search(r"\d+", lowered).group())
+        elif re.match(r"^(?:max(?:imum)?|at most|up to)\s+\d+(?:\s+char(?:acter)?s)?$", lowered):
+            validation["maxLength"] = int(re.search(r"\d+", lowered).group())
+        else:
+            clean = False
+    text = re.sub(r"\([^)]*\)", " ", item)
+    text = re.sub(r"^(?:and|or)\s+", "", text.strip(), flags=re.I)
+    text = re.sub(r"\btext area\b", "textarea", text, flags=re.I)
+
+    # Label words keep the user's casing; matching is case-insensitive
+    words: List[str] = []
+    for word in text.split():
+        lowered = word.lower()
+        if lowered in ("required", "optional"):
+            required = lowered == "required"
+        elif lowered in _TYPE_WORDS and not (
+            lowered == "number" and words and words[-1].lower() in ("phone", "card")
+        ):
+            explicit_type = explicit_type or _TYPE_WORDS[lowered]
+            if lowered == "password":
+                words.append(word)
+        elif lowered not in _FILLER_WORDS:
+            words.append(word)
+
+    label_text = " ".join(words).lower()
+    if not words or len(words) > 4 or not _LABEL.match(label_text):
+        clean = False
+
+    field_type = explicit_type
+    if field_type is None:
+        field_type = next((name for name, pattern in _NAME_TYPES if pattern.search(label_text)), None)
+        if field_type is None:
+            field_type = "text"
+            if not explicit and not _COMMON_FIELDS.search(label_text):
+                clean = False
+    if field_type in ("select", "radio") and not options:
+        clean = False
+        field_type = "text"
+    if field_type == "password":
+        validation.setdefault("minLength", DEFAULT_PASSWORD_MIN_LENGTH)
+    if field_type == "tel":
+        validation.setdefault("pattern", TEL_PATTERN)
+        validation.setdefault("patternMessage", "Enter a valid phone number")
+
+    label = " ".join(word if word.isupper() else word.capitalize() for word in words) or "Field"
+    field: Dict[str, Any] = {
+        "id": _camel_case(label_text.split()),
+        "type": field_type,
+        "label": label,
+        "required": required,
+    }
+    if field_type not in ("checkbox", "select", "radio"):
+        field["placeholder"] = f"Enter your {label_text}" if label_text else ""
+    if validation:
+        field["validation"] = validation
+    if options:
+        field["options"] = options
+    return field, clean
+
+
+def _title_from_prompt(text: str) -> str:
+    match = re.search(r"\b([a-z][a-z-]*)\s+form\b", text.lower())
+    if match and match.group(1) not in ("a", "an", "the", "simple", "basic", "new", "create", "build", "make"):
+        return f"{match.group(1).replace('-', ' ').title()} Form"
+    return "Form"
+
+
+def extract_form_schema(prompt: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Extract a form schema from a prompt that lists its fields
+
+    Args:
+        prompt: User message
+
+    Returns:
+        Tuple of (FormSchema dict or None, confidence between 0 and 1). The
+        confidence is 1 only when every field was parsed without guessing and
+        the prompt asks for nothing the compiler cannot produce: no further
+        sentences after the field list, and no free-text constraints or
+        styling.
+    """
+    text = " ".join(prompt.split())
+    if not _FORM_WORDS.search(text):
+        return None, 0.0
+
+    list_match = _LIST_START.search(text)
+    if not list_match:
+        return None, 0.0
+    listed = text[list_match.end():]
+    # The field list ends with the sentence; anything after it is a further
+    # request the schema would drop
+    listed, *rest = re.split(r"[.;!?](?:\s|$)", listed, maxsplit=1)
+    tail = rest[0] if rest else ""
+
+    all_required: Optional[bool] = None
+    if _ALL_REQUIRED.search(listed):
+        all_required = True
+        listed = _ALL_REQUIRED.sub("", listed)
+    elif _ALL_OPTIONAL.search(listed):
+        all_required = False
+        listed = _ALL_OPTIONAL.sub("", listed)
+    listed = _TRAILING_VALIDATION.sub("", listed)
+    listed = re.sub(r"\bterms and conditions\b", "terms & conditions", listed, flags=re.I)
+
+    items = []
+    for part in _split_top_level(listed, re.compile(r",\s*")):
+        items.extend(_split_top_level(part, re.compile(r"\s+and\s+", re.I)))
+    if len(items) < 2 or len(items) > MAX_FIELDS:
+        return None, 0.0
+
+    fields, clean_count, seen = [], 0, set()
+    for item in items:
+        field, clean = _parse_item(item, all_required)
+        base_id, suffix = field["id"], 2
+        while field["id"] in seen:
+            field["id"] = f"{base_id}{suffix}"
+            suffix += 1
+        seen.add(field["id"])
+        fields.append(field)
+        clean_count += clean
+
+    confidence = clean_count / len(items)
+    if _UNSUPPORTED.search(text):
+        confidence *= 0.5
+    if not _IGNORABLE_TAIL.match(tail) or _UNEXPRESSIBLE.search(re.sub(r"\([^)]*\)", " ", text)):
+        confidence *= 0.5
+
+    schema = {
+        "title": _title_from_prompt(text),
+        "description": "",
+        "fields": fields,
+    }
+    return schema, round(confidence, 3)
+
+
+def normalize_form_schema(schema: Any) -> Dict[str, Any]:
+    """
+    Validate a posted FormSchema and fill in defaults
+
+    Raises:
+        FormSchemaError: If the schema does not match the frontend FormSchema type
+    """
+    if not isinstance(schema, dict):
+        raise FormSchemaError("schema must be an object")
+    title = schema.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise FormSchemaError("schema.title must be a non-empty string")
+    fields = schema.get("fields")
+    if not isinstance(fields, list) or not fields:
+        raise FormSchemaError("schema.fields must be a non-empty array")
+    if len(fields) > MAX_FIELDS:
+        raise FormSchemaError(f"schema.fields may have at most {MAX_FIELDS} fields")
+
+    normalized_fields, seen = [], set()
+    for index, field in enumerate(fields):
+        where = f"schema.fields[{index}]"
+        if not isinstance(field, dict):
+            raise FormSchemaError(f"{where} must be an object")
+        field_id = field.get("id")
+        if not isinstance(field_id, str) or not re.match(r"^[A-Za-z_$][\w$]*$", field_id):
+            raise FormSchemaError(f"{where}.id must be a valid identifier")
+        if field_id in seen:
+            raise FormSchemaError(f"Duplicate field id {field_id}")
+        seen.add(field_id)
+        if field.get("type") not in FIELD_TYPES:
+            raise FormSchemaError(f"{where}.type must be one of {', '.join(FIELD_TYPES)}")
+        if not isinstance(field.get("label"), str) or not field["label"].strip():
+            raise FormSchemaError(f"{where}.label must be a non-empty string")
+
+        normalized = {
+            "id": field_id,
+            "type": field["type"],
+            "label": field["label"].strip(),
+            "required": bool(field.get("required", False)),
+        }
+        if isinstance(field.get("placeholder"), str):
+            normalized["placeholder"] = field["placeholder"]
+
+        validation = field.get("validation")
+        if validation is not None:
+            if not isinstance(validation, dict):
+                raise FormSchemaError(f"{where}.validation must be an object")
+            clean_validation = {}
+            for key in ("minLength", "maxLength"):
+                if key in validation:
+                    if isinstance(validation[key], bool) or not isinstance(validation[key], int) or validation[key] < 0:
+                        raise FormSchemaError(f"{where}.validation.{key} must be a non-negative integer")
+                    clean_validation[key] = validation[key]
+            for key in ("pattern", "patternMessage"):
+                if key in validation:
+                    if not isinstance(validation[key], str):
+                        raise FormSchemaError(f"{where}.validation.{key} must be a string")
+                    clean_validation[key] = validation[key]
+            if clean_validation:
+                normalized["validation"] = clean_validation
+
+        if field["type"] in ("select", "radio"):
+            options = field.get("options")
+            if not isinstance(options, list) or not options or not all(isinstance(o, str) and o for o in options):
+                raise FormSchemaError(f"{where}.options must be a non-empty array of strings")
+            normalized["options"] = options
+        normalized_fields.append(normalized)
+
+    result = {"title": title.strip(), "fields": normalized_fields}
+    if isinstance(schema.get("description"), str):
+        result["description"] = schema["description"]
+    return result
+
+
+def component_name(title: str) -> str:
+    """PascalCase component name for a form title, ending in Form"""
+    words = re.findall(r"[A-Za-z0-9]+", title)
+    name = "".join(word[:1].upper() + word[1:] for word in words) or "Generated"
+    if not name[0].isalpha():
+        name = f"Generated{name}"
+    return name if name.endswith("Form") else f"{name}Form"
+
+
+def _js(value: str) -> str:
+    """JavaScript string literal"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _jsx_text(value: str) -> str:
+    return "{" + _js(value) + "}" if re.search(r"[{}<>&\"'\\]", value) else value
+
+
+def _jsx_attr(value: str) -> str:
+    return "{" + _js(value) + "}" if re.search(r"[\"\\{}]", value) else f'"{value}"'
+
+
+def _zod_rule(field: Dict[str, Any]) -> str:
+    label = field["label"]
+    required = field["required"]
+    validation = field.get("validation", {})
+    field_type = field["type"]
+
+    if field_type == "checkbox":
+        if required:
+            return f"z.boolean().refine((value) => value, {_js(f'{label} is required')})"
+        return "z.boolean().optional()"
+
+    if field_type in ("select", "radio"):
+        options = ", ".join(_js(option) for option in field["options"])
+        rule = f"z.enum([{options}], {{ errorMap: () => ({{ message: {_js(f'Select {label.lower()}')} }}) }})"
+        return rule if required else f'{rule}.optional().or(z.literal(""))'
+
+    if field_type == "number":
+        # Inputs hold strings; coercing "" would give 0, so an empty input
+        # stays "" and is rejected by the refine when the field is required
+        rule = (
+            f'z.union([z.literal(""), z.coerce.number()], '
+            f"{{ errorMap: () => ({{ message: {_js(f'{label} must be a number')} }}) }})"
+        )
+        if required:
+            return f'{rule}.refine((value) => value !== "", {_js(f"{label} is required")})'
+        return f"{rule}.optional()"
+
+    rule = "z.string()"
+    min_length = validation.get("minLength")
+    if required:
+        message = f"{label} must be at least {min_length} characters" if min_length else f"{label} is required"
+        rule += f".min({max(1, min_length or 0)}, {_js(message)})"
+    elif min_length:
+        rule += f".min({min_length}, {_js(f'{label} must be at least {min_length} characters')})"
+    if "maxLength" in validation:
+        max_length = validation["maxLength"]
+        rule += f".max({max_length}, {_js(f'{label} must be at most {max_length} characters')})"
+    if field_type == "email":
+        rule += '.email("Enter a valid email address")'
+    if "pattern" in validation:
+        message = validation.get("patternMessage") or f"{label} is not valid"
+        rule += f".regex(new RegExp({_js(validation['pattern'])}), {_js(message)})"
+    return rule if required else f'{rule}.optional().or(z.literal(""))'
+
+
+def _error_block(field_id: str, indent: str) -> List[str]:
+    return [
+        f"{indent}{{errors.{field_id} && (",
+        f'{indent}  <p id="{field_id}-error" role="alert" className="text-sm text-destructive">',
+        f"{indent}    {{errors.{field_id}.message}}",
+        f"{indent}  </p>",
+        f"{indent})}}",
+    ]
+
+
+def _field_jsx(field: Dict[str, Any]) -> List[str]:
+    field_id = field["id"]
+    field_type = field["type"]
+    label = _jsx_text(field["label"])
+    marker = ' <span aria-hidden="true" className="text-destructive">*</span>' if field["required"] else ""
+    aria = [
+        f'aria-invalid={{errors.{field_id} ? "true" : "false"}}',
+        f'aria-describedby={{errors.{field_id} ? "{field_id}-error" : undefined}}',
+    ]
+
+    if field_type == "radio":
+        lines = [
+            '      <fieldset className="space-y-2">',
+            f'        <legend className="text-sm font-medium">{label}{marker}</legend>',
+        ]
+        for index, option in enumerate(field["options"]):
+            lines += [
+                '        <div className="flex items-center gap-2">',
+                f'          <input id="{field_id}-{index}" type="radio" value={_jsx_attr(option)} '
+                f'className="h-4 w-4" {{...register("{field_id}")}} />',
+                f'          <Label htmlFor="{field_id}-{index}">{_jsx_text(option)}</Label>',
+                "        </div>",
+            ]
+        return lines + _error_block(field_id, "        ") + ["      </fieldset>"]
+
+    if field_type == "checkbox":
+        return [
+            '      <div className="space-y-2">',
+            '        <div className="flex items-center gap-2">',
+            f'          <input id="{field_id}" type="checkbox" className="h-4 w-4 rounded border-input"',
+            *(f"            {attribute}" for attribute in aria),
+            f'            {{...register("{field_id}")}}',
+            "          />",
+            f'          <Label htmlFor="{field_id}">{label}{marker}</Label>',
+            "        </div>",
+            *_error_block(field_id, "        "),
+            "      </div>",
+        ]
+
+    lines = [
+        '      <div className="space-y-2">',
+        f'        <Label htmlFor="{field_id}">{label}{marker}</Label>',
+    ]
+    if field_type == "select":
+        lines += [
+            f'        <select id="{field_id}" className="flex h-10 w-full rounded-md border border-input '
+            'bg-background px-3 py-2 text-sm focus-visible:outline-none focus-visible:ring-2 focus-visible:ring-ring"',
+            *(f"          {attribute}" for attribute in aria),
+            f'          {{...register("{field_id}")}}',
+            "        >",
+            f'          <option value="">{_jsx_text("Select " + field["label"].lower())}</option>',
+            *(
+                f"          <option value={_jsx_attr(option)}>{_jsx_text(option)}</option>"
+                for option in field["options"]
+            ),
+            "        </select>",
+        ]
+    else:
+        tag = "Textarea" if field_type == "textarea" else "Input"
+        attributes = [f'id="{field_id}"']
+        if tag == "Input":
+            attributes.append(f'type="{field_type}"')
+        if field.get("placeholder"):
+            attributes.append(f"placeholder={_jsx_attr(field['placeholder'])}")
+        lines += [f"        <{tag}"]
+        lines += [f"          {attribute}" for attribute in attributes + aria]
+        lines += [f'          {{...register("{field_id}")}}', "        />"]
+    return lines + _error_block(field_id, "        ") + ["      </div>"]
+
+
+def compile_form(schema: Dict[str, Any]) -> str:
+    """
+    Compile a normalized FormSchema into a React Hook Form + Zod component
+
+    Args:
+        schema: Schema as returned by normalize_form_schema or extract_form_schema
+
+    Returns:
+        TSX source of a default-exported form component
+    """
+    name = component_name(schema["title"])
+    fields = schema["fields"]
+    types = {field["type"] for field in fields}
+
+    lines = [
+        'import { useForm } from "react-hook-form";',
+        'import { zodResolver } from "@hookform/resolvers/zod";',
+        'import { z } from "zod";',
+        'import { Button } from "@/components/ui/button";',
+        'import { Label } from "@/components/ui/label";',
+    ]
+    if types & {"text", "email", "number", "password", "tel"}:
+        lines.append('import { Input } from "@/components/ui/input";')
+    if "textarea" in types:
+        lines.append('import { Textarea } from "@/components/ui/textarea";')
+
+    lines += ["", "const formSchema = z.object({"]
+    lines += [f"  {field['id']}: {_zod_rule(field)}," for field in fields]
+    lines += ["});", "", "type FormValues = z.infer<typeof formSchema>;", ""]
+
+    lines += [
+        f"interface {name}Props {{",
+        "  /** Called with the validated values when the form is submitted */",
+        "  onSubmit?: (values: FormValues) => void | Promise<void>;",
+        "}",
+        "",
+        f"export default function {name}({{ onSubmit }}: {name}Props) {{",
+        "  const {",
+        "    register,",
+        "    handleSubmit,",
+        "    formState: { errors, isSubmitting, isSubmitSuccessful },",
+        "  } = useForm<FormValues>({",
+        "    resolver: zodResolver(formSchema),",
+        "    defaultValues: {",
+    ]
+    for field in fields:
+        if field["type"] == "checkbox":
+            lines.append(f"      {field['id']}: false,")
+        elif field["type"] in ("text", "email", "textarea", "password", "tel", "number"):
+            lines.append(f'      {field["id"]}: "",')
+    lines += [
+        "    },",
+        "  });",
+        "",
+        "  const submit = async (values: FormValues) => {",
+        "    await onSubmit?.(values);",
+        "  };",
+        "",
+        "  return (",
+        '    <form onSubmit={handleSubmit(submit)} className="w-full max-w-md space-y-4" noValidate>',
+        f'      <h2 className="text-2xl font-semibold tracking-tight">{_jsx_text(schema["title"])}</h2>',
+    ]
+    if schema.get("description"):
+        lines.append(f'      <p className="text-sm text-muted-foreground">{_jsx_text(schema["description"])}</p>')
+    for field in fields:
+        lines += _field_jsx(field)
+    lines += [
+        '      <Button type="submit" disabled={isSubmitting} className="w-full">',
+        '        {isSubmitting ? "Submitting..." : "Submit"}',
+        "      </Button>",
+        "      {isSubmitSuccessful && (",
+        '        <p role="status" className="text-sm text-muted-foreground">',
+        "          Thanks! Your submission was received.",
+        "        </p>",
+        "      )}",
+        "    </form>",
+        "  );",
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def build_form_component(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Compile a schema into the {code, schema} shape returned by the chat API"""
+    name = component_name(schema["title"])
+    return {
+        "code": compile_form(schema),
+        "schema": {
+            "title": schema["title"],
+            "description": schema.get("description") or f"{schema['title']} with {len(schema['fields'])} fields",
+            "type": "form",
+            "dependencies": list(FORM_DEPENDENCIES),
+            "usage": f"<{name} onSubmit={{(values) => console.log(values)}} />",
+            "fields": schema["fields"],
+        },
+    }
@@ -0,0 +1,208 @@
+"""
+Precomputed gallery of category starter components.
+
+The frontend category selector offers one starter prompt per category, and
+those are the most frequently sent prompts. ComponentGallery generates them
+in a background worker and serves the stored results immediately, using
+stale-while-revalidate: an entry past its TTL, or built with an older prompt
+version, is still served while a refresh runs in the background.
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+GALLERY_TENANT = "gallery"
+
+# Starter prompts by category id; keep in sync with the suggestedPrompt values
+# in frontend/src/data/componentCategories.ts
+STARTER_PROMPTS: Dict[str, str] = {
+    "forms": "Create a contact form with name, email, and message fields with validation",
+    "navigation": "Create a responsive navbar with logo, menu items, and mobile hamburger menu",
+    "data-display": "Create a data table with sorting, filtering, and pagination for user management",
+    "feedback": "Create a confirmation modal with cancel and confirm buttons for deleting items",
+    "layout": "Create a hero section with heading, description, and call-to-action button",
+}
+
+
+@dataclass
+class GalleryEntry:
+    """Latest generated component for a category"""
+    component: Dict[str, Any]
+    prompt_version: Optional[str]
+    generated_at: float
+
+
+class ComponentGallery:
+    """Stale-while-revalidate store of starter components"""
+
+    def __init__(
+        self,
+        service: Any,
+        ttl_seconds: Optional[float] = None,
+        starters: Optional[Dict[str, str]] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            service: AIService used to generate the components
+            ttl_seconds: Age after which an entry is refreshed. Defaults to
+                GALLERY_TTL_SECONDS or one hour
+            starters: Prompts by category id, defaults to STARTER_PROMPTS
+            clock: Time source, replaceable in tests
+        """
+        self.service = service
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("GALLERY_TTL_SECONDS", "3600")
+        )
+        self.starters = starters or STARTER_PROMPTS
+        self.check_interval = min(self.ttl_seconds / 4, 60.0)
+        self._clock = clock
+        self._entries: Dict[str, GalleryEntry] = {}
+        self._errors: Dict[str, str] = {}
+        # Failed categories are not retried before this time, however often
+        # they are requested
+        self._retry_after: Dict[str, float] = {}
+        self._refreshing: Optional[str] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def category_for_prompt(self, prompt: str) -> Optional[str]:
+        """Category whose starter prompt matches the text exactly, if any"""
+        text = prompt.strip()
+        for category, starter in self.starters.items():
+            if starter == text:
+                return category
+        return None
+
+    def start(self) -> None:
+        """Start the background worker, which fills the gallery right away"""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="component-gallery", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _current_prompt_version(self) -> Optional[str]:
+        return self.service.prompt_manager.prompt_version
+
+    def _status(self, entry: Optional[GalleryEntry], prompt_version: Optional[str]) -> str:
+        if entry is None:
+            return "pending"
+        if entry.prompt_version != prompt_version or self._clock() - entry.generated_at >= self.ttl_seconds:
+            return "stale"
+        return "fresh"
+
+    def due(self) -> List[str]:
+        """Categories that are missing, expired or built with an old prompt version"""
+        prompt_version = self._current_prompt_version()
+        now = self._clock()
+        with self._lock:
+            return [
+                category for category in self.starters
+                if self._status(self._entries.get(category), prompt_version) != "fresh"
+                and self._retry_after.get(category, 0.0) <= now
+            ]
+
+    def refresh(self, category: str) -> bool:
+        """
+        Generate the component for a category and store it
+
+        Returns:
+            Whether the refresh succeeded; on failure the old entry is kept
+        """
+        prompt = self.starters[category]
+        with self._lock:
+            self._refreshing = category
+        try:
+            # The response cache holds the entry being replaced; bypassing it
+            # makes a refresh actually regenerate the component
+            component = self.service.generate_component(
+                [{"role": "user", "content": prompt}], tenant=GALLERY_TENANT, use_cache=False
+            )
+        except Exception as e:
+            component, error = None, str(e)
+        else:
+            error = None
+            # Fallback and truncated responses are not worth serving to everyone
+            if not component.get("componentId") or component.get("analysis", {}).get("truncated"):
+                error = "Generation returned an unusable component"
+        finally:
+            with self._lock:
+                self._refreshing = None
+
+        if error is not None:
+            logger.warning("Gallery: refreshing %s failed: %s", category, error)
+            with self._lock:
+                self._errors[category] = error
+                self._retry_after[category] = self._clock() + self.check_interval
+            return False
+
+        with self._lock:
+            self._entries[category] = GalleryEntry(
+                component=component,
+                prompt_version=component.get("promptVersion"),
+                generated_at=self._clock(),
+            )
+            self._errors.pop(category, None)
+            self._retry_after.pop(category, None)
+        logger.info("Gallery: refreshed %s", category)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # One refresh at a time keeps the gallery's upstream use to a trickle
+            for category in self.due():
+                if self._stop.is_set():
+                    return
+                self.refresh(category)
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+
+    def get(self, category: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a category, scheduling a refresh when it is stale or missing
+
+        Returns:
+            Freshness report with the component (None while pending), or None
+            for an unknown category
+        """
+        if category not in self.starters:
+            return None
+
+        self.start()
+        prompt_version = self._current_prompt_version()
+        with self._lock:
+            entry = self._entries.get(category)
+            status = self._status(entry, prompt_version)
+            report = {
+                "category": category,
+                "prompt": self.starters[category],
+                "status": status,
+                "refreshing": self._refreshing == category,
+                "ageSeconds": round(self._clock() - entry.generated_at, 1) if entry else None,
+                "ttlSeconds": self.ttl_seconds,
+                "promptVersion": entry.prompt_version if entry else None,
+                "currentPromptVersion": prompt_version,
+                "lastError": self._errors.get(category),
+                "component": entry.component if entry else None,
+            }
+        if status != "fresh":
+            self._wake.set()
+        return report
+
+    def overview(self) -> List[Dict[str, Any]]:
+        """Freshness of every category, without the components"""
+        reports = [self.get(category) for category in self.starters]
+        return [{key: value for key, value in report.items() if key != "component"} for report in reports]
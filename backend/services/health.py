@@ -0,0 +1,208 @@
+"""
+Upstream health tracking for the AI Component Builder backend.
+
+CircuitBreaker stops sending requests upstream after repeated failures, so a
+worker whose upstream is down fails fast instead of holding requests until
+they time out. UpstreamProbe keeps a recent view of upstream health for the
+readiness endpoint: real traffic reports its outcomes, and a background probe
+only runs when there has been no traffic for a while, at a capped rate, so
+readiness checks never cause upstream calls themselves.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when upstream calls are suspended after repeated failures"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream calls suspended after repeated failures, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    rejected for reset_timeout seconds. Then a single trial call is let through
+    (half-open); its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        """Build from CIRCUIT_FAILURE_THRESHOLD and CIRCUIT_RESET_SECONDS"""
+        return cls(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """
+        Reject early, without claiming the half-open trial call
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            remaining = self._opened_at + self.reset_timeout - self._clock()
+            if self._state == OPEN and remaining > 0:
+                raise CircuitOpenError(remaining)
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open, or a half-open trial call
+                is already running
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - self._clock()
+            if remaining > 0 or self._trial_in_flight:
+                raise CircuitOpenError(max(remaining, 1.0))
+            self._state = HALF_OPEN
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit breaker: upstream recovered, closing circuit")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_ignored(self) -> None:
+        """Record a call whose outcome says nothing about upstream health"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit breaker: opening after %s consecutive failures", self._failures)
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutiveFailures": self._failures,
+                "trialInFlight": self._trial_in_flight,
+                "retryInSeconds": round(max(0.0, self._opened_at + self.reset_timeout - self._clock()), 1)
+                if state == OPEN else None,
+            }
+
+
+class UpstreamProbe:
+    """Most recent upstream health observation, refreshed by a capped background probe"""
+
+    def __init__(self, probe: Callable[[], None], interval: Optional[float] = None):
+        """
+        Args:
+            probe: Callable making a cheap upstream call; raises on failure
+            interval: Minimum seconds between observations before a probe is
+                sent. Defaults to READY_PROBE_INTERVAL or 30
+        """
+        self._probe = probe
+        self.interval = interval if interval is not None else float(os.getenv("READY_PROBE_INTERVAL", "30"))
+        self.probes_sent = 0
+        self._ok: Optional[bool] = None
+        self._error: Optional[str] = None
+        self._latency_ms: Optional[float] = None
+        self._observed_at: Optional[float] = None
+        self._source: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def observe(self, ok: bool, latency: Optional[float] = None, error: Optional[str] = None, source: str = "traffic") -> None:
+        """Record the outcome of an upstream call"""
+        with self._lock:
+            self._ok = ok
+            self._error = error
+            self._latency_ms = round(latency * 1000, 1) if latency is not None else None
+            self._observed_at = time.monotonic()
+            self._source = source
+
+    def is_due(self) -> bool:
+        """Whether no call has been observed within the interval"""
+        with self._lock:
+            return self._observed_at is None or time.monotonic() - self._observed_at >= self.interval
+
+    def run_once(self) -> None:
+        """Send a probe and record its outcome"""
+        self.probes_sent += 1
+        started = time.perf_counter()
+        try:
+            self._probe()
+        except Exception as e:
+            self.observe(False, time.perf_counter() - started, str(e), source="probe")
+        else:
+            self.observe(True, time.perf_counter() - started, source="probe")
+
+    def start(self) -> None:
+        """Start the background probe; idempotent"""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="upstream-probe", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            if self.is_due():
+                self.run_once()
+            if self._stop.wait(self.interval / 2):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ok": self._ok,
+                "error": self._error,
+                "latencyMs": self._latency_ms,
+                "ageSeconds": round(time.monotonic() - self._observed_at, 1) if self._observed_at else None,
+                "source": self._source,
+                "probesSent": self.probes_sent,
+            }
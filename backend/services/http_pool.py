@@ -0,0 +1,208 @@
+"""
+HTTP connection pool for upstream API calls.
+
+The Anthropic SDK otherwise builds its own httpx client with limits sized for
+a thousand connections, no HTTP/2 and a single ten minute timeout, and the
+first request after start-up or an idle period pays for a TCP and TLS
+handshake. HTTPConnectionPool makes those settings explicit and sized to the
+service concurrency, opens connections ahead of traffic, and re-opens them
+after idle periods so keep-alive expiry does not land on a user request.
+"""
+
+import os
+import ssl
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HTTPPoolConfig:
+    """Connection pool limits, timeouts and warming behaviour"""
+    max_connections: int = 4
+    max_keepalive_connections: int = 4
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 600.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    warm_connections: int = 1
+    keep_warm: bool = True
+    ca_bundle: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, concurrency: int) -> "HTTPPoolConfig":
+        """
+        Build a config sized to the upstream concurrency, overridable through
+        HTTP_MAX_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY, HTTP2, HTTP_CONNECT_TIMEOUT,
+        HTTP_READ_TIMEOUT, HTTP_WRITE_TIMEOUT, HTTP_POOL_TIMEOUT,
+        HTTP_WARM_CONNECTIONS, HTTP_KEEP_WARM and HTTP_CA_BUNDLE
+        """
+        max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", str(concurrency)))
+        return cls(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60")),
+            http2=os.getenv("HTTP2", "false").lower() == "true",
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "600")),
+            write_timeout=float(os.getenv("HTTP_WRITE_TIMEOUT", "30")),
+            pool_timeout=float(os.getenv("HTTP_POOL_TIMEOUT", "10")),
+            warm_connections=int(os.getenv("HTTP_WARM_CONNECTIONS", "1")),
+            keep_warm=os.getenv("HTTP_KEEP_WARM", "true").lower() == "true",
+            ca_bundle=os.getenv("HTTP_CA_BUNDLE") or None,
+        )
+
+
+def http2_available() -> bool:
+    """Whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HTTPConnectionPool:
+    """Explicitly configured httpx client with connection pre-warming"""
+
+    def __init__(self, config: HTTPPoolConfig, client: Optional[Any] = None):
+        """
+        Args:
+            config: Pool configuration
+            client: Optional prebuilt httpx.Client; built from config if omitted
+        """
+        self.config = config
+        self.http2 = config.http2 and http2_available()
+        if config.http2 and not self.http2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+
+        self.requests = 0
+        self.warm_ups = 0
+        self.last_warm_up_ms: Optional[float] = None
+        self._last_activity = time.monotonic()
+        self._stop = threading.Event()
+        self._keep_warm_thread: Optional[threading.Thread] = None
+        self.client = client if client is not None else self._build_client()
+
+    def _build_client(self) -> Any:
+        import httpx
+        from anthropic import DefaultHttpxClient
+
+        options: Dict[str, Any] = {}
+        if self.config.ca_bundle:
+            options["verify"] = ssl.create_default_context(cafile=self.config.ca_bundle)
+
+        # DefaultHttpxClient keeps the SDK's TCP keep-alive socket options
+        return DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=self.config.connect_timeout,
+                read=self.config.read_timeout,
+                write=self.config.write_timeout,
+                pool=self.config.pool_timeout,
+            ),
+            http2=self.http2,
+            event_hooks={"request": [self._on_request]},
+            **options,
+        )
+
+    def _on_request(self, _request: Any) -> None:
+        self.requests += 1
+        self._last_activity = time.monotonic()
+
+    def warm_up(self, url: str, connections: Optional[int] = None) -> float:
+        """
+        Open connections to the upstream host ahead of traffic
+
+        Sends concurrent HEAD requests and keeps each response open until all
+        have arrived, so every request establishes its own connection instead
+        of reusing one freed by a faster probe. The responses are ignored.
+
+        Args:
+            url: Upstream base URL
+            connections: Connections to open, defaults to config.warm_connections
+
+        Returns:
+            Seconds spent warming
+        """
+        count = min(connections or self.config.warm_connections, self.config.max_connections)
+        started = time.perf_counter()
+
+        all_open = threading.Barrier(count) if count > 1 else None
+
+        def probe(_index: int) -> None:
+            try:
+                with self.client.stream("HEAD", url) as response:
+                    try:
+                        if all_open is not None:
+                            all_open.wait(timeout=self.config.connect_timeout)
+                    finally:
+                        # Reading to the end returns the connection to the pool
+                        response.read()
+            except threading.BrokenBarrierError:
+                pass
+            except Exception as e:
+                if all_open is not None:
+                    all_open.abort()
+                logger.warning("HTTP pool: warm-up request to %s failed: %s", url, e)
+
+        if count > 1:
+            with ThreadPoolExecutor(max_workers=count, thread_name_prefix="http-warm-up") as executor:
+                list(executor.map(probe, range(count)))
+        elif count == 1:
+            probe(0)
+
+        elapsed = time.perf_counter() - started
+        self.warm_ups += 1
+        self.last_warm_up_ms = round(elapsed * 1000, 1)
+        logger.info("HTTP pool: warmed %s connection(s) in %sms", count, self.last_warm_up_ms)
+        return elapsed
+
+    def start_keep_warm(self, url: str) -> None:
+        """
+        Re-warm connections whenever the pool has been idle long enough for
+        keep-alive expiry to close them
+        """
+        if not self.config.keep_warm or self._keep_warm_thread is not None:
+            return
+        interval = self.config.keepalive_expiry * 0.8
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                if time.monotonic() - self._last_activity >= interval:
+                    self.warm_up(url)
+
+        self._keep_warm_thread = threading.Thread(target=run, name="http-keep-warm", daemon=True)
+        self._keep_warm_thread.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, connection states and counters"""
+        # httpx does not expose its pool publicly; read httpcore's view of it
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "maxConnections": self.config.max_connections,
+            "keepaliveExpiry": self.config.keepalive_expiry,
+            "http2": self.http2,
+            "connections": len(connections),
+            "idleConnections": sum(1 for connection in connections if connection.is_idle()),
+            "requests": self.requests,
+            "warmUps": self.warm_ups,
+            "lastWarmUpMs": self.last_warm_up_ms,
+        }
+
+    def close(self) -> None:
+        """Stop the keep-warm thread and close all connections"""
+        self._stop.set()
+        self.client.close()
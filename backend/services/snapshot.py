@@ -0,0 +1,276 @@
+"""
+Warm-start snapshots of AIService state.
+
+A new worker starts with an empty in-process response cache, no latency
+history and no assembled prompts, so the first minutes after a deploy or a
+scale-out miss on everything. ServiceSnapshotter periodically writes the
+hottest cache entries, the per-tenant latency samples and the keys of the
+memoized system prompts to a compact local file, and a starting worker
+restores them before it serves its first request.
+
+The file is zlib-compressed JSON behind a magic line and a SHA-256 checksum of
+the compressed body; truncated or corrupted files are ignored. Snapshots are
+tagged with the prompt set version: cached responses and prompts from another
+version would never be used again and are skipped on load, while latency
+statistics are kept.
+"""
+
+from __future__ import annotations
+
+import os
+import hmac
+import time
+import zlib
+import atexit
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from utils import json_codec
+
+if TYPE_CHECKING:
+    from services.ai_service import AIService
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"AICB-SNAPSHOT\n"
+SNAPSHOT_FORMAT = 1
+DEFAULT_INTERVAL_SECONDS = 300.0
+# Cache entries per snapshot, most recently used first
+DEFAULT_MAX_ENTRIES = 200
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is corrupted or of an unknown format"""
+
+
+def encode_snapshot(state: Dict[str, Any]) -> bytes:
+    """Serialize snapshot state: magic line, checksum line, compressed JSON"""
+    body = zlib.compress(json_codec.dumps_bytes(state), 6)
+    return SNAPSHOT_MAGIC + hashlib.sha256(body).hexdigest().encode("ascii") + b"\n" + body
+
+
+def decode_snapshot(data: bytes) -> Dict[str, Any]:
+    """
+    Verify and deserialize a snapshot written by encode_snapshot
+
+    Raises:
+        SnapshotError: If the data is not an intact snapshot of this format
+    """
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise SnapshotError("Not a snapshot file")
+    header_end = data.find(b"\n", len(SNAPSHOT_MAGIC))
+    if header_end == -1:
+        raise SnapshotError("Snapshot is truncated")
+    checksum = data[len(SNAPSHOT_MAGIC):header_end]
+    body = data[header_end + 1:]
+    if not hmac.compare_digest(hashlib.sha256(body).hexdigest().encode("ascii"), checksum):
+        raise SnapshotError("Snapshot checksum does not match")
+    try:
+        state = json_codec.loads(zlib.decompress(body))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError(f"Snapshot cannot be decoded: {e}") from e
+    if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError("Unknown snapshot format")
+    return state
+
+
+class ServiceSnapshotter:
+    """Periodically snapshots an AIService to a local file and restores it at startup"""
+
+    def __init__(
+        self,
+        service: AIService,
+        path: str,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """
+        Args:
+            service: Service whose state is snapshotted
+            path: Snapshot file; written atomically, so every worker on a host
+                can share one
+            interval: Seconds between periodic snapshots
+            max_entries: Most cache entries kept in a snapshot
+        """
+        self.service = service
+        self.path = path
+        self.interval = interval
+        self.max_entries = max_entries
+        self.last_save: Optional[Dict[str, Any]] = None
+        self.last_load: Optional[Dict[str, Any]] = None
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, service: AIService) -> Optional["ServiceSnapshotter"]:
+        """
+        Build from SNAPSHOT_PATH, SNAPSHOT_INTERVAL_SECONDS and SNAPSHOT_MAX_ENTRIES
+
+        Returns:
+            Configured snapshotter, or None when SNAPSHOT_PATH is not set
+        """
+        path = os.getenv("SNAPSHOT_PATH")
+        if not path:
+            return None
+        return cls(
+            service,
+            path,
+            interval=float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", str(DEFAULT_INTERVAL_SECONDS))),
+            max_entries=int(os.getenv("SNAPSHOT_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+        )
+
+    def capture(self) -> Dict[str, Any]:
+        """Current service state in snapshot form"""
+        service = self.service
+        cache = service.cache
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "promptVersion": service.prompt_manager.prompt_version,
+            "createdAt": time.time(),
+            "cache": [[key, value] for key, value in cache.hot_entries(self.max_entries)] if cache is not None else [],
+            "latencies": service.tenants.latency_samples(),
+            "prompts": [
+                [type_name, list(fields), list(sub_intents)]
+                for type_name, fields, sub_intents in service.prompt_manager.assembled_prompt_keys()
+            ],
+        }
+
+    def save(self) -> Optional[Dict[str, Any]]:
+        """
+        Write a snapshot, replacing the previous file atomically
+
+        A worker with nothing cached and no statistics does not overwrite a
+        snapshot written by a busier one.
+
+        Returns:
+            Summary of the written snapshot, or None if there was nothing to save
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        state = self.capture()
+        if not state["cache"] and not state["latencies"]:
+            return None
+        data = encode_snapshot(state)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._write_lock:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+            try:
+                with os.fdopen(fd, "wb") as snapshot_file:
+                    snapshot_file.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+        self.last_save = {
+            "path": self.path,
+            "bytes": len(data),
+            "cacheEntries": len(state["cache"]),
+            "prompts": len(state["prompts"]),
+            "promptVersion": state["promptVersion"],
+            "savedAt": state["createdAt"],
+        }
+        logger.info("Snapshot: wrote %s cache entries (%s bytes) to %s", len(state["cache"]), len(data), self.path)
+        return self.last_save
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Restore the snapshot file, if there is an intact one
+
+        Returns:
+            Summary with "restored" telling whether anything was loaded
+        """
+        try:
+            with open(self.path, "rb") as snapshot_file:
+                data = snapshot_file.read()
+        except FileNotFoundError:
+            summary = {"restored": False, "reason": "No snapshot found"}
+        except OSError as e:
+            summary = {"restored": False, "reason": f"Snapshot cannot be read: {e}"}
+        else:
+            try:
+                summary = self.restore(decode_snapshot(data))
+            except SnapshotError as e:
+                logger.warning("Snapshot: ignoring %s: %s", self.path, e)
+                summary = {"restored": False, "reason": str(e)}
+        self.last_load = summary
+        return summary
+
+    def restore(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply decoded snapshot state to the service
+
+        Raises:
+            SnapshotError: If the state does not have the expected shape
+        """
+        service = self.service
+        prompt_version = service.prompt_manager.prompt_version
+        version_matches = state.get("promptVersion") == prompt_version
+        cache_entries = prompts = 0
+        try:
+            if version_matches:
+                if service.cache is not None:
+                    cache_entries = service.cache.preload((key, value) for key, value in state.get("cache", []))
+                prompts = service.prompt_manager.prebuild(state.get("prompts", []))
+            else:
+                logger.info(
+                    "Snapshot: prompt version %s differs from %s, cached responses skipped",
+                    state.get("promptVersion"), prompt_version
+                )
+            service.tenants.preload_latencies(state.get("latencies", {}))
+        except (TypeError, ValueError, AttributeError) as e:
+            raise SnapshotError(f"Snapshot content is malformed: {e}") from e
+
+        summary = {
+            "restored": True,
+            "promptVersionMatched": version_matches,
+            "cacheEntries": cache_entries,
+            "prompts": prompts,
+            "ageSeconds": round(time.time() - float(state.get("createdAt", time.time())), 1),
+        }
+        logger.info(
+            "Snapshot: restored %s cache entries and %s prompts from a %ss old snapshot",
+            cache_entries, prompts, summary["ageSeconds"]
+        )
+        return summary
+
+    def start(self) -> None:
+        """Snapshot every interval and at interpreter exit; idempotent"""
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="service-snapshot", daemon=True)
+        self._worker.start()
+        atexit.register(self._save_quietly)
+
+    def stop(self) -> None:
+        self._stop.set()
+        atexit.unregister(self._save_quietly)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._save_quietly()
+
+    def _save_quietly(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            logger.error("Snapshot: could not write %s: %s", self.path, e)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "intervalSeconds": self.interval,
+            "maxEntries": self.max_entries,
+            "lastSave": self.last_save,
+            "lastLoad": self.last_load,
+        }
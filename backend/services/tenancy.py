@@ -0,0 +1,410 @@
+"""
+Multi-tenant scheduling and accounting for upstream AI calls.
+
+All callers share one upstream rate limit. FairScheduler hands out the
+available upstream slots with weighted fair queueing, so a tenant that queues
+many requests only delays its own work. TenantAccounting enforces rolling
+per-tenant request and token budgets from the usage reported by each response,
+and keeps per-tenant latency and usage statistics.
+"""
+
+import os
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "anonymous"
+LATENCY_SAMPLES = 512
+# Accounting state of a tenant without activity for this long is dropped
+DEFAULT_IDLE_SECONDS = 3600.0
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a request waits longer than allowed for an upstream slot"""
+
+
+class BudgetExceededError(Exception):
+    """Raised when a tenant has used up its rolling budget"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TenantResolver:
+    """
+    Identify the tenant of a request from credentials it can be trusted for
+
+    Budgets and fair scheduling are per tenant, so the tenant must not be
+    whatever a client claims: anyone could rotate ids to escape a budget or
+    send another tenant's id to use up theirs. Only configured API keys and,
+    behind a gateway that authenticates requests and sets it, allow-listed
+    X-Tenant-ID values name a tenant; every other request is DEFAULT_TENANT.
+    """
+
+    def __init__(
+        self,
+        api_keys: Optional[Mapping[str, str]] = None,
+        header_tenants: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            api_keys: Tenant by API key (sent as X-API-Key or a bearer token)
+            header_tenants: X-Tenant-ID values that are accepted as they are
+        """
+        # Only digests are kept, so keys never appear in memory dumps or logs
+        self._key_tenants = {_key_digest(key): tenant for key, tenant in (api_keys or {}).items()}
+        self.header_tenants = frozenset(header_tenants or ())
+
+    @classmethod
+    def from_env(cls) -> "TenantResolver":
+        """Build from TENANT_API_KEYS ("tenant=key,...") and TENANT_HEADER_IDS ("tenant,...")"""
+        api_keys = {}
+        for item in os.getenv("TENANT_API_KEYS", "").split(","):
+            if "=" in item:
+                tenant, key = item.split("=", 1)
+                api_keys[key.strip()] = tenant.strip()
+        header_tenants = [tenant.strip() for tenant in os.getenv("TENANT_HEADER_IDS", "").split(",") if tenant.strip()]
+        return cls(api_keys, header_tenants)
+
+    def resolve(self, headers: Mapping[str, str]) -> str:
+        """Tenant of a request with these headers"""
+        api_key = headers.get("X-API-Key", "").strip()
+        authorization = headers.get("Authorization", "")
+        if not api_key and authorization.lower().startswith("bearer "):
+            api_key = authorization[7:].strip()
+        if api_key:
+            tenant = self._key_tenants.get(_key_digest(api_key))
+            if tenant is not None:
+                return tenant
+
+        tenant = headers.get("X-Tenant-ID", "").strip()
+        if tenant in self.header_tenants:
+            return tenant
+
+        return DEFAULT_TENANT
+
+
+def _key_digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def parse_weights(value: Optional[str]) -> Dict[str, float]:
+    """Parse "tenant=weight,..." into a weight mapping"""
+    weights = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            tenant, weight = item.split("=", 1)
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+@dataclass(order=True)
+class _Ticket:
+    finish_tag: float
+    sequence: int
+    tenant: str = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing in front of a fixed number of upstream slots
+
+    Each request gets a virtual finish tag of max(virtual time, the tenant's
+    previous tag) + cost / weight, and free slots go to the smallest tag. A
+    tenant with a deep queue accumulates ever larger tags, so another
+    tenant's request is served next as soon as a slot frees up.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0
+    ):
+        self.capacity = capacity
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self._condition = threading.Condition()
+        self._available = capacity
+        self._waiting: List[_Ticket] = []
+        self._waiting_count = 0
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._sequence = 0
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    @contextmanager
+    def slot(self, tenant: str, timeout: Optional[float] = None, cost: float = 1.0) -> Iterator[None]:
+        """
+        Hold an upstream slot for the duration of the block
+
+        Args:
+            tenant: Tenant the request belongs to
+            timeout: Maximum seconds to wait for a slot
+            cost: Relative cost of the request
+
+        Raises:
+            SchedulerTimeout: If no slot was granted within timeout
+        """
+        self.acquire(tenant, timeout, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, tenant: str, timeout: Optional[float] = None, cost: float = 1.0) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            start_tag = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+            finish_tag = start_tag + cost / self.weight(tenant)
+            self._last_finish[tenant] = finish_tag
+            self._sequence += 1
+            ticket = _Ticket(finish_tag, self._sequence, tenant)
+            heapq.heappush(self._waiting, ticket)
+            self._waiting_count += 1
+            self._dispatch()
+
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    ticket.cancelled = True
+                    self._waiting_count -= 1
+                    raise SchedulerTimeout(f"No upstream slot available for tenant {tenant} within {timeout:.2f}s")
+                self._condition.wait(remaining)
+
+    def release(self) -> None:
+        with self._condition:
+            self._available += 1
+            self._dispatch()
+            if self._waiting_count == 0:
+                self._forget_finished()
+
+    def _forget_finished(self) -> None:
+        """Drop finish tags that no longer affect scheduling"""
+        if self._available == self.capacity and self._last_finish:
+            # Idle: no tenant is owed service any more, so every tenant starts
+            # level at the latest finish tag
+            self._virtual_time = max(self._virtual_time, max(self._last_finish.values()))
+            self._last_finish = {}
+        else:
+            # Tags at or below the virtual time are the same as no tag
+            self._last_finish = {
+                tenant: tag for tenant, tag in self._last_finish.items() if tag > self._virtual_time
+            }
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the waiting tickets with the smallest tags"""
+        granted = False
+        while self._available > 0 and self._waiting:
+            ticket = heapq.heappop(self._waiting)
+            if ticket.cancelled:
+                continue
+            ticket.granted = True
+            self._waiting_count -= 1
+            self._available -= 1
+            self._virtual_time = max(self._virtual_time, ticket.finish_tag - 1.0 / self.weight(ticket.tenant))
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot"""
+        return self._waiting_count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            waiting: Dict[str, int] = {}
+            for ticket in self._waiting:
+                if not ticket.cancelled:
+                    waiting[ticket.tenant] = waiting.get(ticket.tenant, 0) + 1
+            return {
+                "capacity": self.capacity,
+                "inFlight": self.capacity - self._available,
+                "queueDepth": self._waiting_count,
+                "waitingByTenant": waiting,
+            }
+
+
+@dataclass
+class _TenantState:
+    window: Deque[Tuple[float, int]] = field(default_factory=deque)
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+    requests: int = 0
+    rejected: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class TenantAccounting:
+    """Rolling per-tenant budgets plus latency and usage statistics"""
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        max_requests: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS
+    ):
+        """
+        Args:
+            window_seconds: Length of the rolling budget window
+            max_requests: Upstream requests allowed per tenant per window;
+                None or 0 means no limit
+            max_tokens: Input plus output tokens allowed per tenant per window;
+                None or 0 means no limit
+            idle_seconds: Inactivity after which a tenant's state is dropped
+
+        Raises:
+            ValueError: If a budget is negative
+        """
+        for name, budget in (("max_requests", max_requests), ("max_tokens", max_tokens)):
+            if budget is not None and budget < 0:
+                raise ValueError(f"{name} must not be negative")
+        self.window_seconds = window_seconds
+        self.max_requests = max_requests or None
+        self.max_tokens = max_tokens or None
+        self.idle_seconds = max(idle_seconds, window_seconds)
+        self._tenants: Dict[str, _TenantState] = {}
+        self._next_sweep = time.monotonic() + self.idle_seconds
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TenantAccounting":
+        """
+        Build from TENANT_BUDGET_WINDOW_SECONDS, TENANT_REQUEST_BUDGET,
+        TENANT_TOKEN_BUDGET and TENANT_IDLE_SECONDS
+        """
+        max_requests = os.getenv("TENANT_REQUEST_BUDGET")
+        max_tokens = os.getenv("TENANT_TOKEN_BUDGET")
+        return cls(
+            window_seconds=float(os.getenv("TENANT_BUDGET_WINDOW_SECONDS", "60")),
+            max_requests=int(max_requests) if max_requests else None,
+            max_tokens=int(max_tokens) if max_tokens else None,
+            idle_seconds=float(os.getenv("TENANT_IDLE_SECONDS", str(DEFAULT_IDLE_SECONDS))),
+        )
+
+    def _state(self, tenant: str) -> _TenantState:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._evict_idle(now)
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants.setdefault(tenant, _TenantState())
+        state.last_seen = now
+        return state
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop tenants idle for idle_seconds; their budget windows are empty by then"""
+        self._tenants = {
+            tenant: state for tenant, state in self._tenants.items()
+            if now - state.last_seen < self.idle_seconds
+        }
+        self._next_sweep = now + self.idle_seconds
+
+    def _trim(self, state: _TenantState, now: float) -> None:
+        while state.window and state.window[0][0] <= now - self.window_seconds:
+            state.window.popleft()
+
+    def check(self, tenant: str) -> None:
+        """
+        Verify the tenant still has budget in the current window
+
+        Raises:
+            BudgetExceededError: If the request or token budget is used up
+        """
+        if self.max_requests is None and self.max_tokens is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(tenant)
+            self._trim(state, now)
+            used_requests = len(state.window)
+            used_tokens = sum(tokens for _, tokens in state.window)
+            exceeded = (
+                (self.max_requests is not None and used_requests >= self.max_requests)
+                or (self.max_tokens is not None and used_tokens >= self.max_tokens)
+            )
+            if not exceeded:
+                return
+            state.rejected += 1
+            retry_after = state.window[0][0] + self.window_seconds - now if state.window else self.window_seconds
+
+        raise BudgetExceededError(
+            f"Tenant budget exceeded ({used_requests} requests, {used_tokens} tokens "
+            f"in the last {self.window_seconds:.0f}s)",
+            retry_after=max(retry_after, 0.0),
+        )
+
+    def record_usage(self, tenant: str, input_tokens: int, output_tokens: int) -> None:
+        """Record the usage reported by an upstream response"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(tenant)
+            state.window.append((now, input_tokens + output_tokens))
+            state.input_tokens += input_tokens
+            state.output_tokens += output_tokens
+            self._trim(state, now)
+
+    def record_latency(self, tenant: str, seconds: float) -> None:
+        """Record the end-to-end latency of a request"""
+        with self._lock:
+            state = self._state(tenant)
+            state.requests += 1
+            state.latencies.append(seconds)
+
+    def latency_samples(self) -> Dict[str, List[float]]:
+        """Recent request latencies per tenant, oldest first"""
+        with self._lock:
+            return {tenant: list(state.latencies) for tenant, state in self._tenants.items() if state.latencies}
+
+    def preload_latencies(self, samples: Dict[str, List[float]]) -> None:
+        """Seed latency statistics from a snapshot; requests are not counted"""
+        with self._lock:
+            for tenant, latencies in samples.items():
+                state = self._state(tenant)
+                restored = [float(value) for value in latencies[-LATENCY_SAMPLES:]]
+                # Keep samples recorded since startup as the most recent ones
+                state.latencies = deque(restored + list(state.latencies), maxlen=LATENCY_SAMPLES)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tenant latency percentiles, usage and budget state"""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for tenant, state in self._tenants.items():
+                self._trim(state, now)
+                latencies = sorted(state.latencies)
+                result[tenant] = {
+                    "requests": state.requests,
+                    "rejected": state.rejected,
+                    "inputTokens": state.input_tokens,
+                    "outputTokens": state.output_tokens,
+                    "windowRequests": len(state.window),
+                    "windowTokens": sum(tokens for _, tokens in state.window),
+                    "p50Ms": _percentile_ms(latencies, 0.50),
+                    "p95Ms": _percentile_ms(latencies, 0.95),
+                }
+        return result
+
+
+def _percentile_ms(sorted_values: List[float], quantile: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(quantile * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 1)
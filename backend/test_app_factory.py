@@ -0,0 +1,118 @@
+"""
+Tests for the application factory, lazy services and import-time cost.
+"""
+
+import os
+import sys
+import subprocess
+from unittest.mock import Mock, patch
+
+import pytest
+
+import app as app_module
+from app import create_app
+from utils.lazy import LazyService
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _import_seconds(statement, runs=3):
+    """Best-of-n wall time for running an import in a fresh interpreter."""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed, 'anthropic' in sys.modules)\n"
+    )
+    env = dict(os.environ, COMPONENT_CACHE_BACKEND="none")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        results.append((float(output[0]), output[1] == "True"))
+    return min(results)
+
+
+class TestCreateApp:
+    """Test cases for create_app."""
+
+    def test_config_overrides_defaults(self):
+        app = create_app({"TESTING": True, "WARM_UP": False, "CUSTOM": 1})
+        assert app.config["TESTING"] is True
+        assert app.config["CUSTOM"] == 1
+
+    def test_registers_routes(self):
+        client = create_app({"TESTING": True}).test_client()
+        assert client.get("/health").status_code == 200
+
+    def test_apps_are_independent(self):
+        first = create_app({"TESTING": True})
+        second = create_app()
+        assert first is not second
+        assert second.config.get("TESTING") is False
+
+    # Explicit mocks: patch.object probes the original for __func__, which
+    # would build the real lazy services (and start the real gallery thread)
+    def test_warm_up_builds_services(self):
+        with patch.object(app_module, "ai_service", Mock()) as service, patch.object(app_module, "gallery", Mock()) as gallery:
+            create_app({"WARM_UP": True, "GALLERY_ENABLED": True})
+        service.get.assert_called_once()
+        gallery.start.assert_called_once()
+
+    def test_warm_up_without_gallery(self):
+        with patch.object(app_module, "ai_service", Mock()) as service, patch.object(app_module, "gallery", Mock()) as gallery:
+            create_app({"WARM_UP": True, "GALLERY_ENABLED": False})
+        service.get.assert_called_once()
+        gallery.start.assert_not_called()
+
+    def test_no_warm_up_by_default(self):
+        with patch.object(app_module, "ai_service", Mock()) as service, patch.object(app_module, "gallery", Mock()) as gallery:
+            create_app({"WARM_UP": False})
+        service.get.assert_not_called()
+        gallery.start.assert_not_called()
+
+
+class TestLazyService:
+    """Test cases for LazyService."""
+
+    def test_builds_on_first_use_only(self):
+        factory = Mock(return_value=Mock(value=42))
+        service = LazyService(factory, name="test")
+
+        assert not service.initialized
+        factory.assert_not_called()
+        assert service.value == 42
+        assert service.value == 42
+        factory.assert_called_once()
+        assert service.initialized
+
+    def test_reset_rebuilds(self):
+        factory = Mock(side_effect=[Mock(value=1), Mock(value=2)])
+        service = LazyService(factory)
+
+        assert service.value == 1
+        service.reset()
+        assert service.value == 2
+
+
+@pytest.mark.slow
+class TestImportTime:
+    """Import-time benchmark for cold start and worker spin-up."""
+
+    def test_importing_app_does_not_load_sdk(self):
+        seconds, sdk_loaded = _import_seconds("import app")
+        print(f"\nimport app: {seconds * 1000:.0f}ms")
+        assert not sdk_loaded
+
+    def test_importing_app_is_cheaper_than_sdk(self):
+        app_seconds, _ = _import_seconds("import app")
+        sdk_seconds, _ = _import_seconds("import anthropic")
+        print(f"\nimport app: {app_seconds * 1000:.0f}ms, import anthropic: {sdk_seconds * 1000:.0f}ms")
+        assert app_seconds < sdk_seconds
@@ -0,0 +1,144 @@
+"""
+Tests for the response cache backends and their use in AIService.
+"""
+
+import gc
+import os
+from multiprocessing import Pool
+
+import pytest
+
+from utils.cache import MemoryCache, SQLiteCache, build_cache_from_env, make_cache_key
+
+
+def _write_from_process(args):
+    path, index = args
+    SQLiteCache(path).set(f"key-{index}", {"code": f"code {index}"})
+    return index
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+class TestMemoryCache:
+    """Test cases for the in-process LRU cache."""
+
+    def test_get_and_set(self):
+        cache = MemoryCache()
+        assert cache.get("a") is None
+        cache.set("a", {"code": "x"})
+        assert cache.get("a") == {"code": "x"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert len(cache) == 2
+
+    def test_returned_values_are_isolated(self):
+        cache = MemoryCache()
+        cache.set("a", {"schema": {"title": "T"}})
+        cache.get("a")["schema"]["title"] = "changed"
+        assert cache.get("a")["schema"]["title"] == "T"
+
+
+class TestSQLiteCache:
+    """Test cases for the shared SQLite cache."""
+
+    def test_uses_wal_mode(self, sqlite_path):
+        cache = SQLiteCache(sqlite_path)
+        mode = cache._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_entries_visible_across_instances(self, sqlite_path):
+        SQLiteCache(sqlite_path).set("a", {"code": "x"})
+        assert SQLiteCache(sqlite_path).get("a") == {"code": "x"}
+
+    def test_evicts_by_entry_count(self, sqlite_path):
+        cache = SQLiteCache(sqlite_path, max_entries=3)
+        for index in range(5):
+            cache.set(f"k{index}", {"v": index})
+        assert len(cache) == 3
+        assert cache.get("k0") is None
+        assert cache.get("k4") == {"v": 4}
+
+    def test_evicts_by_total_size(self, sqlite_path):
+        cache = SQLiteCache(sqlite_path, max_bytes=250)
+        for index in range(5):
+            cache.set(f"k{index}", {"code": "x" * 100})
+        assert len(cache) == 2
+
+    def test_skips_entries_larger_than_limit(self, sqlite_path):
+        cache = SQLiteCache(sqlite_path, max_bytes=10)
+        cache.set("big", {"code": "x" * 100})
+        assert len(cache) == 0
+
+    def test_shared_between_processes(self, sqlite_path):
+        SQLiteCache(sqlite_path)
+        # Connections of unreferenced caches close when they are collected; one
+        # still open when the pool forks breaks SQLite locking in the workers
+        gc.collect()
+        with Pool(3) as pool:
+            pool.map(_write_from_process, [(sqlite_path, i) for i in range(6)])
+
+        cache = SQLiteCache(sqlite_path)
+        assert len(cache) == 6
+        assert cache.get("key-5") == {"code": "code 5"}
+
+
+class TestCacheConfiguration:
+    """Test cases for cache key and backend selection."""
+
+    def test_cache_key_depends_on_request(self):
+        messages = [{"role": "user", "content": "form"}]
+        key = make_cache_key("m", "system", messages, 0.1, 100)
+        assert key == make_cache_key("m", "system", list(messages), 0.1, 100)
+        assert key != make_cache_key("m", "system", messages, 0.5, 100)
+        assert key != make_cache_key("m", "other", messages, 0.1, 100)
+
+    def test_backend_selection(self, monkeypatch, sqlite_path):
+        monkeypatch.setenv("COMPONENT_CACHE_BACKEND", "none")
+        assert build_cache_from_env() is None
+
+        monkeypatch.setenv("COMPONENT_CACHE_BACKEND", "sqlite")
+        monkeypatch.setenv("COMPONENT_CACHE_PATH", sqlite_path)
+        assert isinstance(build_cache_from_env(), SQLiteCache)
+        assert os.path.exists(sqlite_path)
+
+        monkeypatch.delenv("COMPONENT_CACHE_BACKEND")
+        assert isinstance(build_cache_from_env(), MemoryCache)
+
+
+class TestAIServiceCaching:
+    """Test cases for caching in AIService.generate_component."""
+
+    def test_repeated_request_served_from_cache(self, fake_ai_service):
+        messages = [{"role": "user", "content": "Create a button"}]
+
+        first = fake_ai_service.generate_component(messages)
+        second = fake_ai_service.generate_component(messages)
+
+        assert first == second
+        assert fake_ai_service.client.messages.create.call_count == 1
+
+    def test_shared_cache_serves_other_service(self, fake_ai_service, sqlite_path):
+        from services.ai_service import AIService
+
+        messages = [{"role": "user", "content": "Create a button"}]
+        fake_ai_service.cache = SQLiteCache(sqlite_path)
+        fake_ai_service.generate_component(messages)
+
+        other = AIService(api_key=None, cache=SQLiteCache(sqlite_path))
+        other.client = fake_ai_service.client
+        other.generate_component(messages)
+
+        assert fake_ai_service.client.messages.create.call_count == 1
@@ -270,7 +270,8 @@ class TestChatEndpoint:
             200,
             400,
             500,
-        ]  # Any valid HTTP response
+            503,
+        ]  # Any valid HTTP response (503 once upstream failures open the circuit)
 
     def test_request_timeout_handling(self, client, sample_chat_messages):
         """Test handling of request timeouts."""
@@ -0,0 +1,198 @@
+"""
+Tests for post-generation static analysis of component code.
+"""
+
+import os
+import signal
+import time
+
+import pytest
+
+from conftest import make_claude_response
+from utils.code_analysis import (
+    CodeAnalyzer,
+    analyze_imports,
+    analyze_structure,
+    extract_imports,
+    package_name,
+)
+
+COMPONENT = """import React, { useState } from 'react';
+import { Button } from '@/components/ui/button';
+import { zodResolver } from '@hookform/resolvers/zod';
+import type { FC } from "react";
+
+interface Props { items: Array<string>; counts: Record<string, number> }
+
+export default function List({ items }: Props) {
+  const [open, setOpen] = useState<boolean>(false);
+  const many = items.length > 3 && items.length < 10;
+  // comment with an unmatched ( bracket
+  return (
+    <div className="p-4">
+      <p>Don't have an account? {open ? <span>yes</span> : null}</p>
+      <input onChange={(e) => setOpen(e.target.value > 'a')} />
+      <>
+        {items.map((item) => <li key={item}>{item}</li>)}
+      </>
+      <Button disabled={many}>Go</Button>
+    </div>
+  );
+}
+"""
+
+
+class TestImports:
+    """Test cases for import extraction and dependency reconciliation."""
+
+    @pytest.mark.parametrize("specifier,expected", [
+        ("react", "react"),
+        ("react-dom/client", "react-dom"),
+        ("@hookform/resolvers/zod", "@hookform/resolvers"),
+        ("@/components/ui/button", None),
+        ("./utils", None),
+    ])
+    def test_package_name(self, specifier, expected):
+        assert package_name(specifier) == expected
+
+    def test_extract_imports(self):
+        assert extract_imports(COMPONENT) == ["@hookform/resolvers", "react"]
+
+    def test_reconcile_dependencies(self):
+        result = analyze_imports(COMPONENT, ["react", "lucide-react"])
+        assert result["undeclaredDependencies"] == ["@hookform/resolvers"]
+        assert result["unusedDependencies"] == ["lucide-react"]
+
+
+class TestStructure:
+    """Test cases for bracket, JSX and risky pattern checks."""
+
+    def test_valid_component_has_no_issues(self):
+        assert analyze_structure(COMPONENT) == []
+
+    def test_truncated_component(self):
+        issues = analyze_structure(COMPONENT[:-80])
+        assert {issue["type"] for issue in issues} == {"unbalanced_brackets", "unbalanced_jsx"}
+
+    def test_mismatched_closing_tag(self):
+        issues = analyze_structure(COMPONENT.replace("</span>", "</b>"))
+        assert issues[0]["type"] == "unbalanced_jsx"
+        assert "</b>" in issues[0]["message"]
+
+    @pytest.mark.parametrize("snippet", [
+        "const clean = (v) => v.replace(/[<>]/g, '');",
+        "const parts = text.split(/[\"']/g);",
+        "const paren = /[(]/;",
+        "const identity = <T,>(x: T) => x;",
+        "const keep = <T extends object>(v: T): T => v;",
+        "const ratio = total / count / 2;",
+        'return <input pattern={String(/[<>]/)} placeholder="a/b" />;',
+    ])
+    def test_regex_literals_and_generics_are_balanced(self, snippet):
+        assert analyze_structure(snippet) == []
+
+    def test_unexpected_bracket(self):
+        issues = analyze_structure("const a = [1, 2);")
+        assert issues[0]["type"] == "unbalanced_brackets"
+
+    @pytest.mark.parametrize("snippet", [
+        "<div dangerouslySetInnerHTML={{ __html: html }} />",
+        "eval(input)",
+        "el.innerHTML = value",
+        "<a href='javascript:void(0)'>x</a>",
+    ])
+    def test_risky_patterns(self, snippet):
+        issues = analyze_structure(snippet)
+        assert [issue["type"] for issue in issues] == ["risky_pattern"]
+
+
+class TestCodeAnalyzer:
+    """Test cases for CodeAnalyzer."""
+
+    def test_inline_analysis(self):
+        analysis = CodeAnalyzer(max_workers=0).analyze(COMPONENT, ["react"])
+        assert analysis["truncated"] is False
+        assert analysis["issues"] == []
+        assert analysis["timedOut"] is False
+
+    def test_stop_reason_marks_truncation(self):
+        analysis = CodeAnalyzer(max_workers=0).analyze(COMPONENT, [], stop_reason="max_tokens")
+        assert analysis["truncated"] is True
+        assert analysis["issues"][0]["type"] == "truncated"
+
+    @pytest.mark.slow
+    def test_process_pool_analysis(self):
+        analyzer = CodeAnalyzer(max_workers=1, time_budget=5)
+        try:
+            analyzer.warm_up()
+            analysis = analyzer.analyze(COMPONENT[:-80], [])
+        finally:
+            analyzer.shutdown()
+        assert analysis["truncated"] is True
+        assert analysis["timedOut"] is False
+
+    @pytest.mark.slow
+    def test_time_budget_skips_structural_checks(self):
+        analyzer = CodeAnalyzer(max_workers=1, time_budget=0.001)
+        try:
+            analyzer.warm_up()
+            started = time.perf_counter()
+            analysis = analyzer.analyze(COMPONENT * 2000, [])
+            elapsed = time.perf_counter() - started
+        finally:
+            analyzer.shutdown()
+        assert analysis["timedOut"] is True
+        assert elapsed < 1
+
+    @pytest.mark.slow
+    def test_dead_worker_restarts_pool(self):
+        analyzer = CodeAnalyzer(max_workers=1, time_budget=5)
+        try:
+            analyzer.warm_up()
+            broken = analyzer._executor
+            for pid in list(broken._processes):
+                os.kill(pid, signal.SIGKILL)
+            time.sleep(0.5)
+
+            first = analyzer.analyze(COMPONENT[:-80], [])
+            second = analyzer.analyze(COMPONENT[:-80], [])
+            restarted = analyzer._executor
+        finally:
+            analyzer.shutdown()
+        assert first["truncated"] is True and second["truncated"] is True
+        assert restarted is not None and restarted is not broken
+
+
+class TestAIServicePostProcessing:
+    """Test cases for analysis in AIService responses."""
+
+    def _payload(self, code, dependencies):
+        return {
+            "componentCode": code,
+            "componentType": "general",
+            "dependencies": dependencies,
+            "description": "List",
+            "usage": "<List />",
+        }
+
+    def test_response_includes_analysis_and_dependencies(self, fake_ai_service):
+        fake_ai_service.client.messages.create.return_value = make_claude_response(
+            self._payload(COMPONENT, ["react"])
+        )
+
+        response = fake_ai_service.generate_component([{"role": "user", "content": "list"}])
+
+        assert response["analysis"]["truncated"] is False
+        assert response["schema"]["dependencies"] == ["react", "@hookform/resolvers"]
+
+    def test_truncated_output_is_not_cached(self, fake_ai_service):
+        fake_ai_service.client.messages.create.return_value = make_claude_response(
+            self._payload(COMPONENT[:-80], ["react"]), stop_reason="max_tokens"
+        )
+        messages = [{"role": "user", "content": "list"}]
+
+        first = fake_ai_service.generate_component(messages)
+        fake_ai_service.generate_component(messages)
+
+        assert first["analysis"]["truncated"] is True
+        assert fake_ai_service.client.messages.create.call_count == 2
@@ -0,0 +1,201 @@
+"""
+Tests for the persistent component history store and search endpoints.
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from models.component_history import ComponentHistoryStore, build_fts_query, component_id_for
+from services.tenancy import DEFAULT_TENANT, TenantResolver
+from utils.lazy import LazyService
+
+# The tenant of requests without credentials, as resolved by the endpoints
+TENANT = DEFAULT_TENANT
+
+
+def _response(code, description, component_type="form"):
+    return {
+        "code": code,
+        "schema": {"title": "T", "description": description, "type": component_type},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    history = ComponentHistoryStore(str(tmp_path / "history.sqlite3"))
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def populated_store(store):
+    store.record(TENANT, "Create a contact form with email", _response("<form>email</form>", "Contact form"))
+    store.record(TENANT, "Create a login form", _response("<form>password</form>", "Login form with password"))
+    store.record(TENANT, "Create a responsive navbar", _response("<nav />", "Navigation bar", "navigation"))
+    store.flush()
+    return store
+
+
+@pytest.fixture
+def history_client(client, populated_store, monkeypatch):
+    """Test client whose app uses the populated store."""
+    monkeypatch.setitem(
+        client.application.extensions, "component_history", LazyService(lambda: populated_store)
+    )
+    return client
+
+
+class TestComponentHistoryStore:
+    """Test cases for ComponentHistoryStore."""
+
+    def test_record_is_asynchronous_and_returns_id(self, store):
+        component_id = store.record(TENANT, "prompt", _response("<div />", "desc"))
+        assert component_id == component_id_for("<div />")
+        store.flush()
+        assert len(store) == 1
+        assert store.get(TENANT, component_id)["code"] == "<div />"
+
+    def test_duplicate_code_stored_once(self, store):
+        store.record(TENANT, "a", _response("<div />", "first"))
+        store.record(TENANT, "b", _response("<div />", "second"))
+        store.flush()
+        assert len(store) == 1
+        assert len(store.search(TENANT, "div")) == 1
+
+    def test_response_without_code_ignored(self, store):
+        assert store.record(TENANT, "prompt", {"schema": {}}) is None
+
+    def test_search_ranks_prompt_matches_first(self, populated_store):
+        populated_store.record(TENANT, "Create a card", _response("<div>form</div>", "Card"))
+        populated_store.flush()
+
+        results = populated_store.search(TENANT, "form")
+        assert len(results) == 3
+        assert results[-1]["description"] == "Card"
+        assert all("code" not in r for r in results)
+
+    def test_search_matches_all_words_and_prefixes(self, populated_store):
+        results = populated_store.search(TENANT, "pass log")
+        assert len(results) == 1
+        assert results[0]["prompt"] == "Create a login form"
+
+    def test_search_filters_by_type(self, populated_store):
+        assert populated_store.search(TENANT, "create", component_type="navigation")[0]["componentType"] == "navigation"
+        assert len(populated_store.search(TENANT, "create", component_type="form")) == 2
+
+    def test_search_ignores_fts_syntax(self, populated_store):
+        assert populated_store.search(TENANT, 'form" OR code:*') == []
+        assert build_fts_query('a "b"') == '"a"* """b"""*'
+
+    def test_tenants_are_isolated(self, populated_store):
+        populated_store.record("acme", "Create a login form", _response("<form>password</form>", "Acme login"))
+        populated_store.record("acme", "Create a pricing table", _response("<table />", "Pricing"))
+        populated_store.flush()
+
+        assert [r["description"] for r in populated_store.search("acme", "login")] == ["Acme login"]
+        assert populated_store.search(TENANT, "pricing") == []
+        assert populated_store.get(TENANT, component_id_for("<table />")) is None
+        assert populated_store.get(TENANT, component_id_for("<form>password</form>"))["schema"]["description"] == (
+            "Login form with password"
+        )
+
+    def test_untenanted_components_set_aside(self, tmp_path):
+        path = str(tmp_path / "h.sqlite3")
+        legacy = sqlite3.connect(path)
+        legacy.execute(
+            "CREATE TABLE components (id TEXT PRIMARY KEY, prompt TEXT NOT NULL, description TEXT NOT NULL, "
+            "component_type TEXT NOT NULL, code TEXT NOT NULL, response BLOB NOT NULL, prompt_version TEXT, "
+            "created_at REAL NOT NULL)"
+        )
+        legacy.execute("INSERT INTO components VALUES ('x', 'Create a form', '', '', '<form />', '{}', NULL, 0)")
+        legacy.commit()
+        legacy.close()
+
+        store = ComponentHistoryStore(path)
+        try:
+            assert len(store) == 0
+            assert store.search(TENANT, "form") == []
+            store.record(TENANT, "Create a form", _response("<form />", "Form"))
+            store.flush()
+            assert len(store.search(TENANT, "form")) == 1
+        finally:
+            store.close()
+
+    def test_full_queue_drops_records(self, tmp_path):
+        store = ComponentHistoryStore(str(tmp_path / "h.sqlite3"), queue_size=1)
+        store.close()  # stop the writer so the queue stays full
+        store._queue.put_nowait({"placeholder": True})
+
+        assert store.record(TENANT, "p", _response("<x />", "d")) is None
+        assert store.dropped == 1
+
+    def test_search_is_fast(self, store):
+        for index in range(500):
+            store.record(TENANT, f"Create component number {index}", _response(f"<div>{index}</div>", f"Item {index}"))
+        store.flush()
+
+        started = time.perf_counter()
+        store.search(TENANT, "component number")
+        assert time.perf_counter() - started < 0.05
+
+
+class TestHistoryIntegration:
+    """Test cases for recording from AIService and the HTTP endpoints."""
+
+    def test_generation_recorded(self, fake_ai_service, store):
+        fake_ai_service.history = store
+        response = fake_ai_service.generate_component([{"role": "user", "content": "Create a button"}])
+        store.flush()
+
+        assert store.get(TENANT, response["componentId"])["code"] == response["code"]
+        assert store.search(TENANT, "button")[0]["id"] == response["componentId"]
+
+    def test_search_endpoint(self, history_client):
+        response = history_client.get("/api/components/search?q=login")
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["query"] == "login"
+        assert len(data["results"]) == 1
+        assert "tookMs" in data
+
+    def test_search_endpoint_requires_query(self, history_client):
+        response = history_client.get("/api/components/search")
+        assert response.status_code == 400
+        assert response.get_json()["error"]["type"] == "validation_error"
+
+    def test_get_component_supports_conditional_get(self, history_client):
+        component_id = component_id_for("<nav />")
+        first = history_client.get(f"/api/components/{component_id}")
+        assert first.status_code == 200
+        assert first.get_json()["code"] == "<nav />"
+
+        second = history_client.get(
+            f"/api/components/{component_id}", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        assert second.status_code == 304
+
+    def test_endpoints_scoped_to_tenant(self, history_client, populated_store, monkeypatch):
+        populated_store.record("acme", "Create a pricing table", _response("<table />", "Pricing"))
+        populated_store.flush()
+        monkeypatch.setitem(
+            history_client.application.extensions, "tenant_resolver", TenantResolver(api_keys={"k1": "acme"})
+        )
+        component_id = component_id_for("<table />")
+
+        assert history_client.get("/api/components/search?q=pricing").get_json()["results"] == []
+        assert history_client.get(f"/api/components/{component_id}").status_code == 404
+
+        headers = {"X-API-Key": "k1"}
+        assert len(history_client.get("/api/components/search?q=pricing", headers=headers).get_json()["results"]) == 1
+        assert history_client.get(f"/api/components/{component_id}", headers=headers).status_code == 200
+
+    def test_get_unknown_component(self, history_client):
+        response = history_client.get("/api/components/missing")
+        assert response.status_code == 404
+
+    def test_disabled_history(self, client, monkeypatch):
+        monkeypatch.setitem(client.application.extensions, "component_history", LazyService(lambda: None))
+        assert client.get("/api/components/search?q=x").status_code == 503
@@ -0,0 +1,103 @@
+"""
+Tests for response compression and conditional GET handling.
+"""
+
+import gzip
+
+import pytest
+from flask import Flask, jsonify
+
+from api import compression
+from api.compression import init_compression
+
+
+LARGE_CODE = "export default function Form() {\n" + "  return <input />;\n" * 200 + "}"
+
+
+@pytest.fixture
+def compressed_app():
+    """Minimal app with compression registered."""
+    app = Flask(__name__)
+    app.config["COMPRESSION_MIN_SIZE"] = 512
+    init_compression(app)
+
+    @app.route("/component")
+    def component():
+        return jsonify({"code": LARGE_CODE})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"status": "ok"})
+
+    return app.test_client()
+
+
+class TestCompression:
+    """Test cases for response compression."""
+
+    def test_large_response_gzipped(self, compressed_app, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+        response = compressed_app.get("/component", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        body = gzip.decompress(response.get_data())
+        assert LARGE_CODE.encode() in body.replace(b"\\n", b"\n")
+        assert len(response.get_data()) < len(body) / 4
+
+    def test_brotli_preferred_when_available(self, compressed_app):
+        brotli = pytest.importorskip("brotli")
+        response = compressed_app.get("/component", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert b"export default" in brotli.decompress(response.get_data())
+
+    def test_small_response_not_compressed(self, compressed_app):
+        response = compressed_app.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_no_accept_encoding_not_compressed(self, compressed_app):
+        response = compressed_app.get("/component", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json()["code"] == LARGE_CODE
+
+    def test_compressed_bytes_are_reused(self, compressed_app, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+        calls = []
+        real_compress = gzip.compress
+        monkeypatch.setattr(
+            compression.gzip, "compress", lambda *a, **k: calls.append(1) or real_compress(*a, **k)
+        )
+
+        first = compressed_app.get("/component", headers={"Accept-Encoding": "gzip"})
+        second = compressed_app.get("/component", headers={"Accept-Encoding": "gzip"})
+
+        assert first.get_data() == second.get_data()
+        assert len(calls) == 1
+
+
+class TestConditionalRequests:
+    """Test cases for content-hash ETags."""
+
+    def test_etag_is_stable(self, compressed_app):
+        first = compressed_app.get("/component")
+        second = compressed_app.get("/component", headers={"Accept-Encoding": "gzip"})
+
+        assert first.headers["ETag"].startswith('W/"')
+        assert first.headers["ETag"] == second.headers["ETag"]
+
+    def test_matching_etag_returns_304(self, compressed_app):
+        etag = compressed_app.get("/component").headers["ETag"]
+        response = compressed_app.get("/component", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.get_data() == b""
+
+    def test_stale_etag_returns_body(self, compressed_app):
+        response = compressed_app.get("/component", headers={"If-None-Match": 'W/"other"'})
+        assert response.status_code == 200
+
+    def test_chat_response_has_etag(self, client, mock_anthropic_client, sample_chat_messages):
+        response = client.post("/api/chat", json={"messages": sample_chat_messages})
+        assert response.status_code == 200
+        assert "ETag" in response.headers
@@ -0,0 +1,103 @@
+"""
+Tests for branching conversation history and upstream prompt caching.
+"""
+
+import json
+
+import pytest
+
+from models.conversation import ConversationError, ConversationTree
+from services.ai_service import with_cache_breakpoint
+
+
+def _build(tree, branch, *contents):
+    head = tree.head(branch)
+    for index, content in enumerate(contents):
+        head = tree.add(head, "user" if index % 2 == 0 else "assistant", content)
+    tree.set_head(branch, head)
+    return head
+
+
+class TestConversationTree:
+    """Test cases for ConversationTree."""
+
+    def test_fork_shares_prefix(self):
+        tree = ConversationTree()
+        _build(tree, "main", "Create a card", "<Card />", "Add a title", "<Card title />")
+        shared = tree.head("main").parent.parent
+
+        tree.fork("alt", shared.turn_id)
+        _build(tree, "alt", "Add an image", "<Card image />")
+
+        main, alt = tree.messages("main"), tree.messages("alt")
+        assert all(a is b for a, b in zip(main[:2], alt[:2]))
+        assert json.dumps(main[:2]) == json.dumps(alt[:2])
+        assert alt[2]["content"] == "Add an image"
+        # Only the turns after the fork point are stored again
+        assert tree.stats()["turns"] == 6
+        assert tree.stats()["branchTurns"] == 8
+
+    def test_abandoned_turns_freed(self):
+        tree = ConversationTree()
+        _build(tree, "main", "Create a card", "<Card />")
+        pending = tree.add(tree.head("main"), "user", "Make it red")
+        assert tree.stats()["turns"] == 3
+
+        del pending
+        assert tree.stats()["turns"] == 2
+
+        tree.delete("main")
+        assert tree.stats()["turns"] == 0
+        assert tree.messages("main") == []
+
+    def test_unknown_turn(self):
+        tree = ConversationTree()
+        with pytest.raises(ConversationError):
+            tree.fork("alt", "n1")
+
+    def test_branch_limit(self):
+        tree = ConversationTree(max_branches=2)
+        tree.set_head("a", None)
+        tree.set_head("b", None)
+        tree.set_head("a", None)
+
+        with pytest.raises(ConversationError):
+            tree.set_head("c", None)
+
+
+class TestPromptCaching:
+    """Test cases for the upstream cache breakpoint."""
+
+    def test_breakpoint_on_last_history_turn(self):
+        messages = [
+            {"role": "user", "content": "Create a card"},
+            {"role": "assistant", "content": "<Card />"},
+            {"role": "user", "content": "Add a title"},
+        ]
+        marked = with_cache_breakpoint(messages)
+
+        assert marked[1]["content"] == [
+            {"type": "text", "text": "<Card />", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert marked[0] is messages[0] and marked[2] is messages[2]
+        assert messages[1]["content"] == "<Card />"
+
+    def test_single_turn_unmarked(self):
+        messages = [{"role": "user", "content": "Create a card"}]
+        assert with_cache_breakpoint(messages) is messages
+
+    def test_sent_upstream_but_not_in_cache_key(self, fake_ai_service, sample_chat_messages):
+        conversation = sample_chat_messages + [{"role": "user", "content": "Make it red"}]
+        fake_ai_service.generate_component(conversation)
+        fake_ai_service.generate_component(conversation)
+
+        assert fake_ai_service.client.messages.create.call_count == 1
+        sent = fake_ai_service.client.messages.create.call_args.kwargs["messages"]
+        assert sent[1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_can_be_disabled(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.prompt_caching = False
+        fake_ai_service.generate_component(sample_chat_messages + [{"role": "user", "content": "Make it red"}])
+
+        sent = fake_ai_service.client.messages.create.call_args.kwargs["messages"]
+        assert all(isinstance(message["content"], str) for message in sent)
@@ -0,0 +1,187 @@
+"""
+Tests for request deadline propagation.
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import make_claude_response
+from services.ai_service import DEFAULT_MODEL, FAST_MAX_TOKENS, FAST_MODEL
+from services.tenancy import DEFAULT_TENANT, FairScheduler
+from utils.deadline import DEADLINE_HEADER, Deadline, DeadlineExceeded
+
+MESSAGES = [{"role": "user", "content": "Create a pricing card"}]
+
+
+class TestDeadline:
+    """Test cases for the Deadline helper."""
+
+    def test_from_headers(self):
+        deadline = Deadline.from_headers({DEADLINE_HEADER: "5000"})
+        assert 4.9 < deadline.remaining() <= 5.0
+        assert not deadline.expired
+
+    def test_default_budget(self):
+        assert Deadline.from_headers({}) is None
+        assert Deadline.from_headers({}, default_ms=1000).budget_seconds == 1.0
+
+    @pytest.mark.parametrize("value", ["soon", "0", "-5"])
+    def test_invalid_header(self, value):
+        with pytest.raises(ValueError):
+            Deadline.from_headers({DEADLINE_HEADER: value})
+
+    def test_check(self):
+        deadline = Deadline(0)
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            deadline.check("queueing")
+        assert exc_info.value.stage == "queueing"
+
+
+class TestDeadlineStrategies:
+    """Test cases for deadline-aware generation in AIService."""
+
+    def test_ample_time_uses_default_model_with_timeout(self, fake_ai_service):
+        fake_ai_service.generate_component(MESSAGES, deadline=Deadline(120))
+
+        kwargs = fake_ai_service.client.messages.create.call_args.kwargs
+        assert kwargs["model"] == DEFAULT_MODEL
+        assert 119 < kwargs["timeout"] <= 120
+
+    def test_short_deadline_uses_fast_model(self, fake_ai_service):
+        fake_ai_service.generate_component(MESSAGES, deadline=Deadline(10))
+
+        kwargs = fake_ai_service.client.messages.create.call_args.kwargs
+        assert kwargs["model"] == FAST_MODEL
+        assert kwargs["max_tokens"] == FAST_MAX_TOKENS
+
+    def test_cache_served_even_when_deadline_is_close(self, fake_ai_service):
+        fake_ai_service.generate_component(MESSAGES)
+        fake_ai_service.client.messages.create.reset_mock()
+
+        result = fake_ai_service.generate_component(MESSAGES, deadline=Deadline(0.5))
+
+        assert result["code"]
+        fake_ai_service.client.messages.create.assert_not_called()
+
+    def test_no_time_for_upstream(self, fake_ai_service):
+        fake_ai_service.cache = None
+
+        with pytest.raises(DeadlineExceeded):
+            fake_ai_service.generate_component(MESSAGES, deadline=Deadline(0.5))
+        fake_ai_service.client.messages.create.assert_not_called()
+
+    def test_history_served_when_no_time_for_upstream(self, fake_ai_service, tmp_path):
+        from models.component_history import ComponentHistoryStore
+
+        fake_ai_service.cache = None
+        fake_ai_service.history = ComponentHistoryStore(str(tmp_path / "history.sqlite3"))
+        fake_ai_service.generate_component(MESSAGES)
+        fake_ai_service.history.flush()
+        fake_ai_service.client.messages.create.reset_mock()
+
+        result = fake_ai_service.generate_component(MESSAGES, deadline=Deadline(0.5))
+
+        assert result["servedFrom"] == "history"
+        assert result["degraded"] is True
+        fake_ai_service.client.messages.create.assert_not_called()
+        fake_ai_service.history.close()
+
+    def test_history_of_other_tenants_not_served(self, fake_ai_service, tmp_path):
+        from models.component_history import ComponentHistoryStore
+
+        fake_ai_service.cache = None
+        fake_ai_service.history = ComponentHistoryStore(str(tmp_path / "history.sqlite3"))
+        fake_ai_service.generate_component(MESSAGES, tenant="acme")
+        fake_ai_service.history.flush()
+
+        with pytest.raises(DeadlineExceeded):
+            fake_ai_service.generate_component(MESSAGES, deadline=Deadline(0.5))
+        assert fake_ai_service.generate_component(MESSAGES, tenant="acme", deadline=Deadline(0.5))["degraded"]
+        fake_ai_service.history.close()
+
+    @pytest.mark.parametrize("stored, messages", [
+        # Same last message, but an answer to it alone would drop the first turn
+        (MESSAGES, [
+            {"role": "user", "content": "Create a login form"},
+            {"role": "assistant", "content": '{"code": "export default 1", "schema": {}}'},
+            {"role": "user", "content": "Create a pricing card"},
+        ]),
+        # Ranked first by search, but generated for a different request
+        ([{"role": "user", "content": "Create a pricing card with a yearly toggle and three tiers"}], MESSAGES),
+    ])
+    def test_history_not_served_without_close_match(self, fake_ai_service, tmp_path, stored, messages):
+        from models.component_history import ComponentHistoryStore
+
+        fake_ai_service.cache = None
+        fake_ai_service.history = ComponentHistoryStore(str(tmp_path / "history.sqlite3"))
+        fake_ai_service.generate_component(stored)
+        fake_ai_service.history.flush()
+        assert fake_ai_service.history.search(DEFAULT_TENANT, "Create a pricing card")
+        fake_ai_service.client.messages.create.reset_mock()
+
+        with pytest.raises(DeadlineExceeded):
+            fake_ai_service.generate_component(messages, deadline=Deadline(0.5))
+        fake_ai_service.client.messages.create.assert_not_called()
+        fake_ai_service.history.close()
+
+    def test_deadline_expires_while_queued(self, fake_ai_service):
+        fake_ai_service.cache = None
+        fake_ai_service.min_upstream_seconds = 0
+        fake_ai_service.scheduler = FairScheduler(1)
+        release = threading.Event()
+
+        def slow_create(**kwargs):
+            release.wait()
+            return make_claude_response({"code": "export default 1", "schema": {}})
+
+        fake_ai_service.client.messages.create.side_effect = slow_create
+        holder = threading.Thread(target=fake_ai_service.generate_component, args=(MESSAGES,))
+        holder.start()
+        while fake_ai_service.scheduler.stats()["inFlight"] == 0:
+            time.sleep(0.001)
+
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            fake_ai_service.generate_component(MESSAGES, deadline=Deadline(0.05))
+        assert exc_info.value.stage == "queueing"
+
+        release.set()
+        holder.join()
+
+
+class TestDeadlineEndpoint:
+    """Test cases for deadline handling in /api/chat."""
+
+    def test_deadline_passed_to_service(self, client, mock_anthropic_client, sample_chat_messages):
+        mock_anthropic_client.generate_component.return_value = {"code": "x", "schema": {}}
+
+        response = client.post(
+            "/api/chat",
+            json={"messages": sample_chat_messages},
+            headers={DEADLINE_HEADER: "8000"},
+        )
+
+        assert response.status_code == 200
+        deadline = mock_anthropic_client.generate_component.call_args.kwargs["deadline"]
+        assert 7 < deadline.remaining() <= 8
+
+    def test_invalid_deadline_rejected(self, client, mock_anthropic_client, sample_chat_messages):
+        response = client.post(
+            "/api/chat",
+            json={"messages": sample_chat_messages},
+            headers={DEADLINE_HEADER: "abc"},
+        )
+
+        assert response.status_code == 400
+        mock_anthropic_client.generate_component.assert_not_called()
+
+    def test_deadline_exceeded_returns_504(self, client, mock_anthropic_client, sample_chat_messages):
+        mock_anthropic_client.generate_component.side_effect = DeadlineExceeded("upstream call")
+
+        response = client.post("/api/chat", json={"messages": sample_chat_messages})
+
+        assert response.status_code == 504
+        error = response.get_json()["error"]
+        assert error["type"] == "timeout_error"
+        assert "upstream call" in error["message"]
@@ -0,0 +1,222 @@
+"""
+Tests for the local form schema compiler.
+"""
+
+import pytest
+
+from services.form_compiler import (
+    FormSchemaError,
+    compile_form,
+    component_name,
+    extract_form_schema,
+    normalize_form_schema,
+)
+
+CONTACT_PROMPT = "Create a contact form with name, email, phone and message, all required"
+
+
+def _fields(schema):
+    return {field["id"]: field for field in schema["fields"]}
+
+
+class TestExtraction:
+    """Test cases for extract_form_schema."""
+
+    def test_explicit_field_list(self):
+        schema, confidence = extract_form_schema(CONTACT_PROMPT)
+
+        assert confidence == 1.0
+        assert schema["title"] == "Contact Form"
+        assert [(f["id"], f["type"]) for f in schema["fields"]] == [
+            ("name", "text"), ("email", "email"), ("phone", "tel"), ("message", "textarea"),
+        ]
+        assert all(field["required"] for field in schema["fields"])
+
+    def test_modifiers(self):
+        schema, confidence = extract_form_schema(
+            "Build a signup form with fields: username, password (min 10), "
+            "Country (select: US, UK, Canada), age (optional) and accept terms and conditions checkbox"
+        )
+        fields = _fields(schema)
+
+        assert confidence == 1.0
+        assert fields["password"]["validation"]["minLength"] == 10
+        assert fields["country"] == {
+            "id": "country", "type": "select", "label": "Country", "required": True,
+            "options": ["US", "UK", "Canada"],
+        }
+        assert fields["age"]["type"] == "number" and not fields["age"]["required"]
+        assert fields["acceptTermsConditions"]["type"] == "checkbox"
+
+    def test_starter_prompt_with_validation_suffix(self):
+        schema, confidence = extract_form_schema(
+            "Create a contact form with name, email, and message fields with validation"
+        )
+        assert confidence == 1.0
+        assert list(_fields(schema)) == ["name", "email", "message"]
+
+    @pytest.mark.parametrize("prompt", [
+        "Create a responsive navbar with logo, menu items, and mobile hamburger menu",
+        "Create a login form",
+        "Build a form for my website",
+    ])
+    def test_no_field_list(self, prompt):
+        assert extract_form_schema(prompt) == (None, 0.0)
+
+    @pytest.mark.parametrize("prompt", [
+        "Create a checkout form with address, card number and expiry date",
+        "Create a survey form with name and country dropdown",
+        "Create a form with name, email and a section explaining our privacy policy in detail",
+    ])
+    def test_low_confidence_when_compiler_would_guess(self, prompt):
+        _schema, confidence = extract_form_schema(prompt)
+        assert confidence < 0.9
+
+    @pytest.mark.parametrize("prompt", [
+        "Make a contact form with nice styling and dark mode",
+        "Create a form with validation and a submit button",
+        "Build a search form with filters and sorting",
+        "Create a form including error handling and loading states",
+    ])
+    def test_features_are_not_fields(self, prompt):
+        _schema, confidence = extract_form_schema(prompt)
+        assert confidence < 0.5
+
+    @pytest.mark.parametrize("prompt", [
+        "Create a contact form with name, email, phone, message. The name must be at least 3 characters.",
+        "Create a form with name, email, and age; the age must be between 18 and 99",
+        "Create a contact form with name, email and message, all required. Make it dark with a purple submit button.",
+        "Create a dark contact form with name, email and message",
+    ])
+    def test_requests_beyond_the_field_list(self, prompt):
+        _schema, confidence = extract_form_schema(prompt)
+        assert confidence < 0.9
+
+    def test_closing_courtesy_ignored(self):
+        assert extract_form_schema(CONTACT_PROMPT + ". Thanks!")[1] == 1.0
+
+
+class TestCompilation:
+    """Test cases for normalize_form_schema and compile_form."""
+
+    def test_code_uses_react_hook_form_and_zod(self):
+        schema, _ = extract_form_schema(CONTACT_PROMPT)
+        code = compile_form(schema)
+
+        assert 'import { zodResolver } from "@hookform/resolvers/zod";' in code
+        assert "export default function ContactForm(" in code
+        assert 'email: z.string().min(1, "Email is required").email("Enter a valid email address"),' in code
+        assert '.regex(new RegExp("^[+0-9 ()-]{7,20}$"), "Enter a valid phone number")' in code
+        assert '{...register("message")}' in code and "<Textarea" in code
+
+    def test_required_number_rejects_empty_input(self):
+        code = compile_form(normalize_form_schema({
+            "title": "Order",
+            "fields": [
+                {"id": "quantity", "type": "number", "label": "Quantity", "required": True},
+                {"id": "budget", "type": "number", "label": "Budget"},
+            ],
+        }))
+
+        assert "z.coerce.number()" in code and "z.coerce.number({" not in code
+        assert '.refine((value) => value !== "", "Quantity is required"),' in code
+        assert 'budget: z.union([z.literal(""), z.coerce.number()], ' in code
+        assert 'quantity: "",' in code and 'budget: "",' in code
+
+    def test_optional_and_choice_fields(self):
+        code = compile_form(normalize_form_schema({
+            "title": "Plan",
+            "fields": [
+                {"id": "plan", "type": "radio", "label": "Plan", "required": True, "options": ["Free", "Pro"]},
+                {"id": "bio", "type": "text", "label": "Bio", "validation": {"maxLength": 200}},
+            ],
+        }))
+
+        assert 'plan: z.enum(["Free", "Pro"]' in code
+        assert 'bio: z.string().max(200, "Bio must be at most 200 characters").optional().or(z.literal(""))' in code
+        assert code.count('type="radio"') == 2
+        assert "export default function PlanForm(" in code
+
+    def test_labels_escaped_in_jsx(self):
+        code = compile_form(normalize_form_schema({
+            "title": "Terms",
+            "fields": [{"id": "terms", "type": "checkbox", "label": "I accept <terms> & {rules}", "required": True}],
+        }))
+        assert '{"I accept <terms> & {rules}"}' in code
+
+    @pytest.mark.parametrize("schema", [
+        [],
+        {"title": "", "fields": [{"id": "a", "type": "text", "label": "A"}]},
+        {"title": "T", "fields": []},
+        {"title": "T", "fields": [{"id": "a-b", "type": "text", "label": "A"}]},
+        {"title": "T", "fields": [{"id": "a", "type": "date", "label": "A"}]},
+        {"title": "T", "fields": [{"id": "a", "type": "select", "label": "A"}]},
+        {"title": "T", "fields": [{"id": "a", "type": "text", "label": "A", "validation": {"minLength": "3"}}]},
+        {"title": "T", "fields": [{"id": "a", "type": "text", "label": "A"}, {"id": "a", "type": "text", "label": "B"}]},
+    ])
+    def test_invalid_schemas_rejected(self, schema):
+        with pytest.raises(FormSchemaError):
+            normalize_form_schema(schema)
+
+    def test_component_name(self):
+        assert component_name("Contact Form") == "ContactForm"
+        assert component_name("job application") == "JobApplicationForm"
+        assert component_name("2024 survey") == "Generated2024SurveyForm"
+
+
+class TestServiceIntegration:
+    """Test cases for compiled forms in AIService and the compile endpoint."""
+
+    def test_confident_form_prompt_skips_model(self, fake_ai_service):
+        events = []
+        result = fake_ai_service.generate_component(
+            [{"role": "user", "content": CONTACT_PROMPT}], on_event=lambda *event: events.append(event)
+        )
+
+        fake_ai_service.client.messages.create.assert_not_called()
+        assert result["servedFrom"] == "compiler"
+        assert result["schema"]["type"] == "form"
+        assert len(result["schema"]["fields"]) == 4
+        assert result["analysis"]["undeclaredDependencies"] == []
+        assert result["componentId"]
+        assert ("progress", {"stage": "compiled", "confidence": 1.0}) in events
+
+    def test_follow_ups_and_vague_prompts_use_model(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.generate_component(sample_chat_messages + [{"role": "user", "content": CONTACT_PROMPT}])
+        fake_ai_service.generate_component([{"role": "user", "content": "Create a checkout form with a date picker"}])
+
+        assert fake_ai_service.client.messages.create.call_count == 2
+
+    def test_feature_prompt_uses_model(self, fake_ai_service):
+        result = fake_ai_service.generate_component(
+            [{"role": "user", "content": "Make a contact form with nice styling and dark mode"}]
+        )
+
+        assert "servedFrom" not in result
+        fake_ai_service.client.messages.create.assert_called_once()
+
+    def test_compiler_can_be_disabled(self, fake_ai_service):
+        fake_ai_service.form_compiler_confidence = 1.1
+        result = fake_ai_service.generate_component([{"role": "user", "content": CONTACT_PROMPT}])
+
+        assert "servedFrom" not in result
+        fake_ai_service.client.messages.create.assert_called_once()
+
+    def test_compile_endpoint(self, client):
+        response = client.post("/api/forms/compile", json={
+            "schema": {"title": "Newsletter", "fields": [{"id": "email", "type": "email", "label": "Email"}]},
+            "fields": ["usage"],
+        })
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["servedFrom"] == "compiler"
+        assert "export default function NewsletterForm(" in data["code"]
+        assert data["responseFields"] == ["code", "usage"]
+        assert "description" not in data["schema"]
+
+    def test_compile_endpoint_rejects_invalid_schema(self, client):
+        response = client.post("/api/forms/compile", json={"schema": {"title": "T", "fields": []}})
+
+        assert response.status_code == 400
+        assert response.get_json()["error"]["type"] == "validation_error"
@@ -0,0 +1,222 @@
+"""
+Tests for the precomputed starter component gallery.
+"""
+
+import os
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from services.gallery import GALLERY_TENANT, STARTER_PROMPTS, ComponentGallery
+
+STARTERS = {"forms": "Create a form", "layout": "Create a layout"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def service():
+    service = Mock()
+    service.prompt_manager.prompt_version = "1+aaaa"
+    counter = iter(range(1000))
+
+    def generate(messages, tenant=None, use_cache=True):
+        return {
+            "code": f"export default {next(counter)}",
+            "componentId": "abc",
+            "promptVersion": service.prompt_manager.prompt_version,
+        }
+
+    service.generate_component.side_effect = generate
+    return service
+
+
+@pytest.fixture
+def gallery(service, clock):
+    gallery = ComponentGallery(service, ttl_seconds=100, starters=STARTERS, clock=clock)
+    # Keep the worker out of the way; tests drive refreshes explicitly
+    gallery.start = Mock()
+    return gallery
+
+
+class TestComponentGallery:
+    """Test cases for ComponentGallery."""
+
+    def test_pending_until_generated(self, gallery, service):
+        report = gallery.get("forms")
+        assert report["status"] == "pending"
+        assert report["component"] is None
+
+        assert gallery.refresh("forms")
+        report = gallery.get("forms")
+        assert report["status"] == "fresh"
+        assert report["component"]["componentId"] == "abc"
+        service.generate_component.assert_called_once_with(
+            [{"role": "user", "content": "Create a form"}], tenant=GALLERY_TENANT, use_cache=False
+        )
+
+    def test_stale_after_ttl_but_still_served(self, gallery, clock):
+        gallery.refresh("forms")
+        clock.now += 150
+
+        report = gallery.get("forms")
+        assert report["status"] == "stale"
+        assert report["component"] is not None
+        assert report["ageSeconds"] == 150
+        assert "forms" in gallery.due()
+
+    def test_stale_on_prompt_version_change(self, gallery, service):
+        gallery.refresh("forms")
+        service.prompt_manager.prompt_version = "2+bbbb"
+
+        report = gallery.get("forms")
+        assert report["status"] == "stale"
+        assert report["promptVersion"] == "1+aaaa"
+        assert report["currentPromptVersion"] == "2+bbbb"
+
+    def test_failed_refresh_keeps_entry_and_backs_off(self, gallery, service, clock):
+        gallery.refresh("forms")
+        first = gallery.get("forms")["component"]
+        clock.now += 150
+        service.generate_component.side_effect = Exception("upstream down")
+
+        assert not gallery.refresh("forms")
+        report = gallery.get("forms")
+        assert report["component"] == first
+        assert report["lastError"] == "upstream down"
+        assert "forms" not in gallery.due()
+
+        clock.now += gallery.check_interval
+        assert "forms" in gallery.due()
+
+    def test_unusable_component_not_stored(self, gallery, service):
+        service.generate_component.side_effect = None
+        service.generate_component.return_value = {"code": "x", "promptVersion": "1+aaaa"}
+
+        assert not gallery.refresh("forms")
+        assert gallery.get("forms")["component"] is None
+
+    def test_refresh_after_ttl_regenerates(self, fake_ai_service, clock):
+        gallery = ComponentGallery(
+            fake_ai_service, ttl_seconds=100, starters={"cards": "Create a product card"}, clock=clock
+        )
+        gallery.start = Mock()
+        assert gallery.refresh("cards")
+        clock.now += 150
+
+        assert gallery.refresh("cards")
+        assert fake_ai_service.client.messages.create.call_count == 2
+        assert gallery.get("cards")["status"] == "fresh"
+
+    def test_unknown_category(self, gallery):
+        assert gallery.get("missing") is None
+
+    def test_category_for_prompt(self, gallery):
+        assert gallery.category_for_prompt(" Create a form ") == "forms"
+        assert gallery.category_for_prompt("Create a form with ten fields") is None
+
+    def test_background_worker_fills_gallery(self, service, clock):
+        gallery = ComponentGallery(service, ttl_seconds=100, starters=STARTERS, clock=clock)
+        gallery.start()
+        try:
+            for _ in range(200):
+                if not gallery.due():
+                    break
+                time.sleep(0.01)
+            assert gallery.due() == []
+        finally:
+            gallery.stop()
+
+    def test_starters_match_frontend(self):
+        path = os.path.join(
+            os.path.dirname(__file__), "..", "frontend", "src", "data", "componentCategories.ts"
+        )
+        if not os.path.exists(path):
+            pytest.skip("frontend sources not available")
+        with open(path, encoding="utf-8") as source:
+            categories = source.read()
+        for category, prompt in STARTER_PROMPTS.items():
+            assert f'id: "{category}"' in categories
+            assert f'suggestedPrompt: "{prompt}"' in categories
+
+
+class TestGalleryEndpoints:
+    """Test cases for the gallery endpoints and /api/chat integration."""
+
+    @pytest.fixture
+    def app_gallery(self, client, gallery, monkeypatch):
+        import app as app_module
+
+        monkeypatch.setattr(app_module, "gallery", gallery)
+        monkeypatch.setitem(client.application.extensions, "component_gallery", Mock(get=lambda: gallery))
+        monkeypatch.setitem(client.application.config, "GALLERY_ENABLED", True)
+        return gallery
+
+    def test_get_entry(self, client, app_gallery):
+        assert client.get("/api/gallery/forms").status_code == 202
+
+        app_gallery.refresh("forms")
+        response = client.get("/api/gallery/forms")
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "fresh"
+
+    def test_unknown_entry(self, client, app_gallery):
+        assert client.get("/api/gallery/nope").status_code == 404
+
+    def test_overview(self, client, app_gallery):
+        categories = client.get("/api/gallery").get_json()["categories"]
+        assert [entry["category"] for entry in categories] == list(STARTERS)
+        assert all("component" not in entry for entry in categories)
+
+    def test_chat_serves_starter_from_gallery(self, client, app_gallery, mock_anthropic_client):
+        app_gallery.refresh("forms")
+
+        response = client.post(
+            "/api/chat", json={"messages": [{"role": "user", "content": "Create a form"}]}
+        )
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["servedFrom"] == "gallery"
+        assert body["galleryStatus"] == "fresh"
+        mock_anthropic_client.generate_component.assert_not_called()
+
+    def test_chat_generates_when_gallery_pending(self, client, app_gallery, mock_anthropic_client):
+        mock_anthropic_client.generate_component.return_value = {"code": "x"}
+
+        response = client.post(
+            "/api/chat", json={"messages": [{"role": "user", "content": "Create a form"}]}
+        )
+
+        assert response.status_code == 200
+        mock_anthropic_client.generate_component.assert_called_once()
+
+    def test_chat_with_fields_skips_gallery(self, client, app_gallery, mock_anthropic_client):
+        app_gallery.refresh("forms")
+        mock_anthropic_client.generate_component.return_value = {"code": "x"}
+
+        response = client.post(
+            "/api/chat", json={"messages": [{"role": "user", "content": "Create a form"}], "fields": ["code"]}
+        )
+
+        assert "servedFrom" not in response.get_json()
+        mock_anthropic_client.generate_component.assert_called_once()
+
+    def test_disabled(self, client, app_gallery, monkeypatch):
+        monkeypatch.setitem(client.application.config, "GALLERY_ENABLED", False)
+
+        assert client.get("/api/gallery").status_code == 404
+        assert client.get("/api/gallery/forms").status_code == 404
+        app_gallery.start.assert_not_called()
@@ -0,0 +1,225 @@
+"""
+Tests for the circuit breaker, upstream probe and readiness endpoint.
+"""
+
+from unittest.mock import Mock
+
+import httpx
+import pytest
+import anthropic
+
+from services.health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, UpstreamProbe
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _connection_error():
+    return anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+
+
+def _status_error(status_code):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    return anthropic.APIStatusError(
+        "upstream error", response=httpx.Response(status_code, request=request), body=None
+    )
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=FakeClock())
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        clock.now += 30
+
+        assert breaker.state == HALF_OPEN
+        breaker.check()
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        clock.now += 30
+        breaker.before_call()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.stats()["retryInSeconds"] == 30
+
+
+class TestUpstreamProbe:
+    """Test cases for UpstreamProbe."""
+
+    def test_traffic_defers_probe(self):
+        probe = UpstreamProbe(Mock(), interval=60)
+        assert probe.is_due()
+
+        probe.observe(True, 0.25)
+        assert not probe.is_due()
+        assert probe.snapshot()["latencyMs"] == 250.0
+        assert probe.snapshot()["source"] == "traffic"
+
+    def test_run_once_records_failure(self):
+        probe = UpstreamProbe(Mock(side_effect=Exception("connection refused")), interval=60)
+        probe.run_once()
+
+        snapshot = probe.snapshot()
+        assert snapshot["ok"] is False
+        assert snapshot["error"] == "connection refused"
+        assert snapshot["source"] == "probe"
+        assert snapshot["probesSent"] == 1
+
+
+class TestServiceCircuit:
+    """Test cases for circuit breaking in AIService."""
+
+    def test_connection_errors_open_circuit(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.circuit = CircuitBreaker(failure_threshold=2)
+        fake_ai_service.client.messages.create.side_effect = _connection_error()
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                fake_ai_service.generate_component(sample_chat_messages)
+        assert fake_ai_service.circuit.state == OPEN
+        assert fake_ai_service.probe.snapshot()["ok"] is False
+
+        calls = fake_ai_service.client.messages.create.call_count
+        with pytest.raises(CircuitOpenError):
+            fake_ai_service.generate_component(sample_chat_messages)
+        assert fake_ai_service.client.messages.create.call_count == calls
+
+    def test_client_errors_do_not_count(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.circuit = CircuitBreaker(failure_threshold=1)
+        fake_ai_service.client.messages.create.side_effect = _status_error(400)
+
+        with pytest.raises(Exception):
+            fake_ai_service.generate_component(sample_chat_messages)
+        assert fake_ai_service.circuit.state == CLOSED
+
+    def test_server_errors_count(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.circuit = CircuitBreaker(failure_threshold=1)
+        fake_ai_service.client.messages.create.side_effect = _status_error(529)
+
+        with pytest.raises(Exception):
+            fake_ai_service.generate_component(sample_chat_messages)
+        assert fake_ai_service.circuit.state == OPEN
+
+    def test_success_observed_by_probe(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.generate_component(sample_chat_messages)
+        assert fake_ai_service.probe.snapshot()["ok"] is True
+        assert not fake_ai_service.probe.is_due()
+
+
+class TestReadyEndpoint:
+    """Test cases for the /ready endpoint."""
+
+    @pytest.fixture
+    def service(self, fake_ai_service, monkeypatch):
+        import app as app_module
+
+        # Keep the background probe from calling the fake client
+        fake_ai_service.probe.start = Mock()
+        monkeypatch.setattr(app_module, "ai_service", fake_ai_service)
+        return fake_ai_service
+
+    def test_ready(self, client, service):
+        response = client.get("/ready")
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["ready"] is True
+        assert body["circuit"]["state"] == CLOSED
+        assert body["queue"]["depth"] == 0
+        service.client.models.list.assert_not_called()
+        service.client.messages.create.assert_not_called()
+
+    def test_not_ready_when_circuit_open(self, client, service):
+        service.circuit.failure_threshold = 1
+        service.circuit.record_failure()
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["circuit"]["state"] == OPEN
+
+    def test_single_failed_probe_keeps_ready(self, client, service):
+        service.client.models.list.side_effect = _connection_error()
+        service.probe.run_once()
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.get_json()["upstream"]["ok"] is False
+
+    def test_not_ready_after_repeated_failed_probes(self, client, service):
+        service.client.models.list.side_effect = _connection_error()
+        for _ in range(service.circuit.failure_threshold):
+            service.probe.run_once()
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["circuit"]["state"] == OPEN
+
+    def test_not_ready_during_half_open_trial(self, client, service):
+        service.circuit.failure_threshold = 1
+        service.circuit.reset_timeout = 0
+        service.circuit.record_failure()
+        service.circuit.before_call()
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["circuit"]["trialInFlight"] is True
+
+    def test_not_ready_when_queue_too_deep(self, client, service, monkeypatch):
+        monkeypatch.setitem(client.application.config, "READY_MAX_QUEUE_DEPTH", 2)
+        service.scheduler._waiting_count = 3
+
+        assert client.get("/ready").status_code == 503
+
+    def test_not_ready_without_client(self, client, service):
+        service.client = None
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["clientAvailable"] is False
+
+    def test_chat_returns_503_when_circuit_open(self, client, service, sample_chat_messages):
+        service.circuit.failure_threshold = 1
+        service.circuit.record_failure()
+
+        response = client.post("/api/chat", json={"messages": sample_chat_messages})
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert response.get_json()["error"]["retry"] is True
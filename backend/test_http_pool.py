@@ -0,0 +1,103 @@
+"""
+Tests for the upstream HTTP connection pool.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.ai_service import AIService
+from services.http_pool import HTTPConnectionPool, HTTPPoolConfig, http2_available
+from utils.code_analysis import CodeAnalyzer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    """Local keep-alive HTTP server standing in for the upstream API"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHTTPPoolConfig:
+    """Test cases for HTTPPoolConfig."""
+
+    def test_sized_to_concurrency(self, monkeypatch):
+        monkeypatch.delenv("HTTP_MAX_CONNECTIONS", raising=False)
+        config = HTTPPoolConfig.from_env(6)
+        assert config.max_connections == 6
+        assert config.max_keepalive_connections == 6
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "10")
+        monkeypatch.setenv("HTTP_CONNECT_TIMEOUT", "2.5")
+        config = HTTPPoolConfig.from_env(4)
+        assert config.max_connections == 10
+        assert config.connect_timeout == 2.5
+
+
+class TestHTTPConnectionPool:
+    """Test cases for HTTPConnectionPool."""
+
+    def test_client_uses_config(self):
+        pool = HTTPConnectionPool(HTTPPoolConfig(connect_timeout=1.5, read_timeout=30))
+        assert pool.client.timeout.connect == 1.5
+        assert pool.client.timeout.read == 30
+        pool.close()
+
+    def test_http2_falls_back_without_h2(self):
+        pool = HTTPConnectionPool(HTTPPoolConfig(http2=True))
+        assert pool.http2 == http2_available()
+        pool.close()
+
+    def test_warm_up_opens_connections(self, upstream):
+        pool = HTTPConnectionPool(HTTPPoolConfig(max_connections=2, max_keepalive_connections=2))
+        pool.warm_up(upstream, connections=2)
+
+        stats = pool.stats()
+        assert stats["connections"] == 2
+        assert stats["idleConnections"] == 2
+        assert stats["warmUps"] == 1
+        pool.close()
+
+    def test_warm_up_failure_is_not_raised(self):
+        pool = HTTPConnectionPool(HTTPPoolConfig(connect_timeout=0.2))
+        pool.warm_up("http://127.0.0.1:9")
+        assert pool.stats()["connections"] == 0
+        pool.close()
+
+    def test_keep_warm_after_idle(self, upstream):
+        pool = HTTPConnectionPool(HTTPPoolConfig(keepalive_expiry=0.1))
+        pool.start_keep_warm(upstream)
+        time.sleep(0.35)
+        pool.close()
+
+        assert pool.warm_ups >= 2
+
+
+class TestServiceIntegration:
+    """Test cases for the pool in AIService."""
+
+    def test_anthropic_client_uses_pool(self):
+        pool = HTTPConnectionPool(HTTPPoolConfig())
+        service = AIService(api_key="test-key", http_pool=pool, code_analyzer=CodeAnalyzer(max_workers=0))
+
+        assert service.client._client is pool.client
+        pool.close()
@@ -0,0 +1,74 @@
+"""
+Tests for the pluggable JSON codec and Flask JSON provider.
+"""
+
+import json
+import uuid
+from datetime import date
+
+import pytest
+
+from app import app
+from utils import json_codec
+from utils.json_codec import FastJSONProvider
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """Run a test against both codec backends."""
+    if request.param == "orjson" and json_codec.orjson is None:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(json_codec, "BACKEND", request.param)
+    return request.param
+
+
+class TestJSONCodec:
+    """Test cases for utils.json_codec."""
+
+    def test_round_trip(self, backend):
+        payload = {"code": "const a = \"ü\";\n" * 50, "schema": {"fields": [1, 2.5, None, True]}}
+        assert json_codec.loads(json_codec.dumps(payload)) == payload
+        assert json_codec.loads(json_codec.dumps_bytes(payload)) == payload
+
+    def test_sort_keys_and_compact_output(self, backend):
+        assert json_codec.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+    def test_invalid_json_raises_stdlib_error(self, backend):
+        with pytest.raises(json.JSONDecodeError):
+            json_codec.loads("{not json")
+
+    def test_default_handles_unsupported_values(self, backend):
+        encoded = json_codec.dumps({"value": {1, 2}}, default=sorted)
+        assert json_codec.loads(encoded) == {"value": [1, 2]}
+
+
+class TestFastJSONProvider:
+    """Test cases for the Flask JSON provider."""
+
+    def test_app_uses_fast_provider(self):
+        assert isinstance(app.json, FastJSONProvider)
+
+    def test_response_body_matches_stdlib(self, backend):
+        payload = {"schema": {"title": "Form"}, "code": "<form />", "id": uuid.UUID(int=1)}
+        with app.app_context():
+            response = app.json.response(payload)
+
+        assert response.mimetype == "application/json"
+        assert json.loads(response.get_data()) == {
+            "schema": {"title": "Form"},
+            "code": "<form />",
+            "id": str(uuid.UUID(int=1)),
+        }
+
+    def test_flask_types_are_supported(self, backend):
+        with app.app_context():
+            assert json.loads(app.json.dumps({"day": date(2024, 1, 2)})) == {
+                "day": "Tue, 02 Jan 2024 00:00:00 GMT"
+            }
+
+    def test_request_json_is_decoded(self, client, mock_anthropic_client, backend):
+        messages = [{"role": "user", "content": "Create a form ✓"}]
+        response = client.post("/api/chat", json={"messages": messages})
+
+        assert response.status_code == 200
+        assert mock_anthropic_client.generate_component.call_args[0][0] == messages
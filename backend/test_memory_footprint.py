@@ -0,0 +1,33 @@
+"""
+Memory regression tests for generate_component (see benchmarks/bench_memory.py).
+"""
+
+import logging
+
+import pytest
+
+from benchmarks.bench_memory import SCENARIOS, measure
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    """pytest keeps every captured log record, which would count as retained"""
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("turns, message_chars, code_chars", SCENARIOS)
+def test_per_request_memory_bounded(turns, message_chars, code_chars):
+    result = measure(turns, message_chars, code_chars, requests=4, warmup=2)
+    assert result.regressions() == []
+
+
+@pytest.mark.slow
+def test_retained_memory_does_not_grow_with_payload():
+    small = measure(1, 200, 2_000, requests=10)
+    large = measure(1, 200, 20_000, requests=10)
+
+    # Nothing proportional to the generated code may outlive the request
+    assert large.retained_bytes < small.retained_bytes + 1024
@@ -0,0 +1,135 @@
+"""
+Tests for pre-flight token estimation and request size guards.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from utils.preflight import (
+    PreflightError,
+    PreflightLimits,
+    estimate_tokens,
+    run_preflight,
+)
+
+
+def _conversation(turns, content="Make the button bigger and change its color please"):
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"{turn} {content}"})
+        messages.append({"role": "assistant", "content": f"{turn} done"})
+    messages.append({"role": "user", "content": "final request"})
+    return messages
+
+
+class TestEstimateTokens:
+    """Test cases for estimate_tokens."""
+
+    def test_empty_text(self):
+        assert estimate_tokens("") == 0
+
+    def test_counts_words_and_symbols(self):
+        assert estimate_tokens("hello world") == 4
+        assert estimate_tokens("a(b);") == 5
+
+    def test_scales_with_length(self):
+        text = "export default function Form() { return <form />; }\n"
+        assert estimate_tokens(text * 100) == estimate_tokens(text) * 100
+
+
+class TestRunPreflight:
+    """Test cases for run_preflight."""
+
+    def test_small_request_passes_unchanged(self):
+        messages = _conversation(2)
+        result = run_preflight(messages, 100, PreflightLimits())
+        assert result.messages == messages
+        assert result.dropped_messages == 0
+        assert result.estimated_tokens > 100
+
+    def test_rejects_oversized_message(self):
+        messages = [{"role": "user", "content": "x" * 101}]
+        with pytest.raises(PreflightError) as error:
+            run_preflight(messages, 0, PreflightLimits(max_message_chars=100))
+        assert error.value.status_code == 413
+
+    @pytest.mark.parametrize("messages", ["text", [1, 2], [{"role": "user", "content": 5}]])
+    def test_rejects_malformed_messages(self, messages):
+        with pytest.raises(PreflightError) as error:
+            run_preflight(messages, 0, PreflightLimits())
+        assert error.value.status_code == 400
+
+    def test_compacts_to_token_budget(self):
+        messages = _conversation(20)
+        result = run_preflight(messages, 50, PreflightLimits(token_budget=200))
+
+        assert result.dropped_messages > 0
+        assert result.estimated_tokens <= 200
+        assert result.messages[-1] == messages[-1]
+        assert result.messages[0]["role"] == "user"
+
+    def test_compacts_to_message_count(self):
+        messages = _conversation(10)
+        result = run_preflight(messages, 0, PreflightLimits(max_messages=5))
+
+        assert len(result.messages) <= 5
+        assert result.messages[0]["role"] == "user"
+
+    def test_rejects_when_compaction_disabled(self):
+        with pytest.raises(PreflightError):
+            run_preflight(_conversation(20), 50, PreflightLimits(token_budget=200, auto_compact=False))
+
+    def test_rejects_when_latest_message_alone_too_large(self):
+        messages = [{"role": "user", "content": "word " * 500}]
+        with pytest.raises(PreflightError):
+            run_preflight(messages, 0, PreflightLimits(token_budget=100))
+
+    def test_budget_capped_by_context(self):
+        limits = PreflightLimits(context_tokens=1000, output_tokens=200, token_budget=5000)
+        assert limits.max_input_tokens == 800
+
+
+class TestPreflightIntegration:
+    """Test cases for pre-flight checks in AIService and the chat endpoint."""
+
+    def test_oversized_request_never_reaches_upstream(self, fake_ai_service):
+        fake_ai_service.preflight_limits = PreflightLimits(max_message_chars=10)
+
+        with pytest.raises(PreflightError):
+            fake_ai_service.generate_component([{"role": "user", "content": "x" * 50}])
+        fake_ai_service.client.messages.create.assert_not_called()
+
+    def test_compacted_history_sent_upstream(self, fake_ai_service):
+        budget = fake_ai_service.prompt_manager.max_system_prompt_tokens() + 100
+        fake_ai_service.preflight_limits = PreflightLimits(token_budget=budget)
+
+        fake_ai_service.generate_component(_conversation(20))
+
+        sent = fake_ai_service.client.messages.create.call_args.kwargs["messages"]
+        assert len(sent) < 41
+        assert sent[-1]["content"] == "final request"
+
+    def test_endpoint_returns_validation_error(self, client, fake_ai_service):
+        fake_ai_service.preflight_limits = PreflightLimits(max_message_chars=10)
+
+        with patch("app.ai_service", fake_ai_service):
+            response = client.post(
+                "/api/chat", json={"messages": [{"role": "user", "content": "x" * 50}]}
+            )
+
+        assert response.status_code == 413
+        data = response.get_json()
+        assert data["error"]["type"] == "validation_error"
+        assert data["error"]["retry"] is False
+
+    def test_body_above_max_content_length_rejected(self, client, monkeypatch):
+        monkeypatch.setitem(client.application.config, "MAX_CONTENT_LENGTH", 100)
+
+        with patch("app.ai_service"):
+            response = client.post(
+                "/api/chat", json={"messages": [{"role": "user", "content": "x" * 500}]}
+            )
+
+        assert response.status_code == 413
+        assert response.get_json()["error"]["type"] == "validation_error"
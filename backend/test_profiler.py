@@ -0,0 +1,149 @@
+"""
+Tests for the on-demand sampling profiler.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.profiler import ProfilerBusyError, SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001, max_seconds=60)
+    yield profiler
+    profiler.stop()
+
+
+def _read_profile(summary):
+    with open(summary["path"], encoding="utf-8") as profile:
+        return [line.rsplit(" ", 1) for line in profile.read().splitlines()]
+
+
+class TestSamplingProfiler:
+    """Test cases for SamplingProfiler."""
+
+    def test_all_threads_profile_written_as_collapsed_stacks(self, profiler):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+        worker.start()
+        try:
+            profiler.start(0.2)
+            assert profiler.status()["running"]["mode"] == "all_threads"
+            time.sleep(0.3)
+        finally:
+            stop.set()
+            worker.join()
+        profiler.stop()
+
+        summary = profiler.status()["lastProfile"]
+        assert summary["samples"] > 0
+        lines = _read_profile(summary)
+        busy = [stack for stack, _count in lines if stack.startswith("thread:busy;")]
+        assert busy and any("test_profiler:busy_loop" in stack for stack in busy)
+        assert all(int(count) > 0 for _stack, count in lines)
+        assert not any("profiler:SamplingProfiler._run" in stack for stack, _count in lines)
+
+    def test_request_mode_only_samples_tracked_threads(self, profiler):
+        stop = threading.Event()
+        tracked_ready = threading.Event()
+
+        def handle_request():
+            profiler.track_current_thread("request:abc")
+            tracked_ready.set()
+            busy_loop(stop)
+            profiler.untrack_current_thread()
+
+        untracked = threading.Thread(target=busy_loop, args=(stop,), name="other")
+        profiler.start(30, request_sample_rate=1.0)
+        untracked.start()
+        handler = threading.Thread(target=handle_request)
+        handler.start()
+        tracked_ready.wait()
+        time.sleep(0.1)
+        stop.set()
+        handler.join()
+        untracked.join()
+        summary = profiler.stop()
+
+        stacks = [stack for stack, _count in _read_profile(summary)]
+        assert stacks and all(stack.startswith("request:abc;") for stack in stacks)
+        assert summary["requests"] == 1
+        assert summary["topFunctions"]
+
+    def test_stop_ends_profile_early(self, profiler):
+        profiler.start(30)
+        summary = profiler.stop()
+
+        assert summary["seconds"] < 30
+        assert not profiler.active
+        assert profiler.stop() is None
+
+    def test_one_profile_at_a_time(self, profiler):
+        profiler.start(30)
+        with pytest.raises(ProfilerBusyError):
+            profiler.start(30)
+
+    def test_should_track(self, profiler):
+        assert not profiler.should_track()
+        profiler.start(30)
+        assert not profiler.should_track()
+        profiler.stop()
+
+        profiler.start(30, request_sample_rate=1.0)
+        assert profiler.should_track()
+
+    @pytest.mark.parametrize("seconds, rate", [(0, None), (61, None), (10, 0), (10, 1.5)])
+    def test_invalid_arguments(self, profiler, seconds, rate):
+        with pytest.raises(ValueError):
+            profiler.start(seconds, rate)
+
+
+class TestProfilerEndpoints:
+    """Test cases for /api/admin/profiler."""
+
+    @pytest.fixture
+    def admin(self, client, profiler, monkeypatch):
+        monkeypatch.setitem(client.application.config, "ADMIN_TOKEN", "s3cret")
+        monkeypatch.setitem(client.application.extensions, "profiler", profiler)
+        return {"X-Admin-Token": "s3cret"}
+
+    def test_requires_token(self, client, admin):
+        assert client.post("/api/admin/profiler", json={"seconds": 1}).status_code == 401
+
+    def test_start_and_stop(self, client, admin):
+        response = client.post("/api/admin/profiler", json={"seconds": 5}, headers=admin)
+        assert response.status_code == 202
+        assert response.get_json()["running"]["seconds"] == 5
+
+        assert client.post("/api/admin/profiler", json={"seconds": 5}, headers=admin).status_code == 409
+
+        response = client.delete("/api/admin/profiler", headers=admin)
+        assert response.status_code == 200
+        assert response.get_json()["path"].endswith(".collapsed")
+        assert client.delete("/api/admin/profiler", headers=admin).status_code == 404
+
+    def test_invalid_request(self, client, admin):
+        response = client.post("/api/admin/profiler", json={"seconds": "ten"}, headers=admin)
+        assert response.status_code == 400
+        response = client.post(
+            "/api/admin/profiler", json={"seconds": 5, "requestSampleRate": 2}, headers=admin
+        )
+        assert response.status_code == 400
+
+    def test_chat_requests_sampled(self, client, admin, mock_anthropic_client, sample_chat_messages):
+        profiler = client.application.extensions["profiler"]
+        client.post("/api/admin/profiler", json={"seconds": 30, "requestSampleRate": 1.0}, headers=admin)
+
+        client.post("/api/chat", json={"messages": sample_chat_messages})
+        client.get("/health")
+
+        assert profiler.status()["running"]["requests"] == 1
+        assert profiler._tracked == {}
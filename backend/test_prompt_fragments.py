@@ -0,0 +1,99 @@
+"""
+Tests for sub-intent prompt fragments and their assembly.
+"""
+
+import json
+import shutil
+
+import pytest
+
+from benchmarks.bench_prompt_fragments import CORPUS, measure
+from utils.prompt_manager import ComponentType, LEAN_FIELDS, PromptManager
+from utils.prompt_registry import DEFAULT_PROMPT_DIR, PromptRegistry, PromptRegistryError, render_instructions
+
+INSTRUCTIONS = """WIDGET INSTRUCTIONS:
+- Always applies
+- [table, list] Add pagination
+
+Component types to consider:
+- [table] Data tables
+- [chart] Charts"""
+
+
+class TestRenderInstructions:
+    """Test cases for render_instructions."""
+
+    def test_all_lines_without_sub_intents(self):
+        rendered = render_instructions(INSTRUCTIONS)
+        assert "[" not in rendered
+        assert "- Add pagination" in rendered and "- Charts" in rendered
+
+    def test_only_matching_fragments(self):
+        rendered = render_instructions(INSTRUCTIONS, {"chart"})
+        assert "- Always applies" in rendered
+        assert "pagination" not in rendered and "Data tables" not in rendered
+        assert "- Charts" in rendered
+
+    def test_heading_without_items_dropped(self):
+        rendered = render_instructions(INSTRUCTIONS, {"list"})
+        assert "- Add pagination" in rendered
+        assert "Component types to consider" not in rendered
+
+
+class TestSubIntentAssembly:
+    """Test cases for sub-intent detection and prompt assembly in PromptManager."""
+
+    def test_spinner_request_drops_unrelated_guidance(self):
+        manager = PromptManager()
+        sub_intents = manager.detect_sub_intents(ComponentType.FEEDBACK, ["Create a loading spinner"])
+        prompt, version = manager.get_versioned_system_prompt(ComponentType.FEEDBACK, None, sub_intents)
+        full, full_version = manager.get_versioned_system_prompt(ComponentType.FEEDBACK)
+
+        assert sub_intents == ("loading",)
+        assert version == full_version
+        assert "Loading spinners" in prompt and "Tooltip" not in prompt and "Modal dialogs" not in prompt
+        assert len(prompt) < len(full)
+        assert prompt.startswith(manager.registry.current().base)
+
+    def test_detection_spans_user_turns_and_is_sorted(self):
+        manager = PromptManager()
+        sub_intents = manager.detect_sub_intents(
+            ComponentType.DATA_DISPLAY, ["Create a users table", "Now add a chart above it"]
+        )
+        assert sub_intents == ("chart", "table")
+        assert manager.detect_sub_intents(ComponentType.GENERAL, ["Create a table"]) == ()
+
+    def test_assembled_prompts_memoized(self):
+        manager = PromptManager()
+        first = manager.get_versioned_system_prompt(ComponentType.FEEDBACK, LEAN_FIELDS, ("toast",))[0]
+        assert manager.get_versioned_system_prompt(ComponentType.FEEDBACK, LEAN_FIELDS, ("toast",))[0] is first
+        assert '"usage"' not in first and "Toast notifications" in first
+
+    def test_sub_intent_keywords_part_of_version(self, tmp_path):
+        directory = tmp_path / "prompts"
+        shutil.copytree(DEFAULT_PROMPT_DIR, directory)
+        version = PromptRegistry(str(directory)).version
+
+        manifest = json.loads((directory / "manifest.json").read_text())
+        manifest["subIntents"]["feedback"]["loading"].append("busy indicator")
+        (directory / "manifest.json").write_text(json.dumps(manifest))
+        assert PromptRegistry(str(directory)).version != version
+
+        manifest["subIntents"]["feedback"] = ["spinner"]
+        (directory / "manifest.json").write_text(json.dumps(manifest))
+        with pytest.raises(PromptRegistryError):
+            PromptRegistry(str(directory))
+
+    def test_service_sends_assembled_prompt(self, fake_ai_service):
+        fake_ai_service.generate_component([{"role": "user", "content": "Create a toast notification"}])
+
+        system = fake_ai_service.client.messages.create.call_args.kwargs["system"]
+        assert "Toast notifications" in system and "Tooltip" not in system
+
+    def test_savings_report(self):
+        results = measure(CORPUS, PromptManager())
+
+        assert sum(row.prompts for row in results.values()) == len(CORPUS)
+        for type_name in ("data_display", "feedback", "navigation"):
+            assert results[type_name].assembled_tokens < results[type_name].full_tokens
+        assert results["general"].saved_percent == 0
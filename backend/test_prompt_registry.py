@@ -0,0 +1,109 @@
+"""
+Tests for the versioned prompt registry and its use by PromptManager.
+"""
+
+import os
+import json
+import shutil
+
+import pytest
+
+from utils.prompt_manager import PromptManager, ComponentType
+from utils.prompt_registry import DEFAULT_PROMPT_DIR, PromptRegistry, PromptRegistryError
+
+
+@pytest.fixture
+def prompt_dir(tmp_path):
+    """Writable copy of the bundled prompt files."""
+    directory = tmp_path / "prompts"
+    shutil.copytree(DEFAULT_PROMPT_DIR, directory)
+    return directory
+
+
+def _rewrite(path, text):
+    """Replace a file atomically and move its mtime forward."""
+    stat = os.stat(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    os.replace(tmp_path, path)
+    os.utime(path, (stat.st_atime + 10, stat.st_mtime + 10))
+
+
+class TestPromptRegistry:
+    """Test cases for PromptRegistry."""
+
+    def test_bundled_prompts_cover_every_type(self):
+        prompt_set = PromptRegistry().current()
+        for component_type in ComponentType:
+            assert prompt_set.assembled[component_type].startswith(prompt_set.base)
+            assert component_type.value in prompt_set.instructions
+
+    def test_version_combines_manifest_and_content(self, prompt_dir):
+        version = PromptRegistry(str(prompt_dir)).version
+        manifest = json.loads((prompt_dir / "manifest.json").read_text())
+        assert version.startswith(f"{manifest['version']}+")
+
+    def test_reloads_when_file_changes(self, prompt_dir):
+        registry = PromptRegistry(str(prompt_dir), check_interval=0)
+        old_version = registry.version
+
+        _rewrite(prompt_dir / "form.txt", "NEW FORM INSTRUCTIONS")
+
+        prompt_set = registry.current()
+        assert prompt_set.version != old_version
+        assert prompt_set.assembled[ComponentType.FORM].endswith("NEW FORM INSTRUCTIONS")
+
+    def test_respects_check_interval(self, prompt_dir):
+        registry = PromptRegistry(str(prompt_dir), check_interval=3600)
+        old_version = registry.version
+
+        _rewrite(prompt_dir / "form.txt", "NEW FORM INSTRUCTIONS")
+
+        assert registry.version == old_version
+
+    def test_failed_reload_keeps_previous_set(self, prompt_dir):
+        registry = PromptRegistry(str(prompt_dir), check_interval=0)
+        old_version = registry.version
+
+        _rewrite(prompt_dir / "manifest.json", "{not json")
+
+        assert registry.version == old_version
+
+    def test_missing_prompts_raise(self, tmp_path):
+        with pytest.raises(PromptRegistryError):
+            PromptRegistry(str(tmp_path))
+
+
+class TestPromptManagerVersioning:
+    """Test cases for versioned prompts in PromptManager and AIService."""
+
+    def test_versioned_prompt_is_consistent(self, prompt_dir):
+        manager = PromptManager(PromptRegistry(str(prompt_dir)))
+        prompt, version = manager.get_versioned_system_prompt(ComponentType.FORM)
+        assert prompt == manager.get_system_prompt(ComponentType.FORM)
+        assert version == manager.prompt_version
+
+    def test_local_override_changes_version(self, prompt_dir):
+        manager = PromptManager(PromptRegistry(str(prompt_dir)))
+        manager.update_component_instructions(ComponentType.FORM, "Only forms")
+
+        prompt, version = manager.get_versioned_system_prompt(ComponentType.FORM)
+        assert prompt.endswith("Only forms")
+        assert version.endswith("-local")
+        assert manager.get_versioned_system_prompt(ComponentType.NAVIGATION)[1] == manager.registry.version
+
+    def test_response_tagged_with_prompt_version(self, fake_ai_service):
+        response = fake_ai_service.generate_component([{"role": "user", "content": "Create a button"}])
+        assert response["promptVersion"] == fake_ai_service.prompt_manager.prompt_version
+
+    def test_prompt_change_invalidates_cache(self, fake_ai_service, prompt_dir):
+        fake_ai_service.prompt_manager = PromptManager(PromptRegistry(str(prompt_dir), check_interval=0))
+        messages = [{"role": "user", "content": "Create a button"}]
+
+        first = fake_ai_service.generate_component(messages)
+        _rewrite(prompt_dir / "general.txt", "SHORTER GENERAL INSTRUCTIONS")
+        second = fake_ai_service.generate_component(messages)
+
+        assert first["promptVersion"] != second["promptVersion"]
+        assert fake_ai_service.client.messages.create.call_count == 2
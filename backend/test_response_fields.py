@@ -0,0 +1,137 @@
+"""
+Tests for response field projection and the lean follow-up default.
+"""
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.prompt_manager import (
+    LEAN_FIELDS,
+    RESPONSE_FIELDS,
+    ComponentType,
+    PromptManager,
+    normalize_fields,
+)
+
+FIRST_TURN = [{"role": "user", "content": "Create a pricing card"}]
+
+
+def _sent_system_prompt(service):
+    return service.client.messages.create.call_args.kwargs["system"]
+
+
+class TestFieldSelection:
+    """Test cases for normalize_fields and prompt projection."""
+
+    def test_normalize_orders_and_adds_code(self):
+        assert normalize_fields(["usage", "description"]) == ("code", "description", "usage")
+        assert normalize_fields([]) == ("code",)
+
+    @pytest.mark.parametrize("fields", ["code", ["code", "analysis"], [1], {"code": True}])
+    def test_normalize_rejects_invalid(self, fields):
+        with pytest.raises(ValueError):
+            normalize_fields(fields)
+
+    def test_projected_prompt_only_asks_for_selected_fields(self):
+        manager = PromptManager()
+        full, version = manager.get_versioned_system_prompt(ComponentType.FORM)
+        lean, lean_version = manager.get_versioned_system_prompt(ComponentType.FORM, LEAN_FIELDS)
+
+        assert lean_version == version
+        assert '"usage"' in full and '"usage"' not in lean
+        assert '"description"' not in lean and '"dependencies"' not in lean
+        assert '"componentCode"' in lean and '"componentType"' in lean
+        # Everything outside the response format section is unchanged
+        assert lean.split("REQUIREMENTS:")[1] == full.split("REQUIREMENTS:")[1]
+
+    def test_projection_memoized_and_full_selection_unchanged(self):
+        manager = PromptManager()
+        first = manager.get_versioned_system_prompt(ComponentType.FORM, ("code", "usage"))[0]
+        assert manager.get_versioned_system_prompt(ComponentType.FORM, ("code", "usage"))[0] is first
+        assert (
+            manager.get_versioned_system_prompt(ComponentType.FORM, RESPONSE_FIELDS)
+            == manager.get_versioned_system_prompt(ComponentType.FORM)
+        )
+
+    def test_concurrent_misses_share_one_prompt(self):
+        manager = PromptManager()
+        selections = [
+            fields for size in range(1, len(RESPONSE_FIELDS))
+            for fields in itertools.combinations(RESPONSE_FIELDS, size)
+        ]
+        keys = [(component_type, normalize_fields(fields)) for component_type in ComponentType for fields in selections]
+
+        def build(key):
+            manager.assembled_prompt_keys()
+            return key, manager.get_versioned_system_prompt(*key)[0]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(build, keys * 4))
+
+        first = {}
+        for key, prompt in results:
+            assert first.setdefault(key, prompt) is prompt
+
+
+class TestServiceProjection:
+    """Test cases for field projection in AIService."""
+
+    def test_selected_fields_trim_prompt_and_output(self, fake_ai_service):
+        result = fake_ai_service.generate_component(FIRST_TURN, fields=["description"])
+
+        assert '"usage"' not in _sent_system_prompt(fake_ai_service)
+        assert result["schema"]["description"] == "A simple button"
+        assert "usage" not in result["schema"]
+        assert "dependencies" not in result["schema"]
+        assert result["responseFields"] == ["code", "description"]
+
+    def test_first_turn_defaults_to_all_fields(self, fake_ai_service):
+        result = fake_ai_service.generate_component(FIRST_TURN)
+
+        assert result["responseFields"] == list(RESPONSE_FIELDS)
+        assert result["schema"]["usage"] == "<Button />"
+
+    def test_follow_up_defaults_to_lean(self, fake_ai_service, sample_chat_messages):
+        result = fake_ai_service.generate_component(sample_chat_messages + [
+            {"role": "user", "content": "Make the button larger"}
+        ])
+
+        assert result["responseFields"] == list(LEAN_FIELDS)
+        assert '"description"' not in _sent_system_prompt(fake_ai_service)
+        assert set(result["schema"]) == {"title", "type", "fields"}
+
+    def test_lean_follow_ups_can_be_disabled(self, fake_ai_service, sample_chat_messages):
+        fake_ai_service.lean_follow_ups = False
+        result = fake_ai_service.generate_component(sample_chat_messages)
+        assert result["responseFields"] == list(RESPONSE_FIELDS)
+
+    def test_fields_part_of_cache_key(self, fake_ai_service):
+        fake_ai_service.generate_component(FIRST_TURN, fields=["code"])
+        fake_ai_service.generate_component(FIRST_TURN, fields=["code"])
+        fake_ai_service.generate_component(FIRST_TURN)
+
+        assert fake_ai_service.client.messages.create.call_count == 2
+
+    def test_unknown_field_rejected(self, fake_ai_service):
+        with pytest.raises(ValueError):
+            fake_ai_service.generate_component(FIRST_TURN, fields=["analysis"])
+        fake_ai_service.client.messages.create.assert_not_called()
+
+
+class TestChatEndpointFields:
+    """Test cases for the fields selector on /api/chat."""
+
+    def test_fields_passed_to_service(self, client, mock_anthropic_client):
+        response = client.post("/api/chat", json={"messages": FIRST_TURN, "fields": ["usage"]})
+
+        assert response.status_code == 200
+        assert mock_anthropic_client.generate_component.call_args.kwargs["fields"] == ["usage"]
+
+    def test_invalid_fields(self, client, mock_anthropic_client):
+        response = client.post("/api/chat", json={"messages": FIRST_TURN, "fields": "code"})
+
+        assert response.status_code == 400
+        assert response.get_json()["error"]["type"] == "validation_error"
+        mock_anthropic_client.generate_component.assert_not_called()
@@ -0,0 +1,176 @@
+"""
+Tests for warm-start snapshots of AIService state.
+"""
+
+import pytest
+
+from services.snapshot import ServiceSnapshotter, SnapshotError, decode_snapshot, encode_snapshot
+from utils.cache import MemoryCache
+
+PROMPT = [{"role": "user", "content": "Create a toast notification"}]
+
+
+def _new_service(sample_component_payload):
+    from unittest.mock import Mock
+
+    from conftest import make_claude_response
+    from services.ai_service import AIService
+    from utils.code_analysis import CodeAnalyzer
+
+    service = AIService(api_key=None, cache=MemoryCache(), code_analyzer=CodeAnalyzer(max_workers=0))
+    service.client = Mock()
+    service.client.messages.create.return_value = make_claude_response(sample_component_payload)
+    return service
+
+
+@pytest.fixture
+def new_service(sample_component_payload):
+    return lambda: _new_service(sample_component_payload)
+
+
+class TestSnapshotFormat:
+    """Test cases for encode_snapshot and decode_snapshot."""
+
+    def test_round_trip(self):
+        state = {"format": 1, "promptVersion": "abc", "cache": [["k", {"code": "<Toast />"}]]}
+        assert decode_snapshot(encode_snapshot(state)) == state
+
+    @pytest.mark.parametrize("damage", [
+        lambda data: data[:-10],
+        lambda data: data[:20],
+        lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+        lambda data: b"garbage" + data,
+    ])
+    def test_damaged_data_rejected(self, damage):
+        with pytest.raises(SnapshotError):
+            decode_snapshot(damage(encode_snapshot({"format": 1})))
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(SnapshotError):
+            decode_snapshot(encode_snapshot({"format": 99}))
+
+
+class TestMemoryCachePreload:
+    """Test cases for MemoryCache.hot_entries and preload."""
+
+    def test_hot_entries_and_preload_keep_recency(self):
+        source = MemoryCache()
+        for key in ("a", "b", "c"):
+            source.set(key, {"code": key})
+        source.get("a")
+
+        target = MemoryCache(max_entries=2)
+        target.set("b", {"code": "newer"})
+        assert target.preload(source.hot_entries(3)) == 2
+
+        # "b" was cached after startup and is kept; snapshot entries rank below it
+        assert target.get("b") == {"code": "newer"}
+        assert [key for key, _ in target.hot_entries(2)] == ["a", "b"]
+        assert target.get("c") is None
+
+
+class TestServiceSnapshotter:
+    """Test cases for ServiceSnapshotter."""
+
+    def test_warm_start_serves_from_cache(self, new_service, tmp_path):
+        path = str(tmp_path / "state.snapshot")
+        old = new_service()
+        old.generate_component(PROMPT)
+        old.tenants.record_latency("acme", 0.25)
+        assert ServiceSnapshotter(old, path).save()["cacheEntries"] == 1
+
+        new = new_service()
+        summary = ServiceSnapshotter(new, path).load()
+        assert summary["restored"] and summary["promptVersionMatched"]
+        assert summary["cacheEntries"] == 1 and summary["prompts"] >= 1
+
+        result = new.generate_component(PROMPT)
+        assert new.client.messages.create.call_count == 0
+        assert result["code"] == old.cache.hot_entries(1)[0][1]["code"]
+        assert new.tenants.latency_samples()["acme"] == [0.25]
+        assert new.prompt_manager.assembled_prompt_keys() == old.prompt_manager.assembled_prompt_keys()
+
+    def test_prompt_version_mismatch_keeps_latencies_only(self, new_service, tmp_path):
+        path = str(tmp_path / "state.snapshot")
+        old = new_service()
+        old.generate_component(PROMPT)
+        old.tenants.record_latency("acme", 0.25)
+        snapshotter = ServiceSnapshotter(old, path)
+        state = snapshotter.capture()
+        state["promptVersion"] = "retired"
+        (tmp_path / "state.snapshot").write_bytes(encode_snapshot(state))
+
+        new = new_service()
+        summary = ServiceSnapshotter(new, path).load()
+
+        assert summary["restored"] and not summary["promptVersionMatched"]
+        assert summary["cacheEntries"] == 0
+        assert new.cache.hot_entries(10) == []
+        assert new.tenants.latency_samples()["acme"] == [0.25]
+
+    def test_missing_or_corrupted_file_ignored(self, new_service, tmp_path):
+        path = tmp_path / "state.snapshot"
+        service = new_service()
+        snapshotter = ServiceSnapshotter(service, str(path))
+        assert snapshotter.load()["restored"] is False
+
+        path.write_bytes(b"AICB-SNAPSHOT\nnot a checksum\n\x00\x01")
+        assert snapshotter.load()["restored"] is False
+        assert service.cache.hot_entries(10) == []
+
+    def test_malformed_content_ignored(self, new_service, tmp_path):
+        path = tmp_path / "state.snapshot"
+        service = new_service()
+        path.write_bytes(encode_snapshot({
+            "format": 1, "promptVersion": service.prompt_manager.prompt_version, "cache": [1, 2]
+        }))
+        assert ServiceSnapshotter(service, str(path)).load()["restored"] is False
+
+    def test_empty_service_does_not_overwrite(self, new_service, tmp_path):
+        path = tmp_path / "state.snapshot"
+        path.write_bytes(b"previous")
+        assert ServiceSnapshotter(new_service(), str(path)).save() is None
+        assert path.read_bytes() == b"previous"
+
+    def test_loaded_at_startup_from_env(self, new_service, tmp_path, monkeypatch):
+        path = str(tmp_path / "state.snapshot")
+        old = new_service()
+        old.generate_component(PROMPT)
+        ServiceSnapshotter(old, path).save()
+
+        monkeypatch.setenv("SNAPSHOT_PATH", path)
+        monkeypatch.setenv("SNAPSHOT_INTERVAL_SECONDS", "3600")
+        new = new_service()
+        try:
+            assert new.snapshots.last_load["cacheEntries"] == 1
+            assert new.snapshots.interval == 3600
+        finally:
+            new.snapshots.stop()
+
+
+class TestAdminEndpoint:
+    """Test cases for /api/admin/snapshot."""
+
+    def test_not_configured(self, client, fake_ai_service, monkeypatch):
+        from test_tenancy import _Static
+
+        monkeypatch.setitem(client.application.config, "ADMIN_TOKEN", "s3cret")
+        monkeypatch.setitem(client.application.extensions, "ai_service", _Static(fake_ai_service))
+        response = client.get("/api/admin/snapshot", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 503
+
+    def test_save_now(self, client, new_service, tmp_path, monkeypatch):
+        from test_tenancy import _Static
+
+        service = new_service()
+        service.snapshots = ServiceSnapshotter(service, str(tmp_path / "state.snapshot"))
+        service.generate_component(PROMPT)
+        monkeypatch.setitem(client.application.config, "ADMIN_TOKEN", "s3cret")
+        monkeypatch.setitem(client.application.extensions, "ai_service", _Static(service))
+
+        response = client.post("/api/admin/snapshot", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 200
+        assert response.get_json()["snapshot"]["cacheEntries"] == 1
+
+        status = client.get("/api/admin/snapshot", headers={"X-Admin-Token": "s3cret"}).get_json()
+        assert status["lastSave"]["cacheEntries"] == 1
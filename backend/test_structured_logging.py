@@ -0,0 +1,133 @@
+"""
+Tests for structured, queue-based logging and request ids.
+"""
+
+import io
+import json
+import queue
+import logging
+
+import pytest
+
+from utils.structured_logging import (
+    NO_REQUEST_ID,
+    DroppingQueueHandler,
+    JSONFormatter,
+    SamplingFilter,
+    configure_logging,
+    request_id_var,
+)
+
+
+def _record(message="hello %s", args=("world",), level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def log_output():
+    """Route logging to a buffer, restoring the default setup afterwards"""
+    stream = io.StringIO()
+    controller = configure_logging(level="INFO", log_format="json", stream=stream)
+    yield controller, stream
+    configure_logging()
+
+
+class TestJSONFormatter:
+    """Test cases for JSONFormatter."""
+
+    def test_fields(self):
+        entry = json.loads(JSONFormatter().format(_record(request_id="abc", tenant="acme")))
+
+        assert entry["message"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["requestId"] == "abc"
+        assert entry["tenant"] == "acme"
+
+    def test_rendered_exception(self):
+        entry = json.loads(JSONFormatter().format(_record(exc_text="Traceback ...")))
+        assert entry["exception"] == "Traceback ..."
+
+
+class TestFiltersAndQueue:
+    """Test cases for sampling and the dropping queue handler."""
+
+    def test_sampling_keeps_warnings(self):
+        sampler = SamplingFilter(0.0)
+
+        assert not sampler.filter(_record())
+        assert sampler.filter(_record(level=logging.WARNING))
+        assert sampler.sampled_out == 1
+
+    def test_sampling_is_consistent_per_request(self):
+        sampler = SamplingFilter(0.5)
+        decisions = {
+            sampler.filter(_record(request_id="request-42")) for _ in range(20)
+        }
+        assert len(decisions) == 1
+
+    def test_overflow_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record())
+
+        assert handler.enqueued == 2
+        assert handler.dropped == 3
+
+    def test_prepare_merges_arguments(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        prepared = handler.prepare(_record())
+
+        assert prepared.msg == "hello world"
+        assert prepared.args is None
+
+
+class TestConfigureLogging:
+    """Test cases for the background writer."""
+
+    def test_records_written_as_json_with_request_id(self, log_output):
+        controller, stream = log_output
+        token = request_id_var.set("req-1")
+        try:
+            logging.getLogger("test.structured").info("Generated %s variants", 3)
+        finally:
+            request_id_var.reset(token)
+        controller.stop()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        entry = next(e for e in entries if e["logger"] == "test.structured")
+        assert entry["message"] == "Generated 3 variants"
+        assert entry["requestId"] == "req-1"
+
+    def test_sampled_out_records_are_never_formatted(self, log_output):
+        controller, _stream = log_output
+        controller.sampler.rate = 0.0
+        formatted = []
+
+        class Expensive:
+            def __str__(self):
+                formatted.append(True)
+                return "expensive"
+
+        controller.handler.handle(_record("value: %s", (Expensive(),)))
+
+        assert formatted == []
+        assert controller.stats()["sampledOut"] == 1
+
+
+class TestRequestIds:
+    """Test cases for request id propagation in the app."""
+
+    def test_generated_and_echoed(self, client):
+        response = client.get("/health")
+        assert len(response.headers["X-Request-ID"]) == 32
+
+    def test_client_id_reused(self, client):
+        response = client.get("/health", headers={"X-Request-ID": "trace-123"})
+        assert response.headers["X-Request-ID"] == "trace-123"
+
+    def test_unsafe_client_id_replaced(self, client):
+        response = client.get("/health", headers={"X-Request-ID": "bad id; DROP"})
+        assert response.headers["X-Request-ID"] != "bad id; DROP"
+        assert request_id_var.get() == NO_REQUEST_ID
@@ -0,0 +1,271 @@
+"""
+Tests for tenant identification, fair scheduling and per-tenant budgets.
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.tenancy import (
+    DEFAULT_TENANT,
+    BudgetExceededError,
+    FairScheduler,
+    SchedulerTimeout,
+    TenantAccounting,
+    TenantResolver,
+    parse_weights,
+)
+
+
+class TestTenantIdentification:
+    """Test cases for TenantResolver."""
+
+    def test_configured_api_key(self):
+        resolver = TenantResolver(api_keys={"secret-key": "acme"})
+        assert resolver.resolve({"X-API-Key": "secret-key"}) == "acme"
+        assert resolver.resolve({"Authorization": "Bearer secret-key"}) == "acme"
+        assert "secret-key" not in repr(vars(resolver))
+
+    def test_unknown_credentials_are_default_tenant(self):
+        resolver = TenantResolver(api_keys={"secret-key": "acme"})
+        assert resolver.resolve({"X-API-Key": "guessed"}) == DEFAULT_TENANT
+        assert resolver.resolve({"X-Tenant-ID": "acme"}) == DEFAULT_TENANT
+        assert resolver.resolve({}) == DEFAULT_TENANT
+
+    def test_allow_listed_header(self):
+        resolver = TenantResolver(header_tenants=["acme"])
+        assert resolver.resolve({"X-Tenant-ID": "acme"}) == "acme"
+        assert resolver.resolve({"X-Tenant-ID": "rotated-1"}) == DEFAULT_TENANT
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("TENANT_API_KEYS", "acme=k1=x, globex=k2")
+        monkeypatch.setenv("TENANT_HEADER_IDS", "initech")
+        resolver = TenantResolver.from_env()
+
+        assert resolver.resolve({"X-API-Key": "k1=x"}) == "acme"
+        assert resolver.resolve({"X-API-Key": "k2"}) == "globex"
+        assert resolver.resolve({"X-Tenant-ID": "initech"}) == "initech"
+
+    def test_parse_weights(self):
+        assert parse_weights("batch=0.5, ui=2") == {"batch": 0.5, "ui": 2.0}
+        assert parse_weights(None) == {}
+
+
+class TestFairScheduler:
+    """Test cases for FairScheduler."""
+
+    def _occupy(self, scheduler, tenant):
+        """Hold the only slot until the returned event is set"""
+        release = threading.Event()
+        acquired = threading.Event()
+
+        def hold():
+            with scheduler.slot(tenant):
+                acquired.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait()
+        return release, thread
+
+    def test_interactive_tenant_jumps_noisy_backlog(self):
+        scheduler = FairScheduler(1)
+        release, holder = self._occupy(scheduler, "noisy")
+        order = []
+        lock = threading.Lock()
+
+        def request(tenant):
+            with scheduler.slot(tenant):
+                with lock:
+                    order.append(tenant)
+
+        threads = [threading.Thread(target=request, args=("noisy",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while scheduler.queue_depth < 5:
+            time.sleep(0.001)
+
+        interactive = threading.Thread(target=request, args=("interactive",))
+        interactive.start()
+        while scheduler.queue_depth < 6:
+            time.sleep(0.001)
+
+        release.set()
+        for thread in [holder, interactive, *threads]:
+            thread.join()
+
+        assert order.index("interactive") <= 1
+        assert scheduler.queue_depth == 0
+
+    def test_weights_skew_share(self):
+        scheduler = FairScheduler(1, weights={"heavy": 3.0})
+        release, holder = self._occupy(scheduler, "other")
+        order = []
+        lock = threading.Lock()
+
+        def request(tenant):
+            with scheduler.slot(tenant):
+                with lock:
+                    order.append(tenant)
+
+        threads = []
+        for _ in range(4):
+            for tenant in ("heavy", "light"):
+                thread = threading.Thread(target=request, args=(tenant,))
+                thread.start()
+                threads.append(thread)
+        while scheduler.queue_depth < 8:
+            time.sleep(0.001)
+
+        release.set()
+        for thread in [holder, *threads]:
+            thread.join()
+
+        assert order[:4].count("heavy") >= 3
+
+    def test_timeout_leaves_queue(self):
+        scheduler = FairScheduler(1)
+        release, holder = self._occupy(scheduler, "a")
+
+        with pytest.raises(SchedulerTimeout):
+            scheduler.acquire("b", timeout=0.02)
+        assert scheduler.queue_depth == 0
+
+        release.set()
+        holder.join()
+        assert scheduler.stats()["inFlight"] == 0
+
+
+    def test_finished_tenants_forgotten(self):
+        scheduler = FairScheduler(2)
+        for index in range(50):
+            with scheduler.slot(f"rotated-{index}"):
+                pass
+
+        assert scheduler._last_finish == {}
+
+
+class TestTenantAccounting:
+    """Test cases for TenantAccounting budgets and stats."""
+
+    def test_token_budget(self):
+        accounting = TenantAccounting(window_seconds=60, max_tokens=1000)
+        accounting.check("a")
+        accounting.record_usage("a", 600, 500)
+
+        with pytest.raises(BudgetExceededError) as exc_info:
+            accounting.check("a")
+        assert 0 < exc_info.value.retry_after <= 60
+        accounting.check("b")
+
+    def test_request_budget_rolls_over(self):
+        accounting = TenantAccounting(window_seconds=0.05, max_requests=1)
+        accounting.record_usage("a", 1, 1)
+        with pytest.raises(BudgetExceededError):
+            accounting.check("a")
+        time.sleep(0.06)
+        accounting.check("a")
+
+    def test_zero_budget_disables_limit(self, monkeypatch):
+        monkeypatch.setenv("TENANT_REQUEST_BUDGET", "0")
+        accounting = TenantAccounting.from_env()
+        accounting.check("a")
+        assert accounting.max_requests is None
+
+        with pytest.raises(ValueError):
+            TenantAccounting(max_tokens=-1)
+
+    def test_idle_tenants_evicted(self):
+        accounting = TenantAccounting(window_seconds=0.01, idle_seconds=0.02)
+        for index in range(100):
+            accounting.record_latency(f"rotated-{index}", 0.1)
+        time.sleep(0.03)
+        accounting.record_latency("active", 0.1)
+
+        assert list(accounting.stats()) == ["active"]
+
+    def test_stats(self):
+        accounting = TenantAccounting()
+        accounting.record_usage("a", 100, 50)
+        for seconds in (0.1, 0.2, 0.3):
+            accounting.record_latency("a", seconds)
+
+        stats = accounting.stats()["a"]
+        assert stats["requests"] == 3
+        assert stats["inputTokens"] == 100
+        assert stats["windowTokens"] == 150
+        assert stats["p50Ms"] == 200.0
+        assert stats["p95Ms"] == 300.0
+
+
+class TestServiceIntegration:
+    """Test cases for tenancy in AIService and the API."""
+
+    def test_usage_recorded_per_tenant(self, fake_ai_service):
+        fake_ai_service.generate_component(
+            [{"role": "user", "content": "Create a button"}], tenant="acme"
+        )
+
+        stats = fake_ai_service.tenants.stats()["acme"]
+        assert stats["requests"] == 1
+        assert stats["inputTokens"] == 100
+
+    def test_over_budget_returns_429(self, client, mock_anthropic_client, sample_chat_messages, monkeypatch):
+        monkeypatch.setitem(client.application.extensions, "tenant_resolver", TenantResolver(header_tenants=["acme"]))
+        mock_anthropic_client.generate_component.side_effect = BudgetExceededError(
+            "Tenant budget exceeded", retry_after=12.3
+        )
+
+        response = client.post(
+            "/api/chat",
+            json={"messages": sample_chat_messages},
+            headers={"X-Tenant-ID": "acme"},
+        )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "13"
+        assert response.get_json()["error"]["type"] == "rate_limit_error"
+        assert mock_anthropic_client.generate_component.call_args.kwargs["tenant"] == "acme"
+
+    def test_budget_checked_before_upstream(self, fake_ai_service):
+        fake_ai_service.tenants = TenantAccounting(max_requests=1)
+        messages = [{"role": "user", "content": "Create a button"}]
+        fake_ai_service.cache = None
+        fake_ai_service.generate_component(messages, tenant="acme")
+
+        with pytest.raises(BudgetExceededError):
+            fake_ai_service.generate_component(messages, tenant="acme")
+        assert fake_ai_service.client.messages.create.call_count == 1
+
+
+class TestAdminEndpoint:
+    """Test cases for /api/admin/tenants."""
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        monkeypatch.setitem(client.application.config, "ADMIN_TOKEN", None)
+        assert client.get("/api/admin/tenants").status_code == 404
+
+    def test_requires_token(self, client, fake_ai_service, monkeypatch):
+        monkeypatch.setitem(client.application.config, "ADMIN_TOKEN", "s3cret")
+        monkeypatch.setitem(client.application.extensions, "ai_service", _Static(fake_ai_service))
+        fake_ai_service.tenants.record_latency("acme", 0.1)
+
+        assert client.get("/api/admin/tenants").status_code == 401
+        response = client.get("/api/admin/tenants", headers={"X-Admin-Token": "s3cret"})
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["tenants"]["acme"]["requests"] == 1
+        assert body["scheduler"]["capacity"] == fake_ai_service.max_concurrency
+
+
+class _Static:
+    """Stand-in for a LazyService wrapping an already built service"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def get(self):
+        return self._service
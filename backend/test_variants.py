@@ -0,0 +1,157 @@
+"""
+Tests for parallel N-variant generation.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from conftest import make_claude_response
+from services.ai_service import MAX_VARIANTS
+from services.tenancy import DEFAULT_TENANT, FairScheduler
+
+
+def _payload(code):
+    return {
+        "componentCode": code,
+        "componentType": "general",
+        "dependencies": [],
+        "description": "Variant",
+        "usage": "",
+    }
+
+
+class TestGenerateVariants:
+    """Test cases for AIService.generate_variants."""
+
+    def test_returns_one_entry_per_unique_variant(self, fake_ai_service):
+        calls = iter(range(100))
+        fake_ai_service.client.messages.create.side_effect = (
+            lambda **kwargs: make_claude_response(_payload(f"code {next(calls)}"))
+        )
+
+        result = fake_ai_service.generate_variants(
+            [{"role": "user", "content": "Create a button"}], 3
+        )
+
+        assert len(result["variants"]) == 3
+        assert result["requested"] == 3
+        assert result["duplicates"] == 0
+        for variant in result["variants"]:
+            assert "code" in variant
+            assert "schema" in variant
+            assert variant["elapsedMs"] >= 0
+        assert sorted(v["index"] for v in result["variants"]) == [0, 1, 2]
+
+    def test_varies_temperature_and_style(self, fake_ai_service):
+        fake_ai_service.generate_variants(
+            [{"role": "user", "content": "Create a button"}], 3
+        )
+
+        calls = fake_ai_service.client.messages.create.call_args_list
+        temperatures = {call.kwargs["temperature"] for call in calls}
+        systems = {call.kwargs["system"] for call in calls}
+        assert len(temperatures) == 3
+        assert len(systems) == 3
+
+    def test_deduplicates_identical_outputs(self, fake_ai_service):
+        fake_ai_service.client.messages.create.side_effect = [
+            make_claude_response(_payload("same  code")),
+            make_claude_response(_payload("same code")),
+            make_claude_response(_payload("other code")),
+        ]
+
+        result = fake_ai_service.generate_variants(
+            [{"role": "user", "content": "Create a button"}], 3
+        )
+
+        assert len(result["variants"]) == 2
+        assert result["duplicates"] == 1
+
+    def test_runs_concurrently_within_bound(self, fake_ai_service):
+        fake_ai_service.max_concurrency = 2
+        fake_ai_service.scheduler = FairScheduler(2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+        counter = iter(range(100))
+
+        def slow_create(**kwargs):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return make_claude_response(_payload(f"code {next(counter)}"))
+
+        fake_ai_service.client.messages.create.side_effect = slow_create
+
+        started = time.perf_counter()
+        result = fake_ai_service.generate_variants(
+            [{"role": "user", "content": "Create a button"}], 4
+        )
+        elapsed = time.perf_counter() - started
+
+        assert len(result["variants"]) == 4
+        assert max(peak) == 2
+        assert elapsed < 0.05 * 4
+
+    def test_failed_variants_are_reported(self, fake_ai_service):
+        fake_ai_service.client.messages.create.side_effect = [
+            make_claude_response(_payload("good code")),
+            make_claude_response("not json"),
+        ]
+
+        result = fake_ai_service.generate_variants(
+            [{"role": "user", "content": "Create a button"}], 2
+        )
+
+        assert len(result["variants"]) == 1
+        assert len(result["errors"]) == 1
+
+    def test_rejects_out_of_range_count(self, fake_ai_service):
+        with pytest.raises(ValueError):
+            fake_ai_service.generate_variants(
+                [{"role": "user", "content": "Create a button"}],
+                MAX_VARIANTS + 1,
+            )
+
+
+class TestVariantsEndpoint:
+    """Test cases for the variants parameter on /api/chat."""
+
+    def test_variants_dispatches_to_generate_variants(
+        self, client, mock_anthropic_client, sample_chat_messages
+    ):
+        mock_anthropic_client.generate_variants.return_value = {
+            "variants": [{"code": "a"}, {"code": "b"}],
+            "requested": 2,
+        }
+
+        response = client.post(
+            "/api/chat",
+            json={"messages": sample_chat_messages, "variants": 2},
+        )
+
+        assert response.status_code == 200
+        assert len(response.get_json()["variants"]) == 2
+        mock_anthropic_client.generate_variants.assert_called_once_with(
+            sample_chat_messages, 2, tenant=DEFAULT_TENANT, deadline=None, fields=None
+        )
+        mock_anthropic_client.generate_component.assert_not_called()
+
+    @pytest.mark.parametrize("variants", [0, MAX_VARIANTS + 1, "3", True])
+    def test_invalid_variants_rejected(
+        self, client, mock_anthropic_client, sample_chat_messages, variants
+    ):
+        response = client.post(
+            "/api/chat",
+            data=json.dumps({"messages": sample_chat_messages, "variants": variants}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+        assert response.get_json()["error"]["type"] == "validation_error"
@@ -0,0 +1,237 @@
+"""
+Tests for the WebSocket chat channel.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import Mock
+
+import pytest
+
+from api.websocket import ChatSession, websocket_available
+from conftest import make_claude_response
+from services.health import CircuitBreaker
+
+
+class FakeSocket:
+    """Collects sent frames"""
+
+    def __init__(self):
+        self.frames = []
+        self._lock = threading.Lock()
+
+    def send(self, data):
+        with self._lock:
+            self.frames.append(json.loads(data))
+
+    def of_type(self, frame_type, turn_id=None):
+        return [
+            frame for frame in list(self.frames)
+            if frame["type"] == frame_type and (turn_id is None or frame.get("id") == turn_id)
+        ]
+
+
+def _wait_for(predicate, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@pytest.fixture
+def streaming_service(fake_ai_service, sample_component_payload):
+    """fake_ai_service whose client also supports messages.stream"""
+    text = json.dumps(sample_component_payload)
+
+    @contextmanager
+    def stream(**_kwargs):
+        yield Mock(
+            text_stream=iter([text[i:i + 40] for i in range(0, len(text), 40)]),
+            get_final_message=Mock(return_value=make_claude_response(sample_component_payload)),
+        )
+
+    fake_ai_service.client.messages.stream.side_effect = stream
+    return fake_ai_service
+
+
+@pytest.fixture
+def session(streaming_service):
+    ws = FakeSocket()
+    session = ChatSession(ws, streaming_service, tenant="acme", connection_id="conn", max_streams=2)
+    yield session
+    session.close()
+
+
+def _chat(session, turn_id, **fields):
+    session.handle(json.dumps({"type": "chat", "id": turn_id, **fields}))
+
+
+class TestChatSession:
+    """Test cases for ChatSession."""
+
+    def test_turn_streams_progress_chunks_and_result(self, session, sample_component_payload):
+        _chat(session, "t1", messages=[{"role": "user", "content": "Create a button"}])
+        assert _wait_for(lambda: session.ws.of_type("result", "t1"))
+
+        frames = [frame for frame in session.ws.frames if frame.get("id") == "t1"]
+        assert frames[0]["type"] == "accepted"
+        assert frames[-1]["type"] == "result"
+        stages = [frame["stage"] for frame in frames if frame["type"] == "progress"]
+        assert stages == ["classified", "generating"]
+        streamed = "".join(frame["text"] for frame in frames if frame["type"] == "chunk")
+        assert streamed == json.dumps(sample_component_payload)
+        assert frames[-1]["data"]["componentId"]
+
+    def test_concurrent_turns_share_socket(self, session, streaming_service):
+        _chat(session, "a", messages=[{"role": "user", "content": "Create a button"}])
+        _chat(session, "b", messages=[{"role": "user", "content": "Create a modal"}])
+
+        assert _wait_for(lambda: session.ws.of_type("result", "a") and session.ws.of_type("result", "b"))
+        assert streaming_service.client.messages.stream.call_count == 2
+
+    def test_server_side_history(self, session, streaming_service):
+        _chat(session, "t1", content="Create a button", conversation="main")
+        assert _wait_for(lambda: session.ws.of_type("result", "t1"))
+        _chat(session, "t2", content="Make it red", conversation="main")
+        assert _wait_for(lambda: session.ws.of_type("result", "t2"))
+
+        sent = streaming_service.client.messages.stream.call_args.kwargs["messages"]
+        assert [message["role"] for message in sent] == ["user", "assistant", "user"]
+        content = sent[1]["content"]
+        reply = json.loads(content if isinstance(content, str) else content[0]["text"])
+        first = session.ws.of_type("result", "t1")[0]["data"]
+        assert reply == {"code": first["code"], "schema": first["schema"]}
+        assert len(session.conversations.messages("main")) == 4
+
+        session.handle(json.dumps({"type": "reset", "conversation": "main"}))
+        assert "main" not in session.conversations
+
+    def test_edit_earlier_turn_reuses_history(self, session, streaming_service):
+        _chat(session, "t1", content="Create a button", conversation="main")
+        assert _wait_for(lambda: session.ws.of_type("result", "t1"))
+        _chat(session, "t2", content="Make it red", conversation="main")
+        assert _wait_for(lambda: session.ws.of_type("result", "t2"))
+        first = session.ws.of_type("result", "t1")[0]
+
+        # Replace "Make it red" on a fork starting after the first reply
+        session.handle(json.dumps({"type": "fork", "conversation": "alt", "at": first["turnId"]}))
+        assert session.ws.of_type("forked")[0]["head"] == first["turnId"]
+        _chat(session, "t3", content="Make it blue", conversation="alt")
+        assert _wait_for(lambda: session.ws.of_type("result", "t3"))
+
+        main = session.conversations.messages("main")
+        alt = session.conversations.messages("alt")
+        assert [m["content"] for m in alt][2] == "Make it blue"
+        assert main[1] is alt[1] and main[2] is not alt[2]
+        assert session.conversations.stats()["turns"] == 6
+
+        # Regenerating the reply in place moves the branch, dropping the old reply
+        _chat(session, "t4", content="Make it red", conversation="main", parent=first["turnId"])
+        assert _wait_for(lambda: session.ws.of_type("result", "t4"))
+        assert len(session.conversations.messages("main")) == 4
+        assert session.conversations.stats()["turns"] == 6
+
+    def test_unknown_parent_rejected(self, session, streaming_service):
+        _chat(session, "t1", content="Create a button", conversation="main", parent="n99")
+        session.handle(json.dumps({"type": "fork", "conversation": "alt", "at": "n99"}))
+
+        assert len(session.ws.of_type("error")) == 2
+        streaming_service.client.messages.stream.assert_not_called()
+
+    def test_invalid_frames(self, session):
+        session.handle("not json")
+        _chat(session, "bad id", messages=[{"role": "user", "content": "x"}])
+        _chat(session, "t1")
+        _chat(session, "t2", messages=[{"role": "user", "content": "x"}], deadlineMs=-5)
+
+        errors = session.ws.of_type("error")
+        assert len(errors) == 4
+        assert all(error["error"]["type"] == "validation_error" for error in errors)
+        assert not session.ws.of_type("accepted")
+
+    def test_stream_limit(self, session, streaming_service):
+        release = threading.Event()
+        streaming_service.is_available = lambda: release.wait(5) or True
+        for turn_id in ("a", "b", "c"):
+            _chat(session, turn_id, messages=[{"role": "user", "content": "Create a button"}])
+
+        error = session.ws.of_type("error", "c")[0]["error"]
+        assert error["type"] == "rate_limit_error"
+        release.set()
+        assert _wait_for(lambda: session.ws.of_type("result", "b"))
+
+    def test_generation_errors_keep_http_shape(self, session, streaming_service):
+        streaming_service.circuit = CircuitBreaker(failure_threshold=1)
+        streaming_service.circuit.record_failure()
+
+        _chat(session, "t1", messages=[{"role": "user", "content": "Create a button"}])
+        assert _wait_for(lambda: session.ws.of_type("error", "t1"))
+
+        error = session.ws.of_type("error", "t1")[0]["error"]
+        assert error["status"] == 503
+        assert error["retry"] is True
+
+    def test_close_cancels_running_turn(self, session, streaming_service):
+        streaming = threading.Event()
+        closed = threading.Event()
+
+        def text_stream():
+            for _ in range(100):
+                streaming.set()
+                yield "x" * 300
+                time.sleep(0.01)
+
+        @contextmanager
+        def stream(**_kwargs):
+            try:
+                yield Mock(text_stream=text_stream())
+            finally:
+                closed.set()
+
+        streaming_service.client.messages.stream.side_effect = stream
+        _chat(session, "t1", messages=[{"role": "user", "content": "Create a button"}])
+        assert streaming.wait(5)
+
+        session.close()
+        assert closed.wait(5)
+        assert _wait_for(lambda: not session._active)
+        assert len(session.ws.of_type("chunk", "t1")) < 100
+        assert not session.ws.of_type("error", "t1")
+        assert streaming_service.circuit.stats()["consecutiveFailures"] == 0
+        assert "acme" not in streaming_service.tenants.stats() or \
+            streaming_service.tenants.stats()["acme"]["inputTokens"] == 0
+
+    def test_ping(self, session):
+        session.handle(json.dumps({"type": "ping"}))
+        assert session.ws.frames == [{"type": "pong"}]
+
+
+@pytest.mark.skipif(not websocket_available(), reason="flask-sock not installed")
+def test_websocket_endpoint(streaming_service, monkeypatch):
+    """End-to-end over a real socket"""
+    from simple_websocket import Client
+    from werkzeug.serving import make_server
+    from app import app as flask_app
+
+    monkeypatch.setitem(flask_app.extensions, "ai_service", streaming_service)
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        ws = Client.connect(f"ws://127.0.0.1:{server.server_port}/api/ws")
+        try:
+            ws.send(json.dumps({"type": "chat", "id": "t1", "content": "Create a button"}))
+            frames = []
+            while not frames or frames[-1]["type"] not in ("result", "error"):
+                frames.append(json.loads(ws.receive(timeout=5)))
+        finally:
+            ws.close()
+    finally:
+        server.shutdown()
+
+    assert frames[-1]["type"] == "result"
+    assert all(frame["id"] == "t1" for frame in frames)
@@ -6,5 +6,16 @@ caching, validation, and other helper functionality.
 """
 
 from .prompt_manager import PromptManager, ComponentType
+from .prompt_registry import PromptRegistry, PromptRegistryError
+from .cache import ResponseCache, MemoryCache, SQLiteCache, build_cache_from_env
 
-__all__ = ['PromptManager', 'ComponentType']
+__all__ = [
+    'PromptManager',
+    'ComponentType',
+    'PromptRegistry',
+    'PromptRegistryError',
+    'ResponseCache',
+    'MemoryCache',
+    'SQLiteCache',
+    'build_cache_from_env',
+]
@@ -0,0 +1,345 @@
+"""
+Response caching for the AI Component Builder backend.
+
+This module provides the cache backends used by AIService to reuse generated
+components for identical requests. The in-process MemoryCache is private to a
+single worker, while SQLiteCache keeps entries in a WAL-mode database file that
+every worker on the same host shares without an external service.
+"""
+
+import os
+import copy
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, List, Tuple
+
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Last-access timestamps are only rewritten when older than this, so hot keys
+# do not turn every read into a write transaction.
+TOUCH_INTERVAL_SECONDS = 1.0
+
+
+def make_cache_key(
+    model: str,
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    max_tokens: int,
+    prompt_version: str = "",
+) -> str:
+    """
+    Build a stable cache key for an upstream generation request
+
+    Args:
+        model: Model identifier
+        system_prompt: Full system prompt sent upstream
+        messages: Prepared conversation messages
+        temperature: Sampling temperature
+        max_tokens: Output token limit
+        prompt_version: Version of the prompt set the system prompt came from
+
+    Returns:
+        Hex digest identifying the request
+    """
+    material = json_codec.dumps_bytes(
+        {
+            "model": model,
+            "system": system_prompt,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Interface for generated component caches"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss"""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response under key, evicting old entries if needed"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry from the cache"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of entries currently stored"""
+
+    def hot_entries(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Most recently used entries, least recent first, for a warm-start snapshot
+
+        Backends that persist on their own return nothing.
+        """
+        return []
+
+    def preload(self, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Store entries from a snapshot, least recent first, without replacing newer ones
+
+        Returns:
+            Number of entries stored
+        """
+        stored = 0
+        for key, value in entries:
+            self.set(key, value)
+            stored += 1
+        return stored
+
+    def _record(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache, private to the current worker"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        self._record(value is not None)
+        # Callers may annotate responses; never hand out the stored object
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hot_entries(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            # Stored values are private copies that are never mutated
+            return list(self._entries.items())[-limit:] if limit > 0 else []
+
+    def preload(self, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        stored = 0
+        with self._lock:
+            # Snapshot entries are older than anything cached since startup:
+            # insert them at the least recent end, most recent first
+            for key, value in reversed(list(entries)):
+                if key in self._entries:
+                    continue
+                self._entries[key] = value
+                self._entries.move_to_end(key, last=False)
+                stored += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stored
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Host-wide LRU cache stored in a SQLite database in WAL mode
+
+    WAL lets readers in every worker proceed while one writer commits, and each
+    write (insert plus eviction) runs in a single transaction so other workers
+    never observe a partially applied update. Connections are opened per thread
+    and per process, so the cache is safe to use after a gunicorn fork.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection owned by the current thread and process"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _initialize_schema(self) -> None:
+        connection = self._connection()
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        connection = self._connection()
+        try:
+            row = connection.execute(
+                "SELECT value, last_access FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._record(False)
+                return None
+
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL_SECONDS:
+                connection.execute(
+                    "UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key)
+                )
+        except sqlite3.Error as e:
+            logger.warning("SQLite cache read failed: %s", e)
+            self._record(False)
+            return None
+
+        self._record(True)
+        return json_codec.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        encoded = json_codec.dumps_bytes(value)
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, encoded, size, time.time()),
+                )
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning("SQLite cache write failed: %s", e)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Drop least recently used entries until both size limits hold"""
+        count, total_bytes = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+
+        overflow = count - self.max_entries
+        if overflow > 0:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            total_bytes = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_entries"
+            ).fetchone()[0]
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM cache_entries ORDER BY last_access ASC"
+        ):
+            victims.append((key,))
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
+        connection.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+def build_cache_from_env() -> Optional[ResponseCache]:
+    """
+    Create the cache backend selected by environment variables
+
+    COMPONENT_CACHE_BACKEND selects "memory" (default), "sqlite" or "none".
+    COMPONENT_CACHE_PATH sets the SQLite file, and COMPONENT_CACHE_MAX_ENTRIES
+    and COMPONENT_CACHE_MAX_BYTES bound the cache size.
+
+    Returns:
+        Configured cache, or None when caching is disabled
+    """
+    backend = os.getenv("COMPONENT_CACHE_BACKEND", "memory").lower()
+    max_entries = int(os.getenv("COMPONENT_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+
+    if backend == "none":
+        return None
+
+    if backend == "sqlite":
+        path = os.getenv("COMPONENT_CACHE_PATH", os.path.join("instance", "component_cache.sqlite3"))
+        max_bytes = int(os.getenv("COMPONENT_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+        logger.info("Using shared SQLite component cache at %s", path)
+        return SQLiteCache(path, max_entries=max_entries, max_bytes=max_bytes)
+
+    if backend != "memory":
+        logger.warning("Unknown COMPONENT_CACHE_BACKEND '%s', using in-memory cache", backend)
+    return MemoryCache(max_entries=max_entries)
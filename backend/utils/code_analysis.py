@@ -0,0 +1,458 @@
+"""
+Static analysis of generated component code.
+
+The model's `dependencies` list is only a claim, and output cut off at the
+token limit is otherwise only noticed when the frontend preview breaks. This
+module checks generated code after parsing: it extracts imports and reconciles
+them with the declared dependencies, detects truncation and unbalanced
+brackets or JSX tags, and flags risky patterns. The structural checks walk the
+whole source character by character, so CodeAnalyzer runs them in a process
+pool under a time budget instead of on the request thread.
+"""
+
+import os
+import re
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIME_BUDGET = 0.5
+
+_IMPORT_PATTERNS = [
+    re.compile(r"""^\s*import\s+(?:type\s+)?[\w*{}\s,]+?\s+from\s+['"]([^'"]+)['"]""", re.MULTILINE),
+    re.compile(r"""^\s*import\s+['"]([^'"]+)['"]""", re.MULTILINE),
+    re.compile(r"""\brequire\(\s*['"]([^'"]+)['"]\s*\)"""),
+    re.compile(r"""\bimport\(\s*['"]([^'"]+)['"]\s*\)"""),
+]
+
+RISKY_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("dangerouslySetInnerHTML", re.compile(r"\bdangerouslySetInnerHTML\b")),
+    ("eval", re.compile(r"(?<![\w.])eval\s*\(")),
+    ("new Function", re.compile(r"\bnew\s+Function\s*\(")),
+    ("innerHTML assignment", re.compile(r"\.(?:inner|outer)HTML\s*=")),
+    ("document.write", re.compile(r"\bdocument\.write(?:ln)?\s*\(")),
+    ("javascript: URL", re.compile(r"""['"`]\s*javascript:""", re.IGNORECASE)),
+]
+
+_BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+_IDENTIFIER_CHARS = re.compile(r"[\w$.]")
+_TAG_NAME = re.compile(r"[A-Za-z][\w.:-]*")
+# Characters and keywords after which a '/' starts a regex literal rather
+# than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%~^<>")
+_REGEX_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield",
+    "await", "instanceof",
+}
+# Type parameters of a generic arrow function, <T,> or <T extends X, U>,
+# which TSX writes where a JSX tag could start
+_TYPE_PARAM = r"[A-Za-z_$][\w$]*(?:\s+extends\s+(?:[^<>()]|<[^<>]*>)+?)?(?:\s*=\s*(?:[^<>(),]|<[^<>]*>)+?)?"
+_GENERIC_PARAMS = re.compile(rf"<\s*{_TYPE_PARAM}(?:\s*,\s*{_TYPE_PARAM})*\s*,?\s*>\s*\(")
+_ARROW_AFTER_PARAMS = re.compile(r"\s*(?::[^=;{}()]*)?=>")
+
+
+def package_name(specifier: str) -> Optional[str]:
+    """
+    Map an import specifier to the npm package that provides it
+
+    Returns None for relative imports and "@/" path aliases (local files).
+    """
+    if specifier.startswith((".", "/", "@/", "~/")):
+        return None
+    parts = specifier.split("/")
+    if specifier.startswith("@"):
+        return "/".join(parts[:2]) if len(parts) > 1 else None
+    return parts[0]
+
+
+def extract_imports(code: str) -> List[str]:
+    """Get the sorted, de-duplicated npm packages imported by the code"""
+    packages = set()
+    for pattern in _IMPORT_PATTERNS:
+        for specifier in pattern.findall(code):
+            name = package_name(specifier)
+            if name:
+                packages.add(name)
+    return sorted(packages)
+
+
+def _skip_string(code: str, index: int) -> int:
+    """Return the index just past the string literal starting at index"""
+    quote = code[index]
+    index += 1
+    while index < len(code):
+        char = code[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        if char == "\n" and quote != "`":
+            return index
+        index += 1
+    return index
+
+
+def _skip_comment(code: str, index: int) -> int:
+    """Return the index just past the comment starting at index"""
+    if code.startswith("//", index):
+        end = code.find("\n", index)
+        return len(code) if end == -1 else end
+    end = code.find("*/", index + 2)
+    return len(code) if end == -1 else end + 2
+
+
+def _regex_allowed(code: str, index: int) -> bool:
+    """Whether a '/' at index starts a regex literal, judged by the token before it"""
+    position = index - 1
+    while position >= 0 and code[position].isspace():
+        position -= 1
+    if position < 0 or code[position] in _REGEX_PRECEDERS:
+        return True
+    end = position + 1
+    while position >= 0 and (code[position].isalnum() or code[position] in "_$"):
+        position -= 1
+    return code[position + 1:end] in _REGEX_KEYWORDS
+
+
+def _skip_regex(code: str, index: int) -> Optional[int]:
+    """
+    Return the index just past the regex literal starting at the '/' at
+    index, or None if the text is not one (no closing '/' on the line)
+    """
+    in_class = False
+    index += 1
+    while index < len(code):
+        char = code[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "\n":
+            return None
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            index += 1
+            while index < len(code) and code[index].isalpha():
+                index += 1
+            return index
+        index += 1
+    return None
+
+
+def _skip_generic_params(code: str, index: int) -> Optional[int]:
+    """
+    Return the index just past the '>' closing the type parameters of a
+    generic arrow function starting at the '<' at index, or None if the text
+    is not one
+    """
+    match = _GENERIC_PARAMS.match(code, index)
+    if match is None:
+        return None
+    # The parameter list must be followed by an arrow, otherwise this is a
+    # JSX element whose children start with '('
+    depth, position = 0, match.end() - 1
+    while position < len(code):
+        char = code[position]
+        if char in "\"'`":
+            position = _skip_string(code, position)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                break
+        position += 1
+    if depth != 0 or not _ARROW_AFTER_PARAMS.match(code, position + 1):
+        return None
+    return code.rindex(">", index, match.end()) + 1
+
+
+def _scan_tag(code: str, index: int) -> Tuple[Optional[str], bool, bool, int]:
+    """
+    Parse a JSX tag starting at the '<' at index
+
+    Returns:
+        (name, is_closing, is_self_closing, end_index); name is None when the
+        text is not a JSX tag (comparison operator, TypeScript generic, ...)
+    """
+    start = index
+    index += 1
+    closing = code.startswith("/", index)
+    if closing:
+        index += 1
+
+    if code.startswith(">", index):
+        return "", closing, False, index + 1  # fragment <> or </>
+
+    match = _TAG_NAME.match(code, index)
+    if match is None:
+        return None, False, False, start + 1
+    name = match.group(0)
+    index = match.end()
+
+    # Walk attributes to the closing '>', skipping braces and strings so
+    # arrow functions inside attribute expressions are not mistaken for it
+    depth = 0
+    while index < len(code):
+        char = code[index]
+        if char in "\"'`":
+            index = _skip_string(code, index)
+            continue
+        if char == "/" and depth > 0 and _regex_allowed(code, index):
+            end = _skip_regex(code, index)
+            if end is not None:
+                index = end
+                continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == "<" and depth == 0:
+            return None, False, False, start + 1
+        elif char == ">" and depth == 0:
+            return name, closing, code[index - 1] == "/", index + 1
+        index += 1
+    return None, False, False, start + 1
+
+
+def analyze_structure(code: str) -> List[Dict[str, str]]:
+    """
+    Check bracket and JSX tag balance and look for risky patterns
+
+    This is the CPU-heavy part of the analysis and is safe to run in a
+    separate process.
+
+    Args:
+        code: Component source code
+
+    Returns:
+        List of issues, each with type, severity and message
+    """
+    issues: List[Dict[str, str]] = []
+    # Open brackets and JSX tags, innermost last: ("(", index) or ("<", name).
+    # Inside a tag's children only '<' and '{' are significant, so quotes in
+    # JSX text ("Don't have an account?") are not read as strings.
+    stack: List[Tuple[str, Any]] = []
+
+    def line_of(position: int) -> int:
+        return code.count("\n", 0, position) + 1
+
+    index = 0
+    while index < len(code):
+        char = code[index]
+        in_jsx_text = bool(stack) and stack[-1][0] == "<"
+
+        if not in_jsx_text:
+            if char in "\"'`":
+                index = _skip_string(code, index)
+                continue
+            if code.startswith("//", index) or code.startswith("/*", index):
+                index = _skip_comment(code, index)
+                continue
+            if char == "/" and _regex_allowed(code, index):
+                end = _skip_regex(code, index)
+                if end is not None:
+                    index = end
+                    continue
+
+        if char == "{" or (not in_jsx_text and char in "(["):
+            stack.append((char, index))
+        elif not in_jsx_text and char in ")]}":
+            if not stack or stack[-1][0] != _BRACKET_PAIRS[char]:
+                issues.append({
+                    "type": "unbalanced_brackets",
+                    "severity": "error",
+                    "message": f"Unexpected '{char}' on line {line_of(index)}",
+                })
+                break
+            stack.pop()
+        elif char == "<" and (in_jsx_text or index == 0 or not _IDENTIFIER_CHARS.match(code[index - 1])):
+            end = None if in_jsx_text else _skip_generic_params(code, index)
+            if end is not None:
+                index = end
+                continue
+            name, closing, self_closing, end = _scan_tag(code, index)
+            if name is not None:
+                if closing:
+                    if not stack or stack[-1] != ("<", name):
+                        open_tag = stack[-1][1] if stack and stack[-1][0] == "<" else None
+                        issues.append({
+                            "type": "unbalanced_jsx",
+                            "severity": "error",
+                            "message": f"Closing tag </{name}> on line {line_of(index)} does not match "
+                                       + (f"<{open_tag}>" if open_tag is not None else "an open tag"),
+                        })
+                        break
+                    stack.pop()
+                elif not self_closing:
+                    stack.append(("<", name))
+                index = end
+                continue
+        index += 1
+    else:
+        open_tags = [entry[1] for entry in stack if entry[0] == "<"]
+        open_brackets = [entry for entry in stack if entry[0] != "<"]
+        if open_brackets:
+            issues.append({
+                "type": "unbalanced_brackets",
+                "severity": "error",
+                "message": f"{len(open_brackets)} unclosed bracket(s), first '{open_brackets[0][0]}' "
+                           f"on line {line_of(open_brackets[0][1])}",
+            })
+        if open_tags:
+            issues.append({
+                "type": "unbalanced_jsx",
+                "severity": "error",
+                "message": f"Unclosed JSX tag(s): {', '.join(f'<{tag}>' for tag in open_tags[:5])}",
+            })
+
+    for label, pattern in RISKY_PATTERNS:
+        if pattern.search(code):
+            issues.append({
+                "type": "risky_pattern",
+                "severity": "warning",
+                "message": f"Code uses {label}",
+            })
+
+    return issues
+
+
+def analyze_imports(code: str, declared: List[str]) -> Dict[str, Any]:
+    """
+    Reconcile imported packages with the dependencies the model declared
+
+    Args:
+        code: Component source code
+        declared: Dependencies listed in the model response
+
+    Returns:
+        Dict with imports, undeclaredDependencies and unusedDependencies
+    """
+    imports = extract_imports(code)
+    declared_packages = {package_name(dep) or dep for dep in declared if isinstance(dep, str)}
+    return {
+        "imports": imports,
+        "undeclaredDependencies": sorted(set(imports) - declared_packages),
+        "unusedDependencies": sorted(declared_packages - set(imports)),
+    }
+
+
+class CodeAnalyzer:
+    """Runs post-generation code analysis, with heavy checks in a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, time_budget: Optional[float] = None):
+        """
+        Args:
+            max_workers: Pool size. 0 runs every check inline. Defaults to the
+                CODE_ANALYSIS_WORKERS environment variable or 2
+            time_budget: Seconds to wait for pooled checks before returning
+                without them. Defaults to CODE_ANALYSIS_TIME_BUDGET or 0.5
+        """
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("CODE_ANALYSIS_WORKERS", "2"))
+        self.time_budget = time_budget if time_budget is not None else float(
+            os.getenv("CODE_ANALYSIS_TIME_BUDGET", str(DEFAULT_TIME_BUDGET))
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a multi-threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def warm_up(self) -> None:
+        """Start the pool workers so the first request does not pay for it"""
+        if self.max_workers > 0:
+            self._pool().submit(analyze_structure, "").result()
+
+    def shutdown(self) -> None:
+        """Stop the pool workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _discard_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Drop a pool whose worker died; the next request starts a new one"""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def analyze(self, code: str, declared: List[str], stop_reason: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze generated code
+
+        Args:
+            code: Component source code
+            declared: Dependencies listed in the model response
+            stop_reason: Upstream stop reason; "max_tokens" means output was cut off
+
+        Returns:
+            Analysis with reconciled imports, truncation flag and issues
+        """
+        future = pool = None
+        if self.max_workers > 0:
+            pool = self._pool()
+            try:
+                future = pool.submit(analyze_structure, code)
+            except BrokenProcessPool:
+                logger.error("Code analysis pool is broken, restarting it")
+                self._discard_pool(pool)
+
+        analysis = analyze_imports(code, declared)
+        issues: List[Dict[str, str]] = []
+        timed_out = False
+
+        if stop_reason == "max_tokens":
+            issues.append({
+                "type": "truncated",
+                "severity": "error",
+                "message": "Generation stopped at the output token limit",
+            })
+        if "export " not in code:
+            issues.append({
+                "type": "missing_export",
+                "severity": "warning",
+                "message": "Component code has no export",
+            })
+
+        if future is None:
+            issues.extend(analyze_structure(code))
+        else:
+            try:
+                issues.extend(future.result(timeout=self.time_budget))
+            except FutureTimeoutError:
+                future.cancel()
+                timed_out = True
+                logger.warning("Code analysis exceeded %ss budget, skipping structural checks", self.time_budget)
+            except BrokenProcessPool:
+                logger.error("Code analysis worker died, restarting the pool")
+                self._discard_pool(pool)
+                issues.extend(analyze_structure(code))
+            except Exception as e:
+                logger.error("Code analysis failed: %s", e)
+
+        structural_types = {"unbalanced_brackets", "unbalanced_jsx"}
+        analysis.update({
+            "truncated": stop_reason == "max_tokens" or any(
+                issue["type"] in structural_types for issue in issues
+            ),
+            "issues": issues,
+            "timedOut": timed_out,
+        })
+        return analysis
@@ -0,0 +1,14 @@
+"""
+Component type definitions for the AI Component Builder backend.
+"""
+
+from enum import Enum
+
+
+class ComponentType(Enum):
+    """Enumeration of supported component types"""
+    FORM = "form"
+    NAVIGATION = "navigation"
+    DATA_DISPLAY = "data_display"
+    FEEDBACK = "feedback"
+    GENERAL = "general"
@@ -0,0 +1,80 @@
+"""
+Request deadlines for the AI Component Builder backend.
+
+Clients send their remaining time budget in the X-Request-Deadline-Ms header.
+The resulting Deadline travels with the request through classification, the
+upstream queue and the upstream call, so the server stops working on requests
+the client has already given up on and can pick cheaper strategies when time
+is short.
+"""
+
+import time
+from typing import Mapping, Optional
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time at some stage"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class RequestCancelled(Exception):
+    """Raised from an event callback when the client is gone, to stop the work in progress"""
+
+
+class Deadline:
+    """Point in monotonic time by which a request must be answered"""
+
+    def __init__(self, budget_seconds: float):
+        """
+        Args:
+            budget_seconds: Time available from now
+        """
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], default_ms: Optional[int] = None) -> Optional["Deadline"]:
+        """
+        Build a deadline from the request headers
+
+        Args:
+            headers: Request headers
+            default_ms: Budget used when the client sends no deadline
+
+        Returns:
+            The deadline, or None when there is none
+
+        Raises:
+            ValueError: If the header is not a positive integer
+        """
+        value = headers.get(DEADLINE_HEADER)
+        if value is None:
+            return cls(default_ms / 1000) if default_ms else None
+        try:
+            budget_ms = int(value)
+        except ValueError:
+            raise ValueError(f"{DEADLINE_HEADER} must be an integer number of milliseconds")
+        if budget_ms <= 0:
+            raise ValueError(f"{DEADLINE_HEADER} must be positive")
+        return cls(budget_ms / 1000)
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage)
@@ -0,0 +1,114 @@
+"""
+JSON encoding and decoding for the AI Component Builder backend.
+
+Responses carry multi-kilobyte component code strings, so JSON handling is a
+large share of the CPU spent per request. This module uses orjson when it is
+installed and falls back to the standard library otherwise. Set JSON_BACKEND=json
+to force the standard library.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Callable, Optional, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND = "orjson" if orjson is not None and os.getenv("JSON_BACKEND", "").lower() != "json" else "json"
+
+
+def dumps_bytes(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> bytes:
+    """
+    Serialize obj to compact UTF-8 encoded JSON
+
+    Args:
+        obj: Value to serialize
+        sort_keys: Emit object keys in sorted order
+        indent: Pretty-print with two-space indentation
+        default: Fallback called for values the encoder does not support
+
+    Returns:
+        Encoded JSON document
+    """
+    if BACKEND == "orjson":
+        # Dates go through default like they do with the standard library, so
+        # both backends produce the same output
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        default=default,
+    ).encode("utf-8")
+
+
+def dumps(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """Serialize obj to a compact JSON string (see dumps_bytes)"""
+    return dumps_bytes(obj, sort_keys=sort_keys, indent=indent, default=default).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """
+    Deserialize a JSON document
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON. orjson's error type is
+            a subclass, so callers only need to handle the standard exception.
+    """
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by this module's codec
+
+    Keeps Flask's defaults (sorted keys, pretty output in debug mode, support
+    for dates, UUIDs and dataclasses) while building response bodies directly
+    from bytes.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(
+            obj,
+            sort_keys=kwargs.get("sort_keys", self.sort_keys),
+            indent=bool(kwargs.get("indent")),
+            default=kwargs.get("default", self.default),
+        )
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent, default=self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,62 @@
+"""
+Lazy service construction for the AI Component Builder backend.
+
+Services such as AIService pull in heavy dependencies (the anthropic SDK and
+its httpx stack) and create network clients. LazyService defers that work
+until the service is first used, so importing the app, collecting tests and
+forking workers stay cheap.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyService(Generic[T]):
+    """Proxy that builds a service on first use and forwards attribute access to it"""
+
+    def __init__(self, factory: Callable[[], T], name: Optional[str] = None):
+        """
+        Args:
+            factory: Zero-argument callable that builds the service
+            name: Name used in log messages, defaults to the factory name
+        """
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "service")
+        self._instance: Optional[T] = None
+        # Tracked separately so a factory may legitimately return None
+        # (for example a disabled optional service)
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the underlying service has been built"""
+        return self._initialized
+
+    def get(self) -> T:
+        """Return the service, building it on the first call"""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    logger.info("Initializing %s", self._name)
+                    self._instance = self._factory()
+                    self._initialized = True
+        return self._instance
+
+    def reset(self) -> None:
+        """Drop the built service so the next use builds a fresh one"""
+        with self._lock:
+            self._instance = None
+            self._initialized = False
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.get(), attribute)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "pending"
+        return f"<LazyService {self._name} ({state})>"
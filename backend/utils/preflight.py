@@ -0,0 +1,163 @@
+"""
+Pre-flight request checks for the AI Component Builder backend.
+
+Requests that are too large for the model context are otherwise only
+rejected by the upstream API after a full round-trip. The checks here run
+locally before any upstream call: they enforce per-message size limits,
+estimate input tokens and either compact the conversation (dropping the oldest
+turns) or reject it with a validation error.
+"""
+
+import os
+import re
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+MODEL_CONTEXT_TOKENS = 200_000
+
+# Role markers and message framing cost a few tokens per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+class PreflightError(ValueError):
+    """Raised when a request fails pre-flight checks"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text without calling the API
+
+    Words are counted as one token per four characters (at least one), and each
+    punctuation character as one token. This slightly overestimates prose and
+    tracks symbol-heavy code closely, which is the safe direction for a guard.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+
+@dataclass
+class PreflightLimits:
+    """Size limits applied to chat requests before they are sent upstream"""
+    max_message_chars: int = 100_000
+    max_messages: int = 200
+    context_tokens: int = MODEL_CONTEXT_TOKENS
+    output_tokens: int = 4000
+    token_budget: Optional[int] = None
+    auto_compact: bool = True
+
+    @property
+    def max_input_tokens(self) -> int:
+        """Input token allowance after reserving room for the output"""
+        limit = self.context_tokens - self.output_tokens
+        if self.token_budget is not None:
+            limit = min(limit, self.token_budget)
+        return limit
+
+    @classmethod
+    def from_env(cls, output_tokens: int = 4000) -> "PreflightLimits":
+        """
+        Build limits from PREFLIGHT_MAX_MESSAGE_CHARS, PREFLIGHT_MAX_MESSAGES,
+        PREFLIGHT_TOKEN_BUDGET and PREFLIGHT_AUTO_COMPACT
+        """
+        budget = os.getenv("PREFLIGHT_TOKEN_BUDGET")
+        return cls(
+            max_message_chars=int(os.getenv("PREFLIGHT_MAX_MESSAGE_CHARS", "100000")),
+            max_messages=int(os.getenv("PREFLIGHT_MAX_MESSAGES", "200")),
+            output_tokens=output_tokens,
+            token_budget=int(budget) if budget else None,
+            auto_compact=os.getenv("PREFLIGHT_AUTO_COMPACT", "true").lower() == "true",
+        )
+
+
+@dataclass
+class PreflightResult:
+    """Outcome of a successful pre-flight check"""
+    messages: List[Dict[str, Any]]
+    estimated_tokens: int
+    dropped_messages: int = 0
+
+
+def _message_tokens(message: Dict[str, Any]) -> int:
+    return estimate_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+
+
+def run_preflight(
+    messages: Any,
+    system_prompt_tokens: int,
+    limits: PreflightLimits
+) -> PreflightResult:
+    """
+    Validate request size and fit the conversation into the token allowance
+
+    Args:
+        messages: Raw messages from the request
+        system_prompt_tokens: Estimated tokens of the system prompt
+        limits: Limits to enforce
+
+    Returns:
+        Result with the (possibly compacted) messages and the token estimate
+
+    Raises:
+        PreflightError: If the request is malformed or cannot be made to fit
+    """
+    if not isinstance(messages, list) or not all(isinstance(message, dict) for message in messages):
+        raise PreflightError("Messages must be a list of objects")
+
+    for index, message in enumerate(messages):
+        content = message.get("content")
+        if content is not None and not isinstance(content, str):
+            raise PreflightError(f"Message {index} content must be a string")
+        if content and len(content) > limits.max_message_chars:
+            raise PreflightError(
+                f"Message {index} is {len(content)} characters, "
+                f"above the limit of {limits.max_message_chars}",
+                413,
+            )
+
+    token_counts = [_message_tokens(message) for message in messages]
+    allowance = limits.max_input_tokens - system_prompt_tokens
+    total = sum(token_counts)
+
+    if len(messages) <= limits.max_messages and total <= allowance:
+        return PreflightResult(messages, total + system_prompt_tokens)
+
+    if not limits.auto_compact:
+        raise PreflightError(
+            f"Request is estimated at {total + system_prompt_tokens} input tokens over "
+            f"{len(messages)} messages, above the limit of {limits.max_input_tokens} tokens "
+            f"or {limits.max_messages} messages",
+            413,
+        )
+
+    # Drop the oldest turns until the rest fits, always keeping the latest
+    # message and starting the conversation on a user turn
+    start = 0
+    while start < len(messages) - 1 and (
+        len(messages) - start > limits.max_messages or total > allowance
+    ):
+        total -= token_counts[start]
+        start += 1
+    while start < len(messages) - 1 and messages[start].get("role") != "user":
+        total -= token_counts[start]
+        start += 1
+
+    if total > allowance:
+        raise PreflightError(
+            f"Latest message is estimated at {total} tokens, above the "
+            f"{allowance} tokens available for the conversation",
+            413,
+        )
+
+    return PreflightResult(messages[start:], total + system_prompt_tokens, dropped_messages=start)
@@ -0,0 +1,265 @@
+"""
+Built-in sampling profiler for the AI Component Builder backend.
+
+A background thread periodically snapshots the Python stacks of the threads
+being profiled (via sys._current_frames) and counts identical stacks. Nothing
+is instrumented, so overhead is one stack walk per profiled thread per
+interval, and none at all while no profile is running.
+
+A profile either covers every thread for a number of seconds, or only the
+threads handling a sampled fraction of chat requests, in which case stacks are
+grouped per request. When it ends, the counts are written to disk in the
+collapsed-stack format read by flamegraph.pl, speedscope and similar tools.
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+import tempfile
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_MAX_SECONDS = 600
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "component-builder-profiles")
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is started while another one is running"""
+
+
+@dataclass
+class ProfileSession:
+    """State of one profiling run"""
+    session_id: str
+    seconds: float
+    request_sample_rate: Optional[float]
+    started_at: float
+    stacks: "Counter[Tuple[str, ...]]" = field(default_factory=Counter)
+    samples: int = 0
+    requests: int = 0
+
+    @property
+    def mode(self) -> str:
+        return "requests" if self.request_sample_rate is not None else "all_threads"
+
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = getattr(code, "co_qualname", code.co_name)
+    # ';' separates frames and ' ' the count in the collapsed format
+    return f"{module}:{name}".replace(";", ",").replace(" ", "_")
+
+
+def _stack(frame: Any) -> Tuple[str, ...]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class SamplingProfiler:
+    """Sampling profiler controlled at runtime, one profile at a time"""
+
+    def __init__(
+        self,
+        output_dir: Optional[str] = None,
+        interval: Optional[float] = None,
+        max_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            output_dir: Directory profiles are written to. Defaults to
+                PROFILE_DIR or a directory under the system temp dir
+            interval: Seconds between samples. Defaults to PROFILE_INTERVAL_MS
+                or 5ms
+            max_seconds: Longest profile that may be requested. Defaults to
+                PROFILE_MAX_SECONDS or 600
+        """
+        self.output_dir = output_dir or os.getenv("PROFILE_DIR", DEFAULT_DIR)
+        self.interval = interval if interval is not None else int(
+            os.getenv("PROFILE_INTERVAL_MS", str(DEFAULT_INTERVAL_MS))
+        ) / 1000
+        self.max_seconds = max_seconds if max_seconds is not None else float(
+            os.getenv("PROFILE_MAX_SECONDS", str(DEFAULT_MAX_SECONDS))
+        )
+        self.last_profile: Optional[Dict[str, Any]] = None
+        self._session: Optional[ProfileSession] = None
+        # Thread ident -> label of the request the thread is handling
+        self._tracked: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    def start(self, seconds: float, request_sample_rate: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Start a profile
+
+        Args:
+            seconds: How long to profile for
+            request_sample_rate: Fraction of chat requests to profile. When not
+                given, every thread is profiled
+
+        Returns:
+            Status of the new profile
+
+        Raises:
+            ValueError: If the duration or rate is out of range
+            ProfilerBusyError: If a profile is already running
+        """
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds:g}")
+        if request_sample_rate is not None and not 0 < request_sample_rate <= 1:
+            raise ValueError("requestSampleRate must be between 0 and 1")
+
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusyError("A profile is already running")
+            session = ProfileSession(
+                session_id=f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}",
+                seconds=seconds,
+                request_sample_rate=request_sample_rate,
+                started_at=time.monotonic(),
+            )
+            self._session = session
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, args=(session,), name="profiler", daemon=True)
+            self._worker.start()
+
+        logger.info("Profiler: started %s for %ss (%s)", session.session_id, seconds, session.mode)
+        return self.status()
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """
+        End the running profile early and write it out
+
+        Returns:
+            Summary of the written profile, or None if none was running
+        """
+        with self._lock:
+            worker = self._worker
+        if worker is None:
+            return None
+        self._stop.set()
+        worker.join()
+        return self.last_profile
+
+    def should_track(self) -> bool:
+        """Whether the request about to be handled should be profiled"""
+        session = self._session
+        return (
+            session is not None
+            and session.request_sample_rate is not None
+            and random.random() < session.request_sample_rate
+        )
+
+    def track_current_thread(self, label: str) -> None:
+        """Profile the calling thread under a request label until untracked"""
+        with self._lock:
+            self._tracked[threading.get_ident()] = label
+            if self._session is not None:
+                self._session.requests += 1
+
+    def untrack_current_thread(self) -> None:
+        with self._lock:
+            self._tracked.pop(threading.get_ident(), None)
+
+    def _run(self, session: ProfileSession) -> None:
+        deadline = session.started_at + session.seconds
+        own_ident = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+                self._sample(session, own_ident)
+        finally:
+            summary = self._write(session)
+            with self._lock:
+                self.last_profile = summary
+                self._session = None
+                self._worker = None
+                self._tracked.clear()
+            logger.info("Profiler: wrote %s samples to %s", session.samples, summary.get("path"))
+
+    def _sample(self, session: ProfileSession, own_ident: int) -> None:
+        with self._lock:
+            tracked = dict(self._tracked)
+        frames = sys._current_frames()
+        if session.request_sample_rate is not None:
+            targets = {ident: label for ident, label in tracked.items() if ident in frames}
+        else:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            targets = {
+                ident: tracked.get(ident) or f"thread:{names.get(ident, ident)}"
+                for ident in frames if ident != own_ident
+            }
+        for ident, label in targets.items():
+            session.stacks[(label,) + _stack(frames[ident])] += 1
+        session.samples += 1
+
+    def _write(self, session: ProfileSession) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "sessionId": session.session_id,
+            "mode": session.mode,
+            "seconds": round(time.monotonic() - session.started_at, 1),
+            "samples": session.samples,
+            "requests": session.requests,
+            "path": None,
+            "topFunctions": self._top_functions(session.stacks),
+        }
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"profile-{session.session_id}.collapsed")
+            with open(path, "w", encoding="utf-8") as output:
+                for stack, count in session.stacks.most_common():
+                    output.write(f"{';'.join(stack)} {count}\n")
+            summary["path"] = path
+        except OSError as e:
+            logger.error("Profiler: could not write profile: %s", e)
+            summary["error"] = str(e)
+        return summary
+
+    @staticmethod
+    def _top_functions(stacks: "Counter[Tuple[str, ...]]", limit: int = 10) -> List[Dict[str, Any]]:
+        """Functions that were on top of the stack most often (self time)"""
+        leaves: "Counter[str]" = Counter()
+        total = sum(stacks.values())
+        for stack, count in stacks.items():
+            if len(stack) > 1:
+                leaves[stack[-1]] += count
+        return [
+            {"function": name, "samples": count, "share": round(count / total, 3)}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        session = self._session
+        running = None
+        if session is not None:
+            running = {
+                "sessionId": session.session_id,
+                "mode": session.mode,
+                "requestSampleRate": session.request_sample_rate,
+                "elapsedSeconds": round(time.monotonic() - session.started_at, 1),
+                "seconds": session.seconds,
+                "samples": session.samples,
+                "requests": session.requests,
+            }
+        return {
+            "running": running,
+            "lastProfile": self.last_profile,
+            "intervalMs": round(self.interval * 1000, 3),
+            "outputDir": self.output_dir,
+        }
@@ -2,33 +2,118 @@
 Prompt Management System for the AI Component Builder backend.
 
 This module handles all AI prompts, including system prompts for different
-component types and prompt templates for various use cases.
+component types and prompt templates for various use cases. Prompt text is
+loaded from versioned files by the PromptRegistry.
 """
 
+import os
+import re
+import json
 import logging
-from typing import Dict, Any, Optional
-from enum import Enum
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from utils import json_codec
+from utils.component_types import ComponentType
+from utils.prompt_registry import DEFAULT_PROMPT_DIR, PromptRegistry, assemble_prompt, render_instructions
+from utils.preflight import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# Optional parts of a generated component a client can ask for, in response
+# order. "code" is always included.
+RESPONSE_FIELDS: Tuple[str, ...] = ("code", "description", "dependencies", "usage")
+# Used for follow-up turns by default: output tokens dominate generation time,
+# and a client iterating on a component mostly re-renders the code
+LEAN_FIELDS: Tuple[str, ...] = ("code",)
+
+# Lines of the RESPONSE FORMAT section, in the order the model writes them;
+# None marks the fields every response carries
+_RESPONSE_FORMAT_LINES: Tuple[Tuple[Optional[str], str], ...] = (
+    ("code", '"componentCode": "string - Complete React component code"'),
+    (None, '"componentType": "string - Category of component"'),
+    ("dependencies", '"dependencies": ["array of required npm packages"]'),
+    ("description", '"description": "string - Brief component description"'),
+    ("usage", '"usage": "string - Example usage code"'),
+)
+RESPONSE_FORMAT_HEADING = "RESPONSE FORMAT:"
+
+
+def normalize_fields(fields: Any) -> Tuple[str, ...]:
+    """
+    Validate a response field selection and put it in canonical order
+
+    Args:
+        fields: Requested field names from RESPONSE_FIELDS
+
+    Returns:
+        The selection in RESPONSE_FIELDS order, always including "code"
+
+    Raises:
+        ValueError: If the selection is not a list of known field names
+    """
+    if not isinstance(fields, (list, tuple)) or not all(isinstance(name, str) for name in fields):
+        raise ValueError("fields must be a list of field names")
+    requested = set(fields)
+    unknown = requested.difference(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(RESPONSE_FIELDS)}")
+    return tuple(name for name in RESPONSE_FIELDS if name == "code" or name in requested)
+
+
+def project_response_format(prompt: str, fields: Tuple[str, ...]) -> str:
+    """
+    Rewrite a prompt's RESPONSE FORMAT section to ask only for the given fields
 
-class ComponentType(Enum):
-    """Enumeration of supported component types"""
-    FORM = "form"
-    NAVIGATION = "navigation"
-    DATA_DISPLAY = "data_display"
-    FEEDBACK = "feedback"
-    GENERAL = "general"
+    Prompts without the section are returned unchanged.
+    """
+    start = prompt.find(RESPONSE_FORMAT_HEADING)
+    if start == -1:
+        return prompt
+    end = prompt.find("\n\n", start)
+    end = len(prompt) if end == -1 else end
+
+    lines = [line for name, line in _RESPONSE_FORMAT_LINES if name is None or name in fields]
+    section = "\n".join([
+        RESPONSE_FORMAT_HEADING,
+        "Always respond with valid JSON containing exactly these fields and no others:",
+        "{",
+        ",\n".join(f"  {line}" for line in lines),
+        "}",
+    ])
+    return prompt[:start] + section + prompt[end:]
 
 
 class PromptManager:
     """Manages AI prompts for different component types and use cases"""
     
-    def __init__(self):
-        """Initialize the prompt manager with default prompts"""
-        self._system_prompts = self._initialize_system_prompts()
-        self._component_instructions = self._initialize_component_instructions()
+    def __init__(self, registry: Optional[PromptRegistry] = None):
+        """
+        Initialize the prompt manager with prompts from the registry
+
+        Args:
+            registry: Optional prompt registry. If not provided, prompts are loaded
+                from the PROMPT_DIR environment variable or the bundled prompts
+        """
+        self.registry = registry or PromptRegistry(os.getenv("PROMPT_DIR") or DEFAULT_PROMPT_DIR)
+        # Process-local overrides set through update_component_instructions
+        self._instruction_overrides: Dict[str, str] = {}
+        self._max_prompt_tokens: Optional[Tuple[str, int]] = None
+        # (prompt version, component type, fields, sub-intents) -> assembled prompt.
+        # Identical requests get the identical prompt string, which keeps the
+        # upstream prompt cache prefix stable
+        self._assembled_prompts: Dict[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], str] = {}
+        # Request threads share the manager; hits are plain dict reads, while
+        # misses, resets and key listings hold this lock
+        self._assembled_lock = threading.Lock()
+        # (prompt version, {component type: [(sub-intent, keyword pattern)]})
+        self._intent_patterns: Optional[Tuple[str, Dict[str, List[Tuple[str, re.Pattern]]]]] = None
         logger.info("Prompt Manager initialized with component-specific prompts")
+
+    @property
+    def prompt_version(self) -> str:
+        """Version of the prompt set currently in use"""
+        return self.get_versioned_system_prompt(ComponentType.GENERAL)[1]
     
     def get_system_prompt(self, component_type: Optional[ComponentType] = None) -> str:
         """
@@ -40,18 +125,149 @@ class PromptManager:
         Returns:
             Formatted system prompt string
         """
+        return self.get_versioned_system_prompt(component_type)[0]
+
+    def get_versioned_system_prompt(
+        self,
+        component_type: Optional[ComponentType] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+        sub_intents: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[str, str]:
+        """
+        Get the system prompt for a component type together with its version
+
+        Both values come from the same prompt set, so they stay consistent
+        even if the registry reloads in between.
+
+        Args:
+            component_type: The type of component to generate
+            fields: Optional normalized response fields (see normalize_fields);
+                the prompt then asks the model for only those fields
+            sub_intents: Optional sorted sub-intents (see detect_sub_intents);
+                the prompt then only carries the instructions tagged for them
+
+        Returns:
+            Tuple of (system prompt, prompt version)
+        """
         if component_type is None:
             component_type = ComponentType.GENERAL
-        
-        base_prompt = self._system_prompts.get("base", "")
-        component_instructions = self._component_instructions.get(component_type.value, "")
-        
-        # Combine base prompt with component-specific instructions
-        full_prompt = f"{base_prompt}\n\n{component_instructions}".strip()
-        
-        logger.debug(f"Generated system prompt for component type: {component_type.value}")
-        return full_prompt
+
+        prompt_set = self.registry.current()
+        override = self._instruction_overrides.get(component_type.value)
+        if override is None:
+            instructions = prompt_set.instructions.get(component_type.value, "")
+            prompt, version = prompt_set.assembled[component_type], prompt_set.version
+        else:
+            logger.debug("Using local instruction override for component type: %s", component_type.value)
+            instructions = override
+            prompt, version = assemble_prompt(prompt_set.base, render_instructions(override)), f"{prompt_set.version}-local"
+
+        if fields is None:
+            fields = RESPONSE_FIELDS
+        sub_intents = sub_intents or ()
+        if fields == RESPONSE_FIELDS and not sub_intents:
+            return prompt, version
+
+        key = (version, component_type.value, fields, sub_intents)
+        assembled = self._assembled_prompts.get(key)
+        if assembled is not None:
+            return assembled, version
+
+        if sub_intents:
+            prompt = assemble_prompt(prompt_set.base, render_instructions(instructions, set(sub_intents)))
+        assembled = project_response_format(prompt, fields) if fields != RESPONSE_FIELDS else prompt
+        with self._assembled_lock:
+            if any(cached_key[0] != version for cached_key in self._assembled_prompts):
+                self._assembled_prompts = {}
+            # A concurrent miss may have stored the same prompt first; return
+            # that one so every request shares one string
+            assembled = self._assembled_prompts.setdefault(key, assembled)
+        return assembled, version
+
+    def assembled_prompt_keys(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]:
+        """(component type, fields, sub-intents) of every memoized prompt of the current version"""
+        version = self.registry.version
+        with self._assembled_lock:
+            keys = list(self._assembled_prompts)
+        return [
+            (type_name, fields, sub_intents)
+            for key_version, type_name, fields, sub_intents in keys
+            if key_version == version
+        ]
+
+    def prebuild(self, keys: Iterable[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]) -> int:
+        """
+        Assemble prompts ahead of the requests that will need them
+
+        Args:
+            keys: Keys as returned by assembled_prompt_keys, e.g. from a snapshot
+
+        Returns:
+            Number of prompts built; keys with unknown types or fields are skipped
+        """
+        built = 0
+        for type_name, fields, sub_intents in keys:
+            try:
+                component_type = ComponentType(type_name)
+                fields = normalize_fields(fields)
+            except ValueError:
+                continue
+            self.get_versioned_system_prompt(component_type, fields, tuple(sorted(sub_intents)))
+            built += 1
+        return built
+
+    def detect_sub_intents(self, component_type: ComponentType, texts: Iterable[str]) -> Tuple[str, ...]:
+        """
+        Detect the sub-intents of a component type mentioned in a conversation
+
+        Keywords come from the prompt set manifest (see PromptRegistry), so they
+        change together with the instructions they select.
+
+        Args:
+            component_type: Detected component type
+            texts: User messages of the conversation
+
+        Returns:
+            Sorted sub-intent names, e.g. ("loading",) for a spinner request.
+            Empty if none was recognized, in which case all instructions apply
+        """
+        prompt_set = self.registry.current()
+        if self._intent_patterns is None or self._intent_patterns[0] != prompt_set.version:
+            patterns = {
+                type_name: [
+                    (intent, re.compile(
+                        r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b", re.IGNORECASE
+                    ))
+                    for intent, keywords in intents.items() if keywords
+                ]
+                for type_name, intents in prompt_set.sub_intents.items()
+            }
+            self._intent_patterns = (prompt_set.version, patterns)
+
+        candidates = self._intent_patterns[1].get(component_type.value)
+        if not candidates:
+            return ()
+        found = set()
+        for text in texts:
+            found.update(intent for intent, pattern in candidates if intent not in found and pattern.search(text))
+        return tuple(sorted(found))
     
+    def max_system_prompt_tokens(self) -> int:
+        """
+        Estimate the token count of the largest system prompt
+
+        Used by pre-flight checks before the component type is known. The value
+        is memoized per prompt set version.
+        """
+        version = self.registry.version
+        if self._max_prompt_tokens is None or self._max_prompt_tokens[0] != version:
+            tokens = max(
+                estimate_tokens(self.get_system_prompt(component_type))
+                for component_type in ComponentType
+            )
+            self._max_prompt_tokens = (version, tokens)
+        return self._max_prompt_tokens[1]
+
     def get_component_type_from_message(self, message: str) -> ComponentType:
         """
         Detect component type from user message
@@ -92,171 +308,6 @@ class PromptManager:
         else:
             return ComponentType.GENERAL
     
-    def _initialize_system_prompts(self) -> Dict[str, str]:
-        """Initialize base system prompts"""
-        return {
-            "base": """You are an expert React component generator for the AI Component Builder, specializing in creating production-ready UI components.
-
-TECHNOLOGY STACK:
-- React 19.1.0 with TypeScript
-- shadcn/ui + Radix UI components
-- Tailwind CSS for styling
-- Lucide React for icons
-- Modern React patterns (hooks, composition)
-
-COMPONENT CATEGORIES:
-- Forms & Inputs: Contact forms, search bars, user registration
-- Navigation: Navbars, sidebars, breadcrumbs, tabs
-- Data Display: Tables, cards, lists, dashboards
-- Feedback: Modals, toasts, alerts, loading states
-- Layout: Grids, containers, responsive layouts
-
-RESPONSE FORMAT:
-Always respond with valid JSON containing:
-{
-  "componentCode": "string - Complete React component code",
-  "componentType": "string - Category of component",
-  "dependencies": ["array of required npm packages"],
-  "description": "string - Brief component description",
-  "usage": "string - Example usage code"
-}
-
-REQUIREMENTS:
-- Use TypeScript interfaces for all props with proper typing
-- Include comprehensive accessibility (ARIA labels, keyboard navigation, focus management)
-- Follow shadcn/ui design patterns and component composition
-- Include responsive design with mobile-first approach
-- Add proper error handling and loading states
-- Use semantic HTML elements
-- Include hover, focus, and active states
-- Add JSDoc comments for complex functions
-- Ensure components are self-contained and production-ready
-
-STYLING GUIDELINES:
-- Use Tailwind CSS utility classes
-- Follow consistent spacing (p-4, m-2, gap-4)
-- Use semantic color classes (bg-primary, text-muted-foreground)
-- Include dark mode support where appropriate
-- Add smooth transitions and animations
-
-CRITICAL RULES:
-1. Start your response with { and end with }
-2. Use double quotes for all strings
-3. Escape quotes inside strings with backslash
-4. No trailing commas
-5. No comments in JSON
-6. The componentCode field must contain the complete React component as a single string
-
-RESPOND ONLY WITH VALID JSON - NO OTHER TEXT."""
-        }
-    
-    def _initialize_component_instructions(self) -> Dict[str, str]:
-        """Initialize component-specific instructions"""
-        return {
-            "form": """FORMS & INPUTS COMPONENT INSTRUCTIONS:
-- Use React Hook Form for robust form management
-- Include Zod validation schema with comprehensive rules
-- Add real-time validation with clear, helpful error messages
-- Include loading states during form submission with disabled inputs
-- Use shadcn/ui form components (Input, Button, Label, Textarea, Select)
-- Add proper form accessibility with ARIA labels and descriptions
-- Include form reset functionality and success feedback
-- Add password strength indicators for password fields
-- Include file upload with drag-and-drop support where needed
-- Use proper input types (email, tel, url) for better UX
-
-Example structure:
-- Import useForm, zodResolver from react-hook-form
-- Define comprehensive Zod schema for validation
-- Include proper TypeScript interfaces for form data
-- Add error handling and user-friendly error display
-- Use Tailwind for responsive styling and focus states
-- Include proper keyboard navigation and tab order""",
-
-            "navigation": """NAVIGATION COMPONENT INSTRUCTIONS:
-- Create responsive navigation components with mobile-first approach
-- Use Lucide React icons for navigation items and interactive elements
-- Include mobile menu functionality with smooth animations
-- Add proper ARIA labels, roles, and keyboard navigation support
-- Use shadcn/ui navigation components (NavigationMenu, Sheet for mobile)
-- Include active state styling with clear visual indicators
-- Support multi-level dropdown menus with proper focus management
-- Add search functionality in navigation where appropriate
-- Include user profile/account sections in navigation
-- Use proper semantic HTML (nav, ul, li elements)
-
-Component types to consider:
-- Responsive navbar with logo, menu items, and mobile hamburger
-- Sidebar navigation with collapsible sections
-- Breadcrumb navigation with proper hierarchy
-- Tab navigation with keyboard arrow key support
-- Mega menus for complex navigation structures
-- Sticky/fixed navigation with scroll behavior""",
-
-            "data_display": """DATA DISPLAY COMPONENT INSTRUCTIONS:
-- Create components for displaying structured data with excellent UX
-- Use shadcn/ui Table, Card, Badge, and Avatar components
-- Include comprehensive sorting, filtering, and search capabilities
-- Add loading states with skeleton screens and empty states with helpful messages
-- Use proper TypeScript interfaces for data with generic types where appropriate
-- Include responsive design that adapts gracefully to mobile screens
-- Add pagination with page size options for large datasets
-- Include data export functionality where relevant
-- Add row selection and bulk actions for tables
-- Use virtualization for very large datasets
-
-Component types to consider:
-- Advanced data tables with sorting, filtering, and row actions
-- Product/item card grids with hover effects and quick actions
-- List components with avatars, metadata, and action buttons
-- Statistics dashboards with metrics and trend indicators
-- Chart components with Chart.js or Recharts integration
-- Timeline components for displaying chronological data
-- Comparison tables for feature/pricing comparisons""",
-
-            "feedback": """FEEDBACK COMPONENT INSTRUCTIONS:
-- Create user feedback and interaction components with excellent UX
-- Use shadcn/ui Dialog, Alert, Toast, and Progress components
-- Include smooth animations and transitions with proper timing
-- Add comprehensive keyboard navigation and focus management
-- Include close/dismiss functionality with multiple methods (X, Escape, outside click)
-- Use appropriate icons from Lucide React for visual context
-- Add proper ARIA attributes, live regions, and screen reader support
-- Include auto-dismiss timers for non-critical notifications
-- Add action buttons with clear labels and proper spacing
-- Use semantic colors (success, warning, error, info) consistently
-
-Component types to consider:
-- Modal dialogs with primary/secondary actions and proper focus trapping
-- Toast notifications with different severity levels and auto-dismiss
-- Alert banners with inline actions and dismissal options
-- Loading spinners, skeleton screens, and progress bars
-- Step-by-step progress indicators for multi-step processes
-- Confirmation dialogs with clear consequences and cancel options
-- Tooltip components with proper positioning and timing""",
-
-            "general": """GENERAL COMPONENT INSTRUCTIONS:
-- Create flexible, reusable React components with excellent developer experience
-- Use appropriate shadcn/ui components following their design system
-- Include comprehensive TypeScript typing with proper interfaces and generics
-- Add responsive design with mobile-first approach and proper breakpoints
-- Include comprehensive accessibility features (ARIA, keyboard navigation, focus management)
-- Use Tailwind CSS for styling with consistent design tokens
-- Add proper JSDoc documentation for complex components and functions
-- Include error boundaries and proper error handling
-- Use React best practices (hooks, composition, performance optimization)
-
-Focus on:
-- Clean, maintainable, and well-documented code
-- Proper component composition and separation of concerns
-- Reusable design patterns and consistent API design
-- Modern React best practices (hooks, context, suspense)
-- Performance optimization (memo, useMemo, useCallback where appropriate)
-- Accessibility-first development approach
-- Responsive design that works across all devices
-- Proper state management and side effect handling"""
-        }
-    
     def update_component_instructions(self, component_type: ComponentType, instructions: str) -> None:
         """
         Update instructions for a specific component type
@@ -265,8 +316,11 @@ Focus on:
             component_type: The component type to update
             instructions: New instructions for the component type
         """
-        self._component_instructions[component_type.value] = instructions
-        logger.info(f"Updated instructions for component type: {component_type.value}")
+        self._instruction_overrides[component_type.value] = instructions
+        self._max_prompt_tokens = None
+        with self._assembled_lock:
+            self._assembled_prompts = {}
+        logger.info("Updated instructions for component type: %s", component_type.value)
     
     def get_available_component_types(self) -> list[str]:
         """Get list of available component types"""
@@ -283,20 +337,32 @@ Focus on:
             True if response appears to be valid JSON with required fields
         """
         try:
-            import json
-            parsed = json.loads(response)
-            
-            # Check for required fields
-            required_fields = ["componentCode", "componentType", "description"]
-            for field in required_fields:
-                if field not in parsed:
-                    logger.warning(f"Response missing required field: {field}")
-                    return False
-            
-            return True
+            parsed = json_codec.loads(response)
+            return self.validate_response_fields(parsed)
         except json.JSONDecodeError:
             logger.warning("Response is not valid JSON")
             return False
         except Exception as e:
-            logger.error(f"Error validating response: {e}")
+            logger.error("Error validating response: %s", e)
             return False
+
+    def validate_response_fields(self, parsed: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> bool:
+        """
+        Validate that an already decoded response has the required fields
+
+        Args:
+            parsed: The decoded AI response
+            fields: Response fields that were asked for, defaults to all
+
+        Returns:
+            True if all required fields are present
+        """
+        required_fields = ["componentCode", "componentType"]
+        if fields is None or "description" in fields:
+            required_fields.append("description")
+        for field in required_fields:
+            if field not in parsed:
+                logger.warning("Response missing required field: %s", field)
+                return False
+
+        return True
@@ -0,0 +1,214 @@
+"""
+Versioned prompt registry for the AI Component Builder backend.
+
+Prompts live in a directory of text files (base.txt plus one file per
+ComponentType) next to a manifest.json carrying the prompt set version. The
+registry precompiles the full system prompt for every component type and
+reloads the whole set when any file's mtime changes, so prompt changes roll
+out to every worker without a restart.
+
+Instruction lines may be tagged with the sub-intents they apply to, as in
+"- [table, list] Add pagination ...". The manifest's subIntents map gives the
+keywords each sub-intent is detected by; render_instructions keeps only the
+lines relevant to the detected sub-intents.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, Optional, Tuple
+
+from utils.component_types import ComponentType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+MANIFEST_FILE = "manifest.json"
+BASE_PROMPT_NAME = "base"
+
+# Minimum seconds between mtime checks, so hot paths stat the files rarely
+DEFAULT_CHECK_INTERVAL = 2.0
+
+# "- [tag, other_tag] text" marks a line that only applies to those sub-intents
+_FRAGMENT_TAG = re.compile(r"^(\s*(?:-\s+)?)\[([a-z0-9_]+(?:\s*,\s*[a-z0-9_]+)*)\]\s*")
+
+
+class PromptRegistryError(Exception):
+    """Raised when a prompt set cannot be loaded"""
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    """An immutable, fully loaded set of prompts"""
+    version: str
+    base: str
+    instructions: Dict[str, str]
+    assembled: Dict[ComponentType, str]
+    mtimes: Dict[str, float] = field(repr=False)
+    # Component type -> sub-intent -> keywords it is detected by
+    sub_intents: Dict[str, Dict[str, Tuple[str, ...]]] = field(default_factory=dict, repr=False)
+
+
+def assemble_prompt(base: str, instructions: str) -> str:
+    """Combine the base prompt with component-specific instructions"""
+    return f"{base}\n\n{instructions}".strip()
+
+
+def render_instructions(instructions: str, sub_intents: Optional[AbstractSet[str]] = None) -> str:
+    """
+    Render tagged instructions for a set of sub-intents
+
+    Untagged lines are always kept and tagged lines only when one of their
+    tags is among sub_intents; with no sub-intents every line is kept. Tags
+    are removed from the output, and a heading whose items were all dropped
+    is dropped with them.
+    """
+    paragraphs = []
+    for paragraph in instructions.split("\n\n"):
+        lines, dropped = [], False
+        for line in paragraph.split("\n"):
+            match = _FRAGMENT_TAG.match(line)
+            if match is None:
+                lines.append(line)
+                continue
+            tags = {tag.strip() for tag in match.group(2).split(",")}
+            if sub_intents and tags.isdisjoint(sub_intents):
+                dropped = True
+                continue
+            lines.append(match.group(1) + line[match.end():])
+        if dropped and len(lines) == 1 and lines[0].rstrip().endswith(":"):
+            continue
+        paragraphs.append("\n".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def _parse_sub_intents(manifest: Dict) -> Dict[str, Dict[str, Tuple[str, ...]]]:
+    sub_intents = manifest.get("subIntents", {})
+    if not isinstance(sub_intents, dict):
+        raise PromptRegistryError("subIntents must map component types to sub-intents")
+    parsed = {}
+    for component_type, intents in sub_intents.items():
+        if not isinstance(intents, dict) or not all(
+            isinstance(keywords, list) and all(isinstance(keyword, str) for keyword in keywords)
+            for keywords in intents.values()
+        ):
+            raise PromptRegistryError(f"subIntents.{component_type} must map sub-intents to keyword lists")
+        parsed[component_type] = {
+            intent: tuple(keyword.lower() for keyword in keywords) for intent, keywords in intents.items()
+        }
+    return parsed
+
+
+class PromptRegistry:
+    """Loads prompt sets from disk and hot-reloads them when files change"""
+
+    def __init__(self, directory: str = DEFAULT_PROMPT_DIR, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            directory: Directory holding manifest.json and the prompt files
+            check_interval: Minimum seconds between file modification checks
+
+        Raises:
+            PromptRegistryError: If the initial prompt set cannot be loaded
+        """
+        self.directory = directory
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._prompt_set = self._load()
+        logger.info("Prompt registry loaded version %s from %s", self._prompt_set.version, directory)
+
+    @property
+    def version(self) -> str:
+        """Version of the current prompt set"""
+        return self.current().version
+
+    def current(self) -> PromptSet:
+        """
+        Get the current prompt set, reloading it first if files changed
+
+        A reload that fails (for example a half-written file) keeps serving
+        the previous set.
+        """
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                if self._mtimes() != self._prompt_set.mtimes:
+                    self.reload()
+            finally:
+                self._lock.release()
+        return self._prompt_set
+
+    def reload(self) -> PromptSet:
+        """Load the prompt set from disk and swap it in if it is valid"""
+        try:
+            prompt_set = self._load()
+        except PromptRegistryError as e:
+            logger.error("Prompt registry reload failed, keeping version %s: %s", self._prompt_set.version, e)
+            return self._prompt_set
+
+        if prompt_set.version != self._prompt_set.version:
+            logger.info("Prompt registry reloaded: %s -> %s", self._prompt_set.version, prompt_set.version)
+        # Single reference assignment: readers see either the old or the new set
+        self._prompt_set = prompt_set
+        return prompt_set
+
+    def _paths(self) -> Dict[str, str]:
+        names = [MANIFEST_FILE, f"{BASE_PROMPT_NAME}.txt"]
+        names += [f"{component_type.value}.txt" for component_type in ComponentType]
+        return {name: os.path.join(self.directory, name) for name in names}
+
+    def _mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name, path in self._paths().items():
+            try:
+                mtimes[name] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[name] = 0.0
+        return mtimes
+
+    def _load(self) -> PromptSet:
+        mtimes = self._mtimes()
+        paths = self._paths()
+
+        try:
+            with open(paths[MANIFEST_FILE], encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+            with open(paths[f"{BASE_PROMPT_NAME}.txt"], encoding="utf-8") as base_file:
+                base = base_file.read().strip()
+
+            instructions = {}
+            for component_type in ComponentType:
+                path = paths[f"{component_type.value}.txt"]
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as instructions_file:
+                        instructions[component_type.value] = instructions_file.read().strip()
+        except (OSError, ValueError) as e:
+            raise PromptRegistryError(f"Could not load prompts from {self.directory}: {e}") from e
+
+        if not base:
+            raise PromptRegistryError(f"Base prompt in {self.directory} is empty")
+        sub_intents = _parse_sub_intents(manifest)
+
+        # The content hash makes the version change on any edit, even if the
+        # manifest version was not bumped
+        digest = hashlib.sha256(base.encode("utf-8"))
+        for name in sorted(instructions):
+            digest.update(f"\0{name}\0{instructions[name]}".encode("utf-8"))
+        digest.update(json.dumps(sub_intents, sort_keys=True).encode("utf-8"))
+        version = f"{manifest.get('version', '0')}+{digest.hexdigest()[:8]}"
+
+        assembled = {
+            component_type: assemble_prompt(base, render_instructions(instructions.get(component_type.value, "")))
+            for component_type in ComponentType
+        }
+        return PromptSet(
+            version=version, base=base, instructions=instructions, assembled=assembled, mtimes=mtimes,
+            sub_intents=sub_intents,
+        )
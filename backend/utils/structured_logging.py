@@ -0,0 +1,226 @@
+"""
+Structured, non-blocking logging for the AI Component Builder backend.
+
+Request threads only put log records on a bounded in-memory queue; a
+QueueListener thread formats them as JSON lines and writes them out, so a slow
+log sink never adds latency to a request. When the queue is full, records are
+dropped and counted instead of blocking. Every record carries the id of the
+request it was logged for, and INFO-level lines can be sampled per request so
+high-volume paths keep whole request traces at a fraction of the volume.
+"""
+
+import os
+import sys
+import copy
+import zlib
+import queue
+import random
+import atexit
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from utils import json_codec
+
+NO_REQUEST_ID = "-"
+
+# Id of the request being handled by the current thread or task
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default=NO_REQUEST_ID)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# LogRecord attributes that are not user-supplied "extra" fields
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "requestId": getattr(record, "request_id", NO_REQUEST_ID),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json_codec.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id to records on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of records at or below INFO; warnings and errors are kept
+
+    Records logged during a request are sampled by request id, so a request is
+    either logged completely or not at all.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno > logging.INFO:
+            return True
+        request_id = getattr(record, "request_id", NO_REQUEST_ID)
+        if request_id != NO_REQUEST_ID:
+            keep = zlib.crc32(request_id.encode("utf-8")) / 0xFFFFFFFF < self.rate
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            self.sampled_out += 1
+        return keep
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.enqueued = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Make the record safe to hand to another thread
+
+        Merges the message arguments (the cheap part of formatting) and renders
+        any traceback; JSON encoding and I/O are left to the writer thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full of records; wait for room instead of failing
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class LoggingController:
+    """Owns the background log writer and its counters"""
+
+    def __init__(self, handler: DroppingQueueHandler, listener: QueueListener, sampler: SamplingFilter):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.handler.enqueued,
+            "dropped": self.handler.dropped,
+            "sampledOut": self.sampler.sampled_out,
+            "sampleRate": self.sampler.rate,
+            "queueDepth": self.handler.queue.qsize(),
+        }
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer thread"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.handler)
+
+
+_controller: Optional[LoggingController] = None
+
+
+def get_logging_controller() -> Optional[LoggingController]:
+    """The controller installed by configure_logging, if any"""
+    return _controller
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    sample_rate: Optional[float] = None,
+    stream: Any = None
+) -> LoggingController:
+    """
+    Route all logging through a bounded queue to a background writer
+
+    Args:
+        level: Root log level. Defaults to LOG_LEVEL or INFO
+        log_format: "json" or "text". Defaults to LOG_FORMAT or json
+        queue_size: Maximum queued records. Defaults to LOG_QUEUE_SIZE or 10000
+        sample_rate: Fraction of INFO and DEBUG records kept. Defaults to
+            LOG_SAMPLE_RATE or 1.0
+        stream: Output stream, defaults to stderr
+
+    Returns:
+        Controller for the installed writer; replaces any earlier one
+    """
+    global _controller
+    if _controller is not None:
+        _controller.stop()
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    log_format = log_format or os.getenv("LOG_FORMAT", "json")
+    queue_size = queue_size if queue_size is not None else int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    sample_rate = sample_rate if sample_rate is not None else float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    # Filters run on the calling thread, before the record is queued: the
+    # request id is only visible there, and sampled-out records are never
+    # formatted at all
+    sampler = SamplingFilter(sample_rate)
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(sampler)
+
+    listener = _Listener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, (logging.StreamHandler, DroppingQueueHandler)) and not _is_capture_handler(existing):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    _controller = LoggingController(handler, listener, sampler)
+    atexit.register(_controller.stop)
+    return _controller
+
+
+def _is_capture_handler(handler: logging.Handler) -> bool:
+    """Handlers installed by test runners (pytest's caplog) are left alone"""
+    return type(handler).__module__.startswith("_pytest")